@@ -1,27 +1,149 @@
 """
 Main FastAPI application for FindBack AI service.
 """
+import asyncio
+import time
+from collections import Counter
+from typing import Optional
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse
 from contextlib import asynccontextmanager
 
-from ai_service.api.routers import encode, items, search
+from ai_service.api.routers import encode, ingest, items, search
+from ai_service.models.embedding_cache import get_image_cache, get_text_cache
+from ai_service.models.encode_batcher import get_encode_batcher
+from ai_service.processing.text_preprocess import preprocess_text
+from ai_service.vector_store.registry import get_index_registry
+from ai_service.utils.executor import run_blocking, shutdown_executor
 from ai_service.utils.config import Config
 from ai_service.utils.logger import logger
 
 
+class Readiness:
+    """Progress of the startup preload, as reported by /ready."""
+    
+    def __init__(self):
+        """Initialize readiness state (not started)."""
+        self.stage = "not started"
+        self.started_at: Optional[float] = None
+        self.ready_at: Optional[float] = None
+        self.error: Optional[str] = None
+    
+    def start(self) -> None:
+        """Mark the beginning of startup."""
+        self.stage = "starting"
+        self.started_at = time.monotonic()
+        self.ready_at = None
+        self.error = None
+    
+    def mark_ready(self) -> None:
+        """Mark the service as ready to take traffic."""
+        self.stage = "ready"
+        self.ready_at = time.monotonic()
+    
+    def fail(self, error: Exception) -> None:
+        """Mark the preload as failed."""
+        self.stage = "failed"
+        self.error = str(error)
+    
+    @property
+    def is_ready(self) -> bool:
+        """Whether the service is ready to take traffic."""
+        return self.ready_at is not None
+    
+    def snapshot(self) -> dict:
+        """
+        Summarize readiness.
+        
+        Returns:
+            Readiness flag, current stage, seconds since startup began and
+            time-to-ready (once ready), plus the error if the preload failed
+        """
+        now = time.monotonic()
+        return {
+            "ready": self.is_ready,
+            "stage": self.stage,
+            "elapsed_s": now - self.started_at if self.started_at is not None else None,
+            "time_to_ready_s": self.ready_at - self.started_at if self.is_ready else None,
+            "error": self.error
+        }
+
+
+# Global readiness state
+readiness = Readiness()
+
+
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     """Lifespan context manager for startup/shutdown."""
     # Startup
     logger.info("Starting FindBack AI service...")
     Config.initialize_directories()
+    readiness.start()
+    preload_task = None
+    if Config.PRELOAD_ON_STARTUP:
+        # Serve /healthcheck and /ready while the model loads
+        preload_task = asyncio.create_task(_run_preload())
+    else:
+        readiness.mark_ready()
     logger.info("FindBack AI service started successfully")
     
     yield
     
     # Shutdown
     logger.info("Shutting down FindBack AI service...")
+    if preload_task is not None and not preload_task.done():
+        await asyncio.wait([preload_task])
+    shutdown_executor()
+    get_index_registry().close()
+
+
+async def _run_preload() -> None:
+    """Preload off the event loop and record the outcome."""
+    try:
+        await run_blocking(_preload)
+        readiness.mark_ready()
+        logger.info(f"FindBack AI service ready in {readiness.snapshot()['time_to_ready_s']:.1f}s")
+    except Exception as e:
+        logger.error(f"Startup preload failed: {str(e)}")
+        readiness.fail(e)
+
+
+def _preload() -> None:
+    """Load the model and resident indexes, then warm them up."""
+    # Imported here so importing the app does not load torch and CLIP
+    from ai_service.models.clip_model import get_clip_model
+    
+    readiness.stage = "loading model"
+    clip_model = get_clip_model()
+    
+    readiness.stage = "loading indexes"
+    get_index_registry().preload()
+    
+    if Config.TEXT_CACHE_WARM_TOP_N > 0:
+        readiness.stage = "warming text cache"
+        _warm_text_cache(clip_model, Config.TEXT_CACHE_WARM_TOP_N)
+    
+    readiness.stage = "warming up"
+    clip_model.warm_up(Config.WARMUP_BATCH_SIZES)
+
+
+def _warm_text_cache(clip_model, top_n: int) -> None:
+    """Encode the most frequent stored item descriptions into the text cache."""
+    try:
+        registry = get_index_registry()
+        counts = Counter()
+        for collection in registry.collections():
+            store = registry.get_metadata_store(collection)
+            for item_id in store.list_all():
+                metadata = store.get(item_id) or {}
+                description = metadata.get("description")
+                if description and description.strip():
+                    counts[preprocess_text(description)] += 1
+        clip_model.warm_text_cache([text for text, _ in counts.most_common(top_n)])
+    except Exception as e:
+        logger.error(f"Failed to warm text embedding cache: {str(e)}")
 
 
 # Create FastAPI app
@@ -45,6 +167,7 @@ app.add_middleware(
 app.include_router(encode.router)
 app.include_router(items.router)
 app.include_router(search.router)
+app.include_router(ingest.router)
 
 
 @app.get("/healthcheck")
@@ -62,6 +185,44 @@ async def healthcheck() -> dict:
     }
 
 
+@app.get("/ready")
+async def ready() -> JSONResponse:
+    """
+    Readiness endpoint.
+    
+    Unlike /healthcheck, reports ready only once the model and indexes are
+    loaded and warmed up.
+    
+    Returns:
+        Readiness state; status 200 when ready, 503 otherwise
+    """
+    return JSONResponse(
+        status_code=200 if readiness.is_ready else 503,
+        content=readiness.snapshot()
+    )
+
+
+@app.get("/metrics")
+async def metrics() -> dict:
+    """
+    Runtime metrics endpoint.
+    
+    Returns:
+        Realised CLIP encode batch sizes per kind and image and text
+        embedding cache counters
+    """
+    image_cache_stats = None
+    if Config.IMAGE_CACHE_ENABLED:
+        # Opening the cache and counting its entries hit SQLite
+        image_cache = await run_blocking(get_image_cache)
+        image_cache_stats = await run_blocking(image_cache.stats)
+    return {
+        "encode_batches": get_encode_batcher().metrics.snapshot(),
+        "image_cache": image_cache_stats,
+        "text_cache": get_text_cache().stats()
+    }
+
+
 @app.get("/")
 async def root() -> dict:
     """
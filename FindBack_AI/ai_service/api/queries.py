@@ -0,0 +1,323 @@
+"""
+Reading, encoding, adding and searching of items shared by the API routers.
+"""
+import asyncio
+import numpy as np
+from fastapi import HTTPException, UploadFile
+from pydantic import BaseModel, Field
+from typing import TYPE_CHECKING, List, Optional, Tuple
+
+from ai_service.models.encode_batcher import get_encode_batcher
+from ai_service.vector_store.metadata_store import MetadataStore
+from ai_service.utils.config import Config
+from ai_service.utils.executor import run_blocking
+from ai_service.utils.media import read_media_file
+from ai_service.utils.logger import logger
+
+if TYPE_CHECKING:
+    from ai_service.vector_store.faiss_index import FAISSIndex
+
+# Collection searched for each side: lost items are looked for among found ones
+SEARCH_COLLECTIONS = {"lost": "found", "found": "lost"}
+
+
+class MatchResult(BaseModel):
+    """Single search result."""
+    item_id: str = Field(..., description="Item identifier")
+    score: float = Field(..., description="Similarity score")
+    description: Optional[str] = Field(None, description="Item description")
+    has_image: bool = Field(..., description="Whether item has image")
+    has_text: bool = Field(..., description="Whether item has text")
+    match_type: str = Field(..., description="Type of match")
+
+
+async def read_image(image: Optional[UploadFile], image_path: Optional[str]) -> Optional[bytes]:
+    """
+    Read a query or item image from an upload or from the shared media root.
+    
+    Reading by path avoids sending the file over HTTP when the backend and
+    this service mount the same media volume; uploads remain supported.
+    
+    Args:
+        image: Optional uploaded image file
+        image_path: Optional image path relative to Config.MEDIA_ROOT
+        
+    Returns:
+        Image bytes, or None if neither is given
+        
+    Raises:
+        HTTPException: 400 if both are given or the image is invalid or too
+            large, 404 if no file exists at the path
+    """
+    if image is not None and image_path:
+        raise HTTPException(status_code=400, detail="Provide either image or image_path, not both")
+    
+    if image_path:
+        try:
+            return await run_blocking(read_media_file, image_path)
+        except FileNotFoundError as e:
+            raise HTTPException(status_code=404, detail=str(e))
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+    
+    if image is None:
+        return None
+    image_bytes = await image.read()
+    if len(image_bytes) > Config.MAX_IMAGE_SIZE:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Image too large. Maximum size is {Config.MAX_IMAGE_SIZE // (1024*1024)}MB"
+        )
+    return image_bytes
+
+
+async def encode_inputs(text: Optional[str], image_bytes: Optional[bytes]) -> Tuple[np.ndarray, str]:
+    """
+    Encode an image and/or text through the shared encode batcher and combine them.
+    
+    The image and text encodes are in flight together, so each joins the
+    next batched forward pass of its kind.
+    
+    Args:
+        text: Optional non-empty text
+        image_bytes: Optional image bytes (at least one of the two is given)
+        
+    Returns:
+        Tuple of (combined embedding, query type)
+    """
+    batcher = get_encode_batcher()
+    encodes = []
+    if image_bytes is not None:
+        encodes.append(batcher.encode_image(image_bytes))
+    if text is not None:
+        encodes.append(batcher.encode_text(text))
+    embeddings = await asyncio.gather(*encodes)
+    
+    image_embedding = embeddings[0] if image_bytes is not None else None
+    text_embedding = embeddings[-1] if text is not None else None
+    return combine_embeddings(image_embedding, text_embedding)
+
+
+def combine_embeddings(
+    image_embedding: Optional[np.ndarray],
+    text_embedding: Optional[np.ndarray]
+) -> Tuple[np.ndarray, str]:
+    """
+    Build the query embedding from an image and/or text embedding.
+    
+    Args:
+        image_embedding: Optional image embedding
+        text_embedding: Optional text embedding
+        
+    Returns:
+        Tuple of (query embedding, query type "image", "text" or "both")
+    """
+    if image_embedding is not None and text_embedding is not None:
+        combined = (image_embedding + text_embedding) / 2.0
+        norm = np.linalg.norm(combined)
+        if norm > 0:
+            return combined / norm, "both"
+        return combined, "both"
+    if image_embedding is not None:
+        return image_embedding, "image"
+    return text_embedding, "text"
+
+
+def item_query_type(has_image: bool, has_text: bool) -> str:
+    """
+    Get the query type of a search with a stored item's embedding.
+    
+    Args:
+        has_image: Whether the item was added with an image
+        has_text: Whether the item was added with a description
+        
+    Returns:
+        "both", "image" or "text", as the stored vector combines whatever
+        the item was added with
+    """
+    if has_image and has_text:
+        return "both"
+    if has_image:
+        return "image"
+    return "text"
+
+
+def search_items(
+    query_embedding: np.ndarray,
+    index: "FAISSIndex",
+    metadata_store: MetadataStore,
+    query_type: str,
+    top_k: int = 10
+) -> List[MatchResult]:
+    """
+    Search an index and enrich the results with item metadata.
+    
+    Args:
+        query_embedding: Query embedding vector
+        index: FAISS index instance
+        metadata_store: Metadata store instance
+        query_type: Type of query ("image", "text", or "both")
+        top_k: Number of results
+        
+    Returns:
+        List of match results
+    """
+    try:
+        results = index.search(query_embedding, top_k=top_k)
+        return to_match_results(results, metadata_store, query_type)
+        
+    except Exception as e:
+        logger.error(f"Error searching items: {str(e)}")
+        raise
+
+
+def search_items_batch(
+    query_embeddings: np.ndarray,
+    index: "FAISSIndex",
+    metadata_store: MetadataStore,
+    query_types: List[str],
+    top_k: int = 10
+) -> List[List[MatchResult]]:
+    """
+    Search an index with several queries at once and enrich the results.
+    
+    Args:
+        query_embeddings: Query embedding matrix (one row per query)
+        index: FAISS index instance
+        metadata_store: Metadata store instance
+        query_types: Type of each query ("image", "text", or "both")
+        top_k: Number of results per query
+        
+    Returns:
+        List of match results per query, in query order
+    """
+    try:
+        results = index.search_batch(query_embeddings, top_k=top_k)
+        return [
+            to_match_results(query_results, metadata_store, query_type)
+            for query_results, query_type in zip(results, query_types)
+        ]
+        
+    except Exception as e:
+        logger.error(f"Error searching items: {str(e)}")
+        raise
+
+
+def to_match_results(
+    results: List[Tuple[str, float]],
+    metadata_store: MetadataStore,
+    query_type: str
+) -> List[MatchResult]:
+    """
+    Enrich index search results with item metadata.
+    
+    Args:
+        results: (item_id, score) tuples from the index
+        metadata_store: Metadata store instance
+        query_type: Type of query ("image", "text", or "both")
+        
+    Returns:
+        List of match results (items without metadata are skipped)
+    """
+    match_results = []
+    for item_id, score in results:
+        metadata = metadata_store.get(item_id)
+        if metadata:
+            has_image = metadata.get("has_image", False)
+            has_text = metadata.get("has_text", False)
+            
+            # Determine match type based on query type and item type
+            if query_type == "image":
+                if has_image and has_text:
+                    match_type = "image→both"
+                elif has_image:
+                    match_type = "image→image"
+                elif has_text:
+                    match_type = "image→text"
+                else:
+                    match_type = "image→none"
+            elif query_type == "text":
+                if has_image and has_text:
+                    match_type = "text→both"
+                elif has_image:
+                    match_type = "text→image"
+                elif has_text:
+                    match_type = "text→text"
+                else:
+                    match_type = "text→none"
+            else:  # query_type == "both"
+                if has_image and has_text:
+                    match_type = "both→both"
+                elif has_image:
+                    match_type = "both→image"
+                elif has_text:
+                    match_type = "both→text"
+                else:
+                    match_type = "both→none"
+            
+            match_results.append(MatchResult(
+                item_id=item_id,
+                score=score,
+                description=metadata.get("description"),
+                has_image=has_image,
+                has_text=has_text,
+                match_type=match_type
+            ))
+    
+    return match_results
+
+
+async def add_item(
+    item_id: str,
+    index: "FAISSIndex",
+    metadata_store: MetadataStore,
+    description: Optional[str] = None,
+    image_bytes: Optional[bytes] = None
+) -> dict:
+    """
+    Encode an item and add it to an index and metadata store.
+    
+    Args:
+        item_id: Unique item identifier
+        index: FAISS index instance
+        metadata_store: Metadata store instance
+        description: Optional text description
+        image_bytes: Optional image bytes
+        
+    Returns:
+        Result dictionary
+    """
+    try:
+        has_image = image_bytes is not None
+        has_text = description is not None and description.strip() != ""
+        
+        if not has_image and not has_text:
+            raise ValueError("Item must have at least an image or text description")
+        
+        # Encode and combine (average if both present)
+        final_embedding, _ = await encode_inputs(description if has_text else None, image_bytes)
+        
+        # Add to FAISS index
+        await run_blocking(index.add, final_embedding, item_id, save=True)
+        
+        # Add to metadata store
+        await run_blocking(
+            metadata_store.add,
+            item_id=item_id,
+            description=description,
+            has_image=has_image,
+            has_text=has_text
+        )
+        
+        logger.info(f"Added item {item_id} (image: {has_image}, text: {has_text})")
+        
+        return {
+            "item_id": item_id,
+            "status": "added",
+            "has_image": has_image,
+            "has_text": has_text
+        }
+        
+    except Exception as e:
+        logger.error(f"Error adding item {item_id}: {str(e)}")
+        raise
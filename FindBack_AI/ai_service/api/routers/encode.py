@@ -5,7 +5,7 @@ from fastapi import APIRouter, UploadFile, File, HTTPException
 from pydantic import BaseModel, Field
 from typing import List
 
-from ai_service.models.clip_model import get_clip_model
+from ai_service.models.encode_batcher import get_encode_batcher
 from ai_service.utils.config import Config
 from ai_service.utils.logger import logger
 
@@ -39,8 +39,7 @@ async def encode_text(request: TextEncodeRequest) -> TextEncodeResponse:
         if not request.text or not request.text.strip():
             raise HTTPException(status_code=400, detail="Text cannot be empty or whitespace only")
         
-        clip_model = get_clip_model()
-        embedding = clip_model.encode_text(request.text, normalize=True)
+        embedding = await get_encode_batcher().encode_text(request.text)
         
         return TextEncodeResponse(
             embedding=embedding.tolist(),
@@ -78,9 +77,8 @@ async def encode_image(file: UploadFile = File(...)) -> dict:
                 detail=f"Image too large. Maximum size is {Config.MAX_IMAGE_SIZE // (1024*1024)}MB"
             )
         
-        # Encode
-        clip_model = get_clip_model()
-        embedding = clip_model.encode_image(image_bytes, normalize=True)
+        # Encode (batched with concurrent requests)
+        embedding = await get_encode_batcher().encode_image(image_bytes)
         
         return {
             "embedding": embedding.tolist(),
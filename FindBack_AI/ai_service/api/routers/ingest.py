@@ -0,0 +1,117 @@
+"""
+API endpoint for adding an item and matching it in one call.
+"""
+from fastapi import APIRouter, UploadFile, File, Form, HTTPException, Query
+from pydantic import BaseModel, Field
+from typing import List, Literal, Optional
+
+from ai_service.api.queries import (
+    SEARCH_COLLECTIONS, MatchResult, add_item, item_query_type, read_image, search_items
+)
+from ai_service.vector_store.registry import get_index, get_metadata_store
+from ai_service.utils.executor import run_blocking
+from ai_service.utils.logger import logger
+
+router = APIRouter(prefix="/ingest", tags=["ingest"])
+
+
+class IngestResponse(BaseModel):
+    """Ingest response: the added item and its candidate matches."""
+    item_id: str = Field(..., description="Item identifier")
+    status: str = Field(..., description="Status of the item")
+    has_image: bool = Field(..., description="Whether item has image")
+    has_text: bool = Field(..., description="Whether item has text")
+    query_type: str = Field(..., description="Type of query (image, text, both)")
+    matches: List[MatchResult] = Field(..., description="Matches on the opposite side")
+    total_found: int = Field(..., description="Total number of matches")
+
+
+@router.post(
+    "/{side}",
+    response_model=IngestResponse,
+    summary="Add an item and find its matches",
+    description=(
+        "Encode an item once, add it to its side's index and metadata store, and search "
+        "the opposite side with the same embedding."
+    ),
+    openapi_extra={
+        "requestBody": {
+            "content": {
+                "multipart/form-data": {
+                    "schema": {
+                        "type": "object",
+                        "properties": {
+                            "item_id": {"type": "string"},
+                            "description": {"type": "string"},
+                            "image": {"type": "string", "format": "binary"},
+                            "image_path": {"type": "string"}
+                        },
+                        "required": ["item_id"]
+                    }
+                }
+            }
+        }
+    }
+)
+async def ingest_item(
+    side: Literal["lost", "found"],
+    top_k: int = Query(10, ge=1, le=100, description="Number of matches to return"),
+    item_id: str = Form(...),
+    description: Optional[str] = Form(None),
+    image: Optional[UploadFile] = File(None),
+    image_path: Optional[str] = Form(None)
+) -> IngestResponse:
+    """
+    Add a lost or found item and search the opposite side for it.
+    
+    Args:
+        side: Side the item belongs to ("lost" or "found")
+        top_k: Number of matches
+        item_id: Unique item identifier
+        description: Optional text description
+        image: Optional image file
+        image_path: Optional image path under the shared media root, read
+            instead of an uploaded file
+        
+    Returns:
+        Added item status and its matches
+    """
+    try:
+        # Read image if provided, from the upload or the shared media root
+        image_bytes = await read_image(image, image_path)
+        
+        # Initialize stores
+        index = await run_blocking(get_index, side)
+        metadata_store = await run_blocking(get_metadata_store, side)
+        
+        # Check if item already exists
+        if await run_blocking(metadata_store.exists, item_id):
+            raise HTTPException(status_code=400, detail=f"Item {item_id} already exists")
+        
+        result = await add_item(item_id, index, metadata_store, description, image_bytes)
+        
+        # Search with the vector just stored instead of encoding the item again
+        query_embedding = await run_blocking(index.get_vector, item_id)
+        query_type = item_query_type(result["has_image"], result["has_text"])
+        collection = SEARCH_COLLECTIONS[side]
+        matches = await run_blocking(
+            search_items,
+            query_embedding,
+            await run_blocking(get_index, collection),
+            await run_blocking(get_metadata_store, collection),
+            query_type,
+            top_k
+        )
+        
+        return IngestResponse(
+            **result,
+            query_type=query_type,
+            matches=matches,
+            total_found=len(matches)
+        )
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error in ingest_item: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Failed to ingest {side} item: {str(e)}")
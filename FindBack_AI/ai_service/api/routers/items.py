@@ -1,96 +1,38 @@
 """
 API endpoints for adding lost and found items.
 """
+import asyncio
+import json
 import numpy as np
 from fastapi import APIRouter, UploadFile, File, Form, HTTPException
-from typing import Optional
+from pydantic import BaseModel, Field
+from typing import Dict, List, Literal, Optional
 
-from ai_service.models.clip_model import get_clip_model
-from ai_service.vector_store.faiss_index import FAISSIndex
-from ai_service.vector_store.metadata_store import MetadataStore
+from ai_service.api.queries import add_item, encode_inputs, read_image
+from ai_service.vector_store.registry import get_index, get_metadata_store
 from ai_service.utils.config import Config
+from ai_service.utils.executor import run_blocking
+from ai_service.utils.media import read_media_file
 from ai_service.utils.logger import logger
 
 router = APIRouter(prefix="/add", tags=["items"])
 
 
-def _add_item(
-    item_id: str,
-    index: FAISSIndex,
-    metadata_store: MetadataStore,
-    description: Optional[str] = None,
-    image_bytes: Optional[bytes] = None
-) -> dict:
-    """
-    Internal function to add an item to index and metadata store.
-    
-    Args:
-        item_id: Unique item identifier
-        index: FAISS index instance
-        metadata_store: Metadata store instance
-        description: Optional text description
-        image_bytes: Optional image bytes
-        
-    Returns:
-        Result dictionary
-    """
-    try:
-        clip_model = get_clip_model()
-        has_image = image_bytes is not None
-        has_text = description is not None and description.strip() != ""
-        
-        if not has_image and not has_text:
-            raise ValueError("Item must have at least an image or text description")
-        
-        # Encode image if provided
-        image_embedding = None
-        if has_image:
-            image_embedding = clip_model.encode_image(image_bytes, normalize=True)
-        
-        # Encode text if provided
-        text_embedding = None
-        if has_text:
-            text_embedding = clip_model.encode_text(description, normalize=True)
-        
-        # Combine embeddings (average if both present)
-        if image_embedding is not None and text_embedding is not None:
-            # Average the embeddings and re-normalize
-            combined_embedding = (image_embedding + text_embedding) / 2.0
-            # L2-normalize the combined embedding
-            norm = np.linalg.norm(combined_embedding)
-            if norm > 0:
-                combined_embedding = combined_embedding / norm
-            final_embedding = combined_embedding
-        elif image_embedding is not None:
-            final_embedding = image_embedding
-        elif text_embedding is not None:
-            final_embedding = text_embedding
-        else:
-            raise ValueError("No valid embedding generated")
-        
-        # Add to FAISS index
-        index.add(final_embedding, item_id, save=True)
-        
-        # Add to metadata store
-        metadata_store.add(
-            item_id=item_id,
-            description=description,
-            has_image=has_image,
-            has_text=has_text
-        )
-        
-        logger.info(f"Added item {item_id} (image: {has_image}, text: {has_text})")
-        
-        return {
-            "item_id": item_id,
-            "status": "added",
-            "has_image": has_image,
-            "has_text": has_text
-        }
-        
-    except Exception as e:
-        logger.error(f"Error adding item {item_id}: {str(e)}")
-        raise
+class BatchItemResult(BaseModel):
+    """Outcome of one item of a batch add."""
+    item_id: Optional[str] = Field(None, description="Item identifier (None if the line could not be parsed)")
+    status: str = Field(..., description="'added' or 'failed'")
+    has_image: bool = Field(False, description="Whether item has image")
+    has_text: bool = Field(False, description="Whether item has text")
+    error: Optional[str] = Field(None, description="Why the item failed, if it did")
+
+
+class BatchAddResponse(BaseModel):
+    """Batch add response."""
+    side: str = Field(..., description="Side the items were added to")
+    added: int = Field(..., description="Number of items added")
+    failed: int = Field(..., description="Number of items that failed")
+    results: List[BatchItemResult] = Field(..., description="Outcome per item, in request order")
 
 
 @router.post(
@@ -104,7 +46,8 @@ def _add_item(
                         "properties": {
                             "item_id": {"type": "string"},
                             "description": {"type": "string"},
-                            "image": {"type": "string", "format": "binary"}
+                            "image": {"type": "string", "format": "binary"},
+                            "image_path": {"type": "string"}
                         },
                         "required": ["item_id"]
                     }
@@ -116,7 +59,8 @@ def _add_item(
 async def add_lost_item(
     item_id: str = Form(...),
     description: Optional[str] = Form(None),
-    image: Optional[UploadFile] = File(None)
+    image: Optional[UploadFile] = File(None),
+    image_path: Optional[str] = Form(None)
 ) -> dict:
     """
     Add a lost item.
@@ -125,32 +69,25 @@ async def add_lost_item(
         item_id: Unique item identifier
         description: Optional text description
         image: Optional image file
-        
+        image_path: Optional image path under the shared media root, read
+            instead of an uploaded file
+            
     Returns:
         Result dictionary
     """
     try:
-        # Read image if provided
-        image_bytes = None
-        
-        if image:
-            image_bytes = await image.read()
-            # Validate image size
-            if len(image_bytes) > Config.MAX_IMAGE_SIZE:
-                raise HTTPException(
-                    status_code=400,
-                    detail=f"Image too large. Maximum size is {Config.MAX_IMAGE_SIZE // (1024*1024)}MB"
-                )
+        # Read image if provided, from the upload or the shared media root
+        image_bytes = await read_image(image, image_path)
         
         # Initialize stores
-        index = FAISSIndex(Config.get_lost_items_index_path())
-        metadata_store = MetadataStore(Config.get_lost_items_metadata_path())
+        index = await run_blocking(get_index, "lost")
+        metadata_store = await run_blocking(get_metadata_store, "lost")
         
         # Check if item already exists
-        if metadata_store.exists(item_id):
+        if await run_blocking(metadata_store.exists, item_id):
             raise HTTPException(status_code=400, detail=f"Item {item_id} already exists")
         
-        return _add_item(item_id, index, metadata_store, description, image_bytes)
+        return await add_item(item_id, index, metadata_store, description, image_bytes)
         
     except HTTPException:
         raise
@@ -170,7 +107,8 @@ async def add_lost_item(
                         "properties": {
                             "item_id": {"type": "string"},
                             "description": {"type": "string"},
-                            "image": {"type": "string", "format": "binary"}
+                            "image": {"type": "string", "format": "binary"},
+                            "image_path": {"type": "string"}
                         },
                         "required": ["item_id"]
                     }
@@ -182,7 +120,8 @@ async def add_lost_item(
 async def add_found_item(
     item_id: str = Form(...),
     description: Optional[str] = Form(None),
-    image: Optional[UploadFile] = File(None)
+    image: Optional[UploadFile] = File(None),
+    image_path: Optional[str] = Form(None)
 ) -> dict:
     """
     Add a found item.
@@ -191,35 +130,189 @@ async def add_found_item(
         item_id: Unique item identifier
         description: Optional text description
         image: Optional image file
-        
+        image_path: Optional image path under the shared media root, read
+            instead of an uploaded file
+            
     Returns:
         Result dictionary
     """
     try:
-        # Read image if provided
-        image_bytes = None
-        
-        if image:
-            image_bytes = await image.read()
-            # Validate image size
-            if len(image_bytes) > Config.MAX_IMAGE_SIZE:
-                raise HTTPException(
-                    status_code=400,
-                    detail=f"Image too large. Maximum size is {Config.MAX_IMAGE_SIZE // (1024*1024)}MB"
-                )
+        # Read image if provided, from the upload or the shared media root
+        image_bytes = await read_image(image, image_path)
         
         # Initialize stores
-        index = FAISSIndex(Config.get_found_items_index_path())
-        metadata_store = MetadataStore(Config.get_found_items_metadata_path())
+        index = await run_blocking(get_index, "found")
+        metadata_store = await run_blocking(get_metadata_store, "found")
         
         # Check if item already exists
-        if metadata_store.exists(item_id):
+        if await run_blocking(metadata_store.exists, item_id):
             raise HTTPException(status_code=400, detail=f"Item {item_id} already exists")
         
-        return _add_item(item_id, index, metadata_store, description, image_bytes)
+        return await add_item(item_id, index, metadata_store, description, image_bytes)
         
     except HTTPException:
         raise
     except Exception as e:
         logger.error(f"Error in add_found_item: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Failed to add found item: {str(e)}")
+
+
+@router.post(
+    "/batch",
+    response_model=BatchAddResponse,
+    summary="Add many items at once",
+    description=(
+        "Add many lost or found items in one request. `items` is NDJSON, one object per line "
+        "with item_id, optional description and either image, the file name of one of the "
+        "`images` parts, or image_path, a path under the shared media root. Items are encoded "
+        "in batched forward passes, added with one index call and persisted once."
+    ),
+    openapi_extra={
+        "requestBody": {
+            "content": {
+                "multipart/form-data": {
+                    "schema": {
+                        "type": "object",
+                        "properties": {
+                            "side": {"type": "string", "enum": ["lost", "found"]},
+                            "items": {"type": "string"},
+                            "replace": {"type": "boolean"},
+                            "images": {"type": "array", "items": {"type": "string", "format": "binary"}}
+                        },
+                        "required": ["side", "items"]
+                    }
+                }
+            }
+        }
+    }
+)
+async def add_batch(
+    side: Literal["lost", "found"] = Form(...),
+    items: str = Form(...),
+    replace: bool = Form(False),
+    images: List[UploadFile] = File([])
+) -> BatchAddResponse:
+    """
+    Add many lost or found items.
+    
+    Args:
+        side: Side the items belong to ("lost" or "found")
+        items: NDJSON item lines (item_id, description, image part name or
+            image_path under the shared media root)
+        replace: Whether existing items are replaced instead of rejected
+        images: Image files referenced by the items
+        
+    Returns:
+        Per-item outcome
+    """
+    lines = [line for line in items.splitlines() if line.strip()]
+    if len(lines) > Config.ADD_BATCH_MAX_ITEMS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Too many items. Maximum is {Config.ADD_BATCH_MAX_ITEMS}"
+        )
+    
+    try:
+        index = await run_blocking(get_index, side)
+        metadata_store = await run_blocking(get_metadata_store, side)
+        parts = {upload.filename: upload for upload in images}
+        image_data: Dict[str, bytes] = {}
+        
+        # Parse and validate; failures are reported per item
+        results: List[BatchItemResult] = []
+        pending = []  # (result, description, image bytes)
+        seen = set()
+        for line in lines:
+            result = BatchItemResult(status="failed")
+            results.append(result)
+            try:
+                item = json.loads(line)
+                if not isinstance(item, dict) or not item.get("item_id"):
+                    raise ValueError("Item must be an object with an item_id")
+                result.item_id = str(item["item_id"])
+                if result.item_id in seen:
+                    raise ValueError(f"Item {result.item_id} appears more than once in the batch")
+                seen.add(result.item_id)
+                
+                description = item.get("description")
+                image_bytes = None
+                if item.get("image") and item.get("image_path"):
+                    raise ValueError("Provide either image or image_path, not both")
+                if item.get("image_path"):
+                    image_bytes = await run_blocking(read_media_file, item["image_path"])
+                elif item.get("image"):
+                    name = item["image"]
+                    if name not in parts:
+                        raise ValueError(f"No image part named {name}")
+                    if name not in image_data:
+                        image_data[name] = await parts[name].read()
+                    image_bytes = image_data[name]
+                    if len(image_bytes) > Config.MAX_IMAGE_SIZE:
+                        raise ValueError(
+                            f"Image too large. Maximum size is {Config.MAX_IMAGE_SIZE // (1024*1024)}MB"
+                        )
+                result.has_image = image_bytes is not None
+                result.has_text = description is not None and description.strip() != ""
+                if not result.has_image and not result.has_text:
+                    raise ValueError("Item must have at least an image or text description")
+                pending.append((result, description, image_bytes))
+            except Exception as e:
+                result.error = str(e)
+        
+        if not replace and pending:
+            # Check if items already exist
+            def existing_ids() -> set:
+                return {r.item_id for r, _, _ in pending if metadata_store.exists(r.item_id)}
+            existing = await run_blocking(existing_ids)
+            for result, _, _ in pending:
+                if result.item_id in existing:
+                    result.error = f"Item {result.item_id} already exists"
+            pending = [entry for entry in pending if entry[0].item_id not in existing]
+        
+        # Encode all items together, so the batcher packs them into full forward passes
+        encoded = await asyncio.gather(
+            *(
+                encode_inputs(description if result.has_text else None, image_bytes)
+                for result, description, image_bytes in pending
+            ),
+            return_exceptions=True
+        )
+        added = []
+        for (result, description, _), outcome in zip(pending, encoded):
+            if isinstance(outcome, Exception):
+                result.error = str(outcome)
+            else:
+                added.append((result, description, outcome[0]))
+        
+        if added:
+            # One index call and one metadata write for the whole batch
+            await run_blocking(
+                index.add_batch,
+                np.stack([embedding for _, _, embedding in added]),
+                [result.item_id for result, _, _ in added],
+                save=True
+            )
+            await run_blocking(metadata_store.add_many, [
+                {
+                    "item_id": result.item_id,
+                    "description": description,
+                    "has_image": result.has_image,
+                    "has_text": result.has_text
+                }
+                for result, description, _ in added
+            ])
+            for result, _, _ in added:
+                result.status = "added"
+        
+        logger.info(f"Added {len(added)} of {len(results)} {side} items in one batch")
+        
+        return BatchAddResponse(
+            side=side,
+            added=len(added),
+            failed=len(results) - len(added),
+            results=results
+        )
+        
+    except Exception as e:
+        logger.error(f"Error in add_batch: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Failed to add {side} items: {str(e)}")
@@ -1,31 +1,28 @@
 """
 API endpoints for searching lost and found items.
 """
+import asyncio
+import base64
+import binascii
 import numpy as np
 from fastapi import APIRouter, UploadFile, File, HTTPException, Query, Form
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel, Field
-from typing import List, Optional
-from pathlib import Path
+from typing import AsyncIterator, List, Literal, Optional, Tuple, Union
 
-from ai_service.models.clip_model import get_clip_model
-from ai_service.vector_store.faiss_index import FAISSIndex
-from ai_service.vector_store.metadata_store import MetadataStore
+from ai_service.api.queries import (
+    SEARCH_COLLECTIONS, MatchResult, encode_inputs, item_query_type,
+    read_image, search_items, search_items_batch
+)
+from ai_service.vector_store.registry import get_index, get_metadata_store
 from ai_service.utils.config import Config
+from ai_service.utils.executor import run_blocking
+from ai_service.utils.media import read_media_file
 from ai_service.utils.logger import logger
 
 router = APIRouter(prefix="/search", tags=["search"])
 
 
-class MatchResult(BaseModel):
-    """Single search result."""
-    item_id: str = Field(..., description="Item identifier")
-    score: float = Field(..., description="Similarity score")
-    description: Optional[str] = Field(None, description="Item description")
-    has_image: bool = Field(..., description="Whether item has image")
-    has_text: bool = Field(..., description="Whether item has text")
-    match_type: str = Field(..., description="Type of match")
-
-
 class SearchResponse(BaseModel):
     """Search response."""
     query_type: str = Field(..., description="Type of query (image, text, both)")
@@ -33,85 +30,44 @@ class SearchResponse(BaseModel):
     total_found: int = Field(..., description="Total number of matches")
 
 
-def _search_items(
-    query_embedding: np.ndarray,
-    index_path: Path,
-    metadata_path: Path,
-    query_type: str,
-    top_k: int = 10
-) -> List[MatchResult]:
-    """
-    Internal function to search for items.
-    
-    Args:
-        query_embedding: Query embedding vector
-        index_path: Path to FAISS index
-        metadata_path: Path to metadata store
-        query_type: Type of query ("image", "text", or "both")
-        top_k: Number of results
-        
-    Returns:
-        List of match results
-    """
-    try:
-        # Initialize stores
-        index = FAISSIndex(index_path)
-        metadata_store = MetadataStore(metadata_path)
-        
-        # Search
-        results = index.search(query_embedding, top_k=top_k)
-        
-        # Enrich with metadata
-        match_results = []
-        for item_id, score in results:
-            metadata = metadata_store.get(item_id)
-            if metadata:
-                has_image = metadata.get("has_image", False)
-                has_text = metadata.get("has_text", False)
-                
-                # Determine match type based on query type and item type
-                if query_type == "image":
-                    if has_image and has_text:
-                        match_type = "image→both"
-                    elif has_image:
-                        match_type = "image→image"
-                    elif has_text:
-                        match_type = "image→text"
-                    else:
-                        match_type = "image→none"
-                elif query_type == "text":
-                    if has_image and has_text:
-                        match_type = "text→both"
-                    elif has_image:
-                        match_type = "text→image"
-                    elif has_text:
-                        match_type = "text→text"
-                    else:
-                        match_type = "text→none"
-                else:  # query_type == "both"
-                    if has_image and has_text:
-                        match_type = "both→both"
-                    elif has_image:
-                        match_type = "both→image"
-                    elif has_text:
-                        match_type = "both→text"
-                    else:
-                        match_type = "both→none"
-                
-                match_results.append(MatchResult(
-                    item_id=item_id,
-                    score=score,
-                    description=metadata.get("description"),
-                    has_image=has_image,
-                    has_text=has_text,
-                    match_type=match_type
-                ))
-        
-        return match_results
-        
-    except Exception as e:
-        logger.error(f"Error searching items: {str(e)}")
-        raise
+class ItemSearchRequest(BaseModel):
+    """Search by stored item request."""
+    item_id: str = Field(..., description="Identifier of an item already added to the service")
+    side: Literal["lost", "found"] = Field(
+        ..., description="Side the item was added to; the opposite side is searched"
+    )
+    top_k: int = Field(10, ge=1, le=100, description="Number of results to return")
+
+
+class BatchQuery(BaseModel):
+    """Single query of a batch search."""
+    query_id: Optional[str] = Field(None, description="Caller's identifier, echoed in the result")
+    text: Optional[str] = Field(None, description="Optional text query")
+    image: Optional[str] = Field(None, description="Optional base64-encoded image file")
+    image_path: Optional[str] = Field(None, description="Optional image path under the shared media root")
+
+
+class BatchSearchRequest(BaseModel):
+    """Batch search request."""
+    side: Literal["lost", "found"] = Field(
+        ..., description="Side the queries describe; 'lost' searches found items, as /search/lost does"
+    )
+    queries: List[BatchQuery] = Field(..., description="Queries, each with text and/or image")
+    top_k: int = Field(10, ge=1, le=100, description="Number of results per query")
+
+
+class BatchSearchResult(BaseModel):
+    """Results of one query of a batch search."""
+    query_id: Optional[str] = Field(None, description="Caller's identifier of the query")
+    query_type: Optional[str] = Field(None, description="Type of query (image, text, both)")
+    matches: List[MatchResult] = Field(default_factory=list, description="List of matches")
+    total_found: int = Field(0, description="Total number of matches")
+    error: Optional[str] = Field(None, description="Why the query failed, if it did")
+
+
+class BatchSearchResponse(BaseModel):
+    """Batch search response."""
+    results: List[BatchSearchResult] = Field(..., description="Results in query order")
 
 
 @router.post(
@@ -127,7 +83,8 @@ def _search_items(
                         "type": "object",
                         "properties": {
                             "text": {"type": "string"},
-                            "image": {"type": "string", "format": "binary"}
+                            "image": {"type": "string", "format": "binary"},
+                            "image_path": {"type": "string"}
                         }
                     }
                 }
@@ -138,7 +95,8 @@ def _search_items(
 async def search_lost(
     top_k: int = Query(10, ge=1, le=100, description="Number of results to return"),
     text: Optional[str] = Form(None, description="Optional text query"),
-    image: Optional[UploadFile] = File(None, description="Optional image file")
+    image: Optional[UploadFile] = File(None, description="Optional image file"),
+    image_path: Optional[str] = Form(None, description="Optional image path under the shared media root")
 ) -> SearchResponse:
     """
     Search for lost items (search in found items index).
@@ -146,15 +104,16 @@ async def search_lost(
     Args:
         text: Optional text query
         image: Optional image query
+        image_path: Optional image query read from the shared media root
         top_k: Number of results
         
     Returns:
         Search results
     """
     try:
-        clip_model = get_clip_model()
         has_text = text is not None and text.strip() != ""
-        has_image = image is not None
+        image_bytes = await read_image(image, image_path)
+        has_image = image_bytes is not None
         
         if not has_text and not has_image:
             raise HTTPException(
@@ -162,43 +121,15 @@ async def search_lost(
                 detail="Must provide either text or image query"
             )
         
-        # Encode query
-        image_embedding = None
-        text_embedding = None
-        
-        if has_image:
-            image_bytes = await image.read()
-            if len(image_bytes) > Config.MAX_IMAGE_SIZE:
-                raise HTTPException(
-                    status_code=400,
-                    detail=f"Image too large. Maximum size is {Config.MAX_IMAGE_SIZE // (1024*1024)}MB"
-                )
-            image_embedding = clip_model.encode_image(image_bytes, normalize=True)
-        
-        if has_text:
-            text_embedding = clip_model.encode_text(text, normalize=True)
+        # Encode query, combining the embeddings if both are present
+        query_embedding, query_type = await encode_inputs(text if has_text else None, image_bytes)
         
-        # Combine embeddings if both present
-        if image_embedding is not None and text_embedding is not None:
-            combined = (image_embedding + text_embedding) / 2.0
-            norm = np.linalg.norm(combined)
-            if norm > 0:
-                query_embedding = combined / norm
-            else:
-                query_embedding = combined
-            query_type = "both"
-        elif image_embedding is not None:
-            query_embedding = image_embedding
-            query_type = "image"
-        else:
-            query_embedding = text_embedding
-            query_type = "text"
-        
-        # Search in found items index
-        matches = _search_items(
+        # Search in found items index (index and metadata I/O off the event loop)
+        matches = await run_blocking(
+            search_items,
             query_embedding,
-            Config.get_found_items_index_path(),
-            Config.get_found_items_metadata_path(),
+            await run_blocking(get_index, "found"),
+            await run_blocking(get_metadata_store, "found"),
             query_type,
             top_k
         )
@@ -229,7 +160,8 @@ async def search_lost(
                         "type": "object",
                         "properties": {
                             "text": {"type": "string"},
-                            "image": {"type": "string", "format": "binary"}
+                            "image": {"type": "string", "format": "binary"},
+                            "image_path": {"type": "string"}
                         }
                     }
                 }
@@ -240,7 +172,8 @@ async def search_lost(
 async def search_found(
     top_k: int = Query(10, ge=1, le=100, description="Number of results to return"),
     text: Optional[str] = Form(None, description="Optional text query"),
-    image: Optional[UploadFile] = File(None, description="Optional image file")
+    image: Optional[UploadFile] = File(None, description="Optional image file"),
+    image_path: Optional[str] = Form(None, description="Optional image path under the shared media root")
 ) -> SearchResponse:
     """
     Search for found items (search in lost items index).
@@ -248,15 +181,16 @@ async def search_found(
     Args:
         text: Optional text query
         image: Optional image query
+        image_path: Optional image query read from the shared media root
         top_k: Number of results
         
     Returns:
         Search results
     """
     try:
-        clip_model = get_clip_model()
         has_text = text is not None and text.strip() != ""
-        has_image = image is not None
+        image_bytes = await read_image(image, image_path)
+        has_image = image_bytes is not None
         
         if not has_text and not has_image:
             raise HTTPException(
@@ -264,45 +198,214 @@ async def search_found(
                 detail="Must provide either text or image query"
             )
         
-        # Encode query
-        image_embedding = None
-        text_embedding = None
+        # Encode query, combining the embeddings if both are present
+        query_embedding, query_type = await encode_inputs(text if has_text else None, image_bytes)
+        
+        # Search in lost items index (index and metadata I/O off the event loop)
+        matches = await run_blocking(
+            search_items,
+            query_embedding,
+            await run_blocking(get_index, "lost"),
+            await run_blocking(get_metadata_store, "lost"),
+            query_type,
+            top_k
+        )
+        
+        return SearchResponse(
+            query_type=query_type,
+            matches=matches,
+            total_found=len(matches)
+        )
         
-        if has_image:
-            image_bytes = await image.read()
-            if len(image_bytes) > Config.MAX_IMAGE_SIZE:
-                raise HTTPException(
-                    status_code=400,
-                    detail=f"Image too large. Maximum size is {Config.MAX_IMAGE_SIZE // (1024*1024)}MB"
-                )
-            image_embedding = clip_model.encode_image(image_bytes, normalize=True)
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error in search_found: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Failed to search: {str(e)}")
+
+
+async def _encode_query(query: BatchQuery) -> Tuple[np.ndarray, str]:
+    """
+    Encode one batch query through the shared encode batcher.
+    
+    Args:
+        query: Batch query
         
-        if has_text:
-            text_embedding = clip_model.encode_text(text, normalize=True)
+    Returns:
+        Tuple of (query embedding, query type)
         
-        # Combine embeddings if both present
-        if image_embedding is not None and text_embedding is not None:
-            combined = (image_embedding + text_embedding) / 2.0
-            norm = np.linalg.norm(combined)
-            if norm > 0:
-                query_embedding = combined / norm
-            else:
-                query_embedding = combined
-            query_type = "both"
-        elif image_embedding is not None:
-            query_embedding = image_embedding
-            query_type = "image"
+    Raises:
+        ValueError: If the query is empty or its image is invalid or too large
+        FileNotFoundError: If its image path does not exist
+    """
+    has_text = query.text is not None and query.text.strip() != ""
+    if not has_text and not query.image and not query.image_path:
+        raise ValueError("Must provide either text or image query")
+    if query.image and query.image_path:
+        raise ValueError("Provide either image or image_path, not both")
+    
+    image_bytes = None
+    if query.image_path:
+        image_bytes = await run_blocking(read_media_file, query.image_path)
+    elif query.image:
+        try:
+            image_bytes = base64.b64decode(query.image, validate=True)
+        except binascii.Error:
+            raise ValueError("Image is not valid base64")
+        if len(image_bytes) > Config.MAX_IMAGE_SIZE:
+            raise ValueError(f"Image too large. Maximum size is {Config.MAX_IMAGE_SIZE // (1024*1024)}MB")
+    return await encode_inputs(query.text if has_text else None, image_bytes)
+
+
+async def _run_search_batch(
+    queries: List[BatchQuery],
+    collection: str,
+    top_k: int
+) -> List[BatchSearchResult]:
+    """
+    Encode a group of queries and search them with one index call.
+    
+    Args:
+        queries: Batch queries
+        collection: Collection to search ("lost" or "found")
+        top_k: Number of results per query
+        
+    Returns:
+        Results in query order; queries that failed to encode carry the error
+    """
+    # All queries are in flight at once, so the batcher packs them into full forward passes
+    encoded: List[Union[Tuple[np.ndarray, str], Exception]] = await asyncio.gather(
+        *(_encode_query(query) for query in queries), return_exceptions=True
+    )
+    valid = [i for i, result in enumerate(encoded) if not isinstance(result, Exception)]
+    
+    matches = {}
+    if valid:
+        # Search in the collection (index and metadata I/O off the event loop)
+        found = await run_blocking(
+            search_items_batch,
+            np.stack([encoded[i][0] for i in valid]),
+            await run_blocking(get_index, collection),
+            await run_blocking(get_metadata_store, collection),
+            [encoded[i][1] for i in valid],
+            top_k
+        )
+        matches = dict(zip(valid, found))
+    
+    results = []
+    for i, query in enumerate(queries):
+        if i in matches:
+            results.append(BatchSearchResult(
+                query_id=query.query_id,
+                query_type=encoded[i][1],
+                matches=matches[i],
+                total_found=len(matches[i])
+            ))
         else:
-            query_embedding = text_embedding
-            query_type = "text"
+            results.append(BatchSearchResult(query_id=query.query_id, error=str(encoded[i])))
+    return results
+
+
+@router.post(
+    "/batch",
+    response_model=BatchSearchResponse,
+    summary="Search with many queries at once",
+    description=(
+        "Encode many text and/or image queries in batched forward passes and search them "
+        "with one index call. With stream=true, results are sent as NDJSON, one line per "
+        "query in order, in chunks of SEARCH_BATCH_STREAM_CHUNK queries."
+    )
+)
+async def search_batch(
+    request: BatchSearchRequest,
+    stream: bool = Query(False, description="Stream results as NDJSON lines")
+):
+    """
+    Search for several items at once.
+    
+    Args:
+        request: Side, queries and number of results per query
+        stream: Whether to stream results as NDJSON
+        
+    Returns:
+        Batch search response, or a streaming NDJSON response
+    """
+    if len(request.queries) > Config.SEARCH_BATCH_MAX_QUERIES:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Too many queries. Maximum is {Config.SEARCH_BATCH_MAX_QUERIES}"
+        )
+    collection = SEARCH_COLLECTIONS[request.side]
+    
+    if stream:
+        return StreamingResponse(
+            _stream_search_batch(request, collection),
+            media_type="application/x-ndjson"
+        )
+    
+    try:
+        results = await _run_search_batch(request.queries, collection, request.top_k)
+        return BatchSearchResponse(results=results)
+        
+    except Exception as e:
+        logger.error(f"Error in search_batch: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Failed to search: {str(e)}")
+
+
+async def _stream_search_batch(request: BatchSearchRequest, collection: str) -> AsyncIterator[str]:
+    """Yield NDJSON result lines chunk by chunk, so the first ones go out early."""
+    chunk = max(1, Config.SEARCH_BATCH_STREAM_CHUNK)
+    try:
+        for start in range(0, len(request.queries), chunk):
+            results = await _run_search_batch(request.queries[start:start + chunk], collection, request.top_k)
+            for result in results:
+                yield result.model_dump_json() + "\n"
+    except Exception as e:
+        # Headers are already sent; report the failure as the last line
+        logger.error(f"Error in search_batch stream: {str(e)}")
+        yield BatchSearchResult(error=f"Failed to search: {str(e)}").model_dump_json() + "\n"
+
+
+@router.post(
+    "/by_item",
+    response_model=SearchResponse,
+    summary="Search with a stored item",
+    description=(
+        "Search the opposite side with the embedding already stored for an item, "
+        "without uploading or encoding its image and text again."
+    )
+)
+async def search_by_item(request: ItemSearchRequest) -> SearchResponse:
+    """
+    Search for matches of an item that was already added.
+    
+    Args:
+        request: Item identifier, its side and number of results
         
-        # Search in lost items index
-        matches = _search_items(
+    Returns:
+        Search results
+    """
+    try:
+        index = await run_blocking(get_index, request.side)
+        query_embedding = await run_blocking(index.get_vector, request.item_id)
+        if query_embedding is None:
+            raise HTTPException(
+                status_code=404,
+                detail=f"Item {request.item_id} not found in {request.side} items"
+            )
+        metadata_store = await run_blocking(get_metadata_store, request.side)
+        metadata = await run_blocking(metadata_store.get, request.item_id) or {}
+        
+        query_type = item_query_type(metadata.get("has_image", False), metadata.get("has_text", False))
+        
+        collection = SEARCH_COLLECTIONS[request.side]
+        matches = await run_blocking(
+            search_items,
             query_embedding,
-            Config.get_lost_items_index_path(),
-            Config.get_lost_items_metadata_path(),
+            await run_blocking(get_index, collection),
+            await run_blocking(get_metadata_store, collection),
             query_type,
-            top_k
+            request.top_k
         )
         
         return SearchResponse(
@@ -314,5 +417,5 @@ async def search_found(
     except HTTPException:
         raise
     except Exception as e:
-        logger.error(f"Error in search_found: {str(e)}")
+        logger.error(f"Error in search_by_item: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Failed to search: {str(e)}")
@@ -1,32 +1,57 @@
 """
 CLIP model wrapper for encoding images and text.
 """
+import threading
+import time
 import torch
 import clip
-from typing import Union, List, Optional
+from PIL import Image
+from typing import Dict, Iterable, Union, List, Optional
 import numpy as np
 
+from ai_service.models.embedding_cache import content_key, get_image_cache, get_text_cache
+from ai_service.models.onnx_backend import ONNXEncoders
+from ai_service.models.quantization import (
+    CALIBRATION_TEXTS, calibration_images, embedding_drift, quantize_model
+)
 from ai_service.utils.config import Config
 from ai_service.utils.logger import logger
-from ai_service.processing.image_preprocess import preprocess_image, preprocess_image_batch
-from ai_service.processing.text_preprocess import preprocess_text, preprocess_text_batch
+from ai_service.processing.image_preprocess import preprocess_image, preprocess_images_each
+from ai_service.processing.text_preprocess import preprocess_text_batch
 
 
 class CLIPModel:
     """Wrapper for OpenAI CLIP model."""
     
-    def __init__(self, model_name: str = Config.CLIP_MODEL_NAME, device: str = Config.DEVICE):
+    def __init__(
+        self,
+        model_name: str = Config.CLIP_MODEL_NAME,
+        device: str = Config.DEVICE,
+        backend: str = Config.INFERENCE_BACKEND,
+        quantize: bool = Config.QUANTIZE_INT8
+    ):
         """
         Initialize CLIP model.
         
         Args:
             model_name: CLIP model name (e.g., "ViT-B/32", "RN50")
             device: Device to run on ("cpu" or "cuda")
+            backend: Inference backend ("torch" or "onnx")
+            quantize: Whether to apply dynamic INT8 quantization to the
+                linear layers (torch backend on CPU only)
         """
         self.model_name = model_name
         self.device = device
+        self.backend = backend
+        self.quantize = quantize
         self.model = None
         self.preprocess = None
+        self.onnx = None
+        self.quantization_drift: Optional[Dict[str, Dict[str, float]]] = None
+        # Cached embeddings are only valid for the model that computed them
+        self.image_cache = get_image_cache() if Config.IMAGE_CACHE_ENABLED else None
+        self.text_cache = get_text_cache()
+        self._cache_namespace = f"{model_name}:{backend}:{'int8' if quantize else 'fp32'}"
         self._load_model()
     
     def _load_model(self) -> None:
@@ -35,6 +60,12 @@ class CLIPModel:
             logger.info(f"Loading CLIP model: {self.model_name} on {self.device}")
             self.model, self.preprocess = clip.load(self.model_name, device=self.device)
             self.model.eval()  # Set to evaluation mode
+            if self.backend == "onnx":
+                self.onnx = ONNXEncoders(self.model, self.model_name)
+            elif self.backend != "torch":
+                raise ValueError(f"Unknown inference backend: {self.backend}")
+            if self.quantize:
+                self._quantize()
             logger.info("CLIP model loaded successfully")
         except Exception as e:
             logger.error(f"Failed to load CLIP model: {str(e)}")
@@ -48,6 +79,8 @@ class CLIPModel:
         """
         Encode image to embedding vector.
         
+        Image bytes are looked up in the image embedding cache first.
+        
         Args:
             image_input: Image as file path, bytes, or preprocessed tensor
             normalize: Whether to L2-normalize the embedding
@@ -55,6 +88,12 @@ class CLIPModel:
         Returns:
             Image embedding as numpy array
         """
+        key = self._image_cache_key(image_input)
+        if key is not None:
+            cached = self.image_cache.get(key)
+            if cached is not None:
+                return self._cached_embedding(cached, normalize)
+        
         with torch.no_grad():
             # Preprocess if not already a tensor
             if isinstance(image_input, torch.Tensor):
@@ -66,7 +105,9 @@ class CLIPModel:
                 image_tensor = preprocess_image(image_input).unsqueeze(0).to(self.device)
             
             # Encode
-            image_features = self.model.encode_image(image_tensor)
+            image_features = self._forward_image(image_tensor)
+            if key is not None:
+                self.image_cache.put(key, image_features.cpu().numpy().squeeze())
             
             # Normalize if requested
             if normalize:
@@ -85,6 +126,9 @@ class CLIPModel:
         """
         Encode text to embedding vector.
         
+        Texts that preprocess to a recently encoded string are served from
+        the text embedding cache.
+        
         Args:
             text: Text string
             normalize: Whether to L2-normalize the embedding
@@ -92,24 +136,7 @@ class CLIPModel:
         Returns:
             Text embedding as numpy array
         """
-        with torch.no_grad():
-            # Preprocess text
-            processed_text = preprocess_text(text)
-            
-            # Tokenize
-            text_tokens = clip.tokenize([processed_text], truncate=True).to(self.device)
-            
-            # Encode
-            text_features = self.model.encode_text(text_tokens)
-            
-            # Normalize if requested
-            if normalize:
-                text_features = text_features / text_features.norm(dim=-1, keepdim=True)
-            
-            # Convert to numpy
-            embedding = text_features.cpu().numpy().squeeze()
-            
-            return embedding
+        return self.encode_texts_batch([text], normalize)[0]
     
     def encode_images_batch(
         self,
@@ -125,26 +152,74 @@ class CLIPModel:
             
         Returns:
             Array of embeddings (N, D)
-        """
-        with torch.no_grad():
-            # Preprocess batch
-            if isinstance(images[0], torch.Tensor):
-                image_tensors = torch.stack([img if img.dim() == 3 else img.squeeze(0) 
-                                            for img in images]).to(self.device)
-            else:
-                image_tensors = preprocess_image_batch(images).to(self.device)
             
-            # Encode
-            image_features = self.model.encode_image(image_tensors)
-            
-            # Normalize if requested
-            if normalize:
-                image_features = image_features / image_features.norm(dim=-1, keepdim=True)
+        Raises:
+            ValueError: If any image cannot be processed
+        """
+        embeddings = self.encode_images_each(images, normalize)
+        for embedding in embeddings:
+            if isinstance(embedding, Exception):
+                raise embedding
+        return np.stack(embeddings)
+    
+    def encode_images_each(
+        self,
+        images: List[Union[str, bytes, torch.Tensor]],
+        normalize: bool = True
+    ) -> List[Union[np.ndarray, Exception]]:
+        """
+        Encode a batch of images, reporting failures per image.
+        
+        Image bytes found in the image embedding cache are not re-encoded;
+        the rest run through the model in one forward pass and are cached.
+        
+        Args:
+            images: List of image inputs
+            normalize: Whether to L2-normalize embeddings
             
-            # Convert to numpy
-            embeddings = image_features.cpu().numpy()
+        Returns:
+            Embedding of each image, or the error that image raised
+        """
+        results: List[Union[np.ndarray, Exception]] = [None] * len(images)
+        keys = [self._image_cache_key(image) for image in images]
+        tensors = []
+        tensor_positions = []
+        raw_images = []
+        raw_positions = []
+        for position, (image, key) in enumerate(zip(images, keys)):
+            cached = self.image_cache.get(key) if key is not None else None
+            if cached is not None:
+                results[position] = self._cached_embedding(cached, normalize)
+            elif isinstance(image, torch.Tensor):
+                tensors.append(image if image.dim() == 3 else image.squeeze(0))
+                tensor_positions.append(position)
+            else:
+                raw_images.append(image)
+                raw_positions.append(position)
+        
+        # Preprocess all raw images into one batch buffer
+        positions = tensor_positions
+        batches = [torch.stack(tensors)] if tensors else []
+        if raw_images:
+            batch, errors = preprocess_images_each(raw_images)
+            for position, error in zip(raw_positions, errors):
+                if error is None:
+                    positions.append(position)
+                else:
+                    results[position] = error
+            batches.append(batch)
+        
+        if positions:
+            image_tensors = batches[0] if len(batches) == 1 else torch.cat(batches)
+            with torch.no_grad():
+                image_features = self._forward_image(image_tensors.to(self.device))
+                embeddings = image_features.cpu().numpy()
             
-            return embeddings
+            for position, embedding in zip(positions, embeddings):
+                if keys[position] is not None:
+                    self.image_cache.put(keys[position], embedding)
+                results[position] = self._cached_embedding(embedding, normalize)
+        return results
     
     def encode_texts_batch(
         self,
@@ -154,6 +229,9 @@ class CLIPModel:
         """
         Encode a batch of texts.
         
+        Only texts missing from the text embedding cache are tokenized and
+        encoded, each distinct preprocessed text once.
+        
         Args:
             texts: List of text strings
             normalize: Whether to L2-normalize embeddings
@@ -161,24 +239,121 @@ class CLIPModel:
         Returns:
             Array of embeddings (N, D)
         """
+        # Preprocess texts
+        processed_texts = preprocess_text_batch(texts)
+        
+        embeddings = {}
+        for processed in processed_texts:
+            if processed not in embeddings:
+                embeddings[processed] = self.text_cache.get((self._cache_namespace, processed))
+        missing = [processed for processed, embedding in embeddings.items() if embedding is None]
+        
+        if missing:
+            for processed, embedding in zip(missing, self._encode_texts(missing)):
+                embedding.setflags(write=False)
+                self.text_cache.put((self._cache_namespace, processed), embedding)
+                embeddings[processed] = embedding
+        
+        return np.stack([
+            self._cached_embedding(embeddings[processed], normalize)
+            for processed in processed_texts
+        ])
+    
+    def warm_text_cache(self, texts: List[str], batch_size: int = 64) -> None:
+        """
+        Encode texts ahead of time so later requests hit the text cache.
+        
+        Args:
+            texts: Texts to encode, most important first
+            batch_size: Number of texts per forward pass
+        """
+        for start in range(0, len(texts), batch_size):
+            self.encode_texts_batch(texts[start:start + batch_size])
+        logger.info(f"Warmed text embedding cache with {len(texts)} texts")
+    
+    def warm_up(self, batch_sizes: Iterable[int]) -> None:
+        """
+        Run throwaway image and text batches through the model.
+        
+        The first passes at a batch size pay for allocator growth and kernel
+        selection; doing them at startup keeps that off the first requests.
+        The embedding caches are bypassed and left untouched.
+        
+        Args:
+            batch_sizes: Batch sizes to run
+        """
+        started = time.perf_counter()
+        for batch_size in batch_sizes:
+            images = [
+                Image.new("RGB", (Config.IMAGE_SIZE, Config.IMAGE_SIZE), color=(37 * i % 256, 128, 64))
+                for i in range(batch_size)
+            ]
+            self.encode_images_batch(images)  # In-memory images are never cached
+            self._encode_texts([f"warm-up item {i}" for i in range(batch_size)])
+        logger.info(f"CLIP warm-up at batch sizes {list(batch_sizes)} took {time.perf_counter() - started:.2f}s")
+    
+    def _quantize(self) -> None:
+        """
+        Quantize the model to INT8 and log its drift from fp32.
+        
+        Drift is the cosine similarity between fp32 and INT8 embeddings of
+        a fixed calibration set, kept in ``quantization_drift``.
+        
+        Raises:
+            ValueError: If the backend or device does not support it
+        """
+        if self.backend != "torch" or self.device != "cpu":
+            raise ValueError("INT8 quantization requires the torch backend on CPU")
+        
+        images = calibration_images()
+        reference_images = self.encode_images_batch(images)
+        reference_texts = self._encode_texts(CALIBRATION_TEXTS)
+        
+        self.model = quantize_model(self.model)
+        
+        self.quantization_drift = {
+            "image": embedding_drift(reference_images, self.encode_images_batch(images)),
+            "text": embedding_drift(reference_texts, self._encode_texts(CALIBRATION_TEXTS)),
+        }
+        for tower, drift in self.quantization_drift.items():
+            logger.info(
+                f"INT8 {tower} embedding drift: mean cosine {drift['mean_cosine']:.4f}, "
+                f"min cosine {drift['min_cosine']:.4f}"
+            )
+    
+    def _encode_texts(self, processed_texts: List[str]) -> np.ndarray:
+        """Tokenize and encode preprocessed texts, bypassing the cache; returns unnormalized embeddings."""
         with torch.no_grad():
-            # Preprocess texts
-            processed_texts = preprocess_text_batch(texts)
-            
             # Tokenize
             text_tokens = clip.tokenize(processed_texts, truncate=True).to(self.device)
             
             # Encode
-            text_features = self.model.encode_text(text_tokens)
-            
-            # Normalize if requested
-            if normalize:
-                text_features = text_features / text_features.norm(dim=-1, keepdim=True)
-            
-            # Convert to numpy
-            embeddings = text_features.cpu().numpy()
-            
-            return embeddings
+            return self._forward_text(text_tokens).cpu().numpy()
+    
+    def _image_cache_key(self, image_input: Union[str, bytes, torch.Tensor]) -> Optional[str]:
+        """Get the image cache key of an input, or None if it is not cacheable."""
+        if self.image_cache is None or not isinstance(image_input, bytes):
+            return None
+        return f"{self._cache_namespace}:{content_key(image_input)}"
+    
+    @staticmethod
+    def _cached_embedding(embedding: np.ndarray, normalize: bool) -> np.ndarray:
+        """Get a writable, optionally L2-normalized copy of an unnormalized embedding."""
+        if normalize:
+            return embedding / np.linalg.norm(embedding)
+        return embedding.copy()
+    
+    def _forward_image(self, image_tensors: torch.Tensor) -> torch.Tensor:
+        """Run the image tower on the configured backend."""
+        if self.onnx is not None:
+            return self.onnx.encode_image(image_tensors)
+        return self.model.encode_image(image_tensors)
+    
+    def _forward_text(self, text_tokens: torch.Tensor) -> torch.Tensor:
+        """Run the text tower on the configured backend."""
+        if self.onnx is not None:
+            return self.onnx.encode_text(text_tokens)
+        return self.model.encode_text(text_tokens)
     
     def get_embedding_dim(self) -> int:
         """
@@ -195,6 +370,7 @@ class CLIPModel:
 
 # Global model instance (lazy loaded)
 _model_instance: Optional[CLIPModel] = None
+_model_lock = threading.Lock()
 
 
 def get_clip_model() -> CLIPModel:
@@ -206,6 +382,8 @@ def get_clip_model() -> CLIPModel:
     """
     global _model_instance
     if _model_instance is None:
-        _model_instance = CLIPModel()
+        with _model_lock:
+            if _model_instance is None:
+                _model_instance = CLIPModel()
     return _model_instance
 
@@ -0,0 +1,358 @@
+"""
+Caches of computed CLIP embeddings.
+"""
+import hashlib
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Dict, Hashable, Optional
+import numpy as np
+
+from ai_service.utils.config import Config
+from ai_service.utils.logger import logger
+
+
+# Puts between two passes of disk eviction
+_EVICT_EVERY = 256
+
+# Memory hits whose access times are written to disk together
+_TOUCH_EVERY = 256
+
+
+def content_key(data: bytes) -> str:
+    """
+    Get the content address of raw bytes.
+    
+    Args:
+        data: Raw bytes (e.g., an uploaded image file)
+        
+    Returns:
+        Hex SHA-256 digest
+    """
+    return hashlib.sha256(data).hexdigest()
+
+
+class LRUCache:
+    """
+    Bounded in-memory mapping that evicts the least recently used entry.
+    
+    Thread-safe, so it can be shared by encodes running in the worker pool.
+    """
+    
+    def __init__(self, max_items: int):
+        """
+        Initialize LRU cache.
+        
+        Args:
+            max_items: Maximum number of entries (0 disables the cache)
+        """
+        self.max_items = max(0, max_items)
+        self.hits = 0
+        self.misses = 0
+        self._entries: "OrderedDict[Hashable, Any]" = OrderedDict()
+        self._lock = threading.Lock()
+    
+    def get(self, key: Hashable) -> Optional[Any]:
+        """
+        Look up an entry and mark it as most recently used.
+        
+        Args:
+            key: Cache key
+            
+        Returns:
+            Cached value or None
+        """
+        with self._lock:
+            value = self._entries.get(key)
+            if value is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+    
+    def put(self, key: Hashable, value: Any) -> None:
+        """
+        Store an entry, evicting the least recently used one if full.
+        
+        Args:
+            key: Cache key
+            value: Value to cache
+        """
+        if self.max_items == 0:
+            return
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_items:
+                self._entries.popitem(last=False)
+    
+    def __len__(self) -> int:
+        return len(self._entries)
+    
+    def stats(self) -> Dict[str, Any]:
+        """
+        Get hit/miss counters and occupancy.
+        
+        Returns:
+            Dictionary with hits, misses, hit rate and number of entries
+        """
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "entries": len(self._entries),
+        }
+    
+    def clear(self) -> None:
+        """Drop all entries and reset the counters."""
+        with self._lock:
+            self._entries.clear()
+            self.hits = 0
+            self.misses = 0
+
+
+class EmbeddingCache:
+    """
+    Content-addressed embedding cache with an in-memory LRU layer over an
+    on-disk SQLite store.
+    
+    Entries are keyed by a caller-built string, typically a model namespace
+    plus the SHA-256 of the raw input bytes, so the same upload is encoded
+    once no matter which endpoint receives it, and survives restarts. The
+    disk store is bounded by total size and by the time since an entry was
+    last read or written; the least recently used entries go first. Reads
+    served from memory refresh the disk access time in batches.
+    """
+    
+    def __init__(
+        self,
+        db_path: Path,
+        memory_items: int = Config.IMAGE_CACHE_MEMORY_ITEMS,
+        max_disk_mb: float = Config.IMAGE_CACHE_MAX_DISK_MB,
+        max_age_days: float = Config.IMAGE_CACHE_MAX_AGE_DAYS
+    ):
+        """
+        Initialize embedding cache.
+        
+        Args:
+            db_path: Path to the SQLite database
+            memory_items: Number of embeddings kept in memory
+            max_disk_mb: Maximum total size of stored embeddings in MB
+            max_age_days: Entries unused for longer than this are evicted
+        """
+        self.db_path = db_path
+        self.memory = LRUCache(memory_items)
+        self.max_disk_bytes = int(max_disk_mb * 1024 * 1024)
+        self.max_age_seconds = max_age_days * 86400.0
+        self.disk_hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._puts_since_evict = 0
+        self._touched: Dict[str, float] = {}
+        self._lock = threading.Lock()
+        self._conn = self._connect()
+        self.evict()
+    
+    def _connect(self) -> sqlite3.Connection:
+        """Open the database and create the schema if needed."""
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        conn = sqlite3.connect(
+            str(self.db_path),
+            isolation_level=None,  # Autocommit
+            check_same_thread=False
+        )
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS embeddings ("
+            "key TEXT PRIMARY KEY, "
+            "embedding BLOB NOT NULL, "
+            "accessed_at REAL NOT NULL)"
+        )
+        conn.execute("CREATE INDEX IF NOT EXISTS embeddings_accessed ON embeddings (accessed_at)")
+        return conn
+    
+    def get(self, key: str) -> Optional[np.ndarray]:
+        """
+        Look up an embedding, in memory first and then on disk.
+        
+        Args:
+            key: Cache key
+            
+        Returns:
+            Cached embedding (float32, read-only) or None
+        """
+        embedding = self.memory.get(key)
+        if embedding is not None:
+            with self._lock:
+                self._touched[key] = time.time()
+                if len(self._touched) >= _TOUCH_EVERY:
+                    self._flush_touched()
+            return embedding
+        
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT embedding FROM embeddings WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            self._conn.execute(
+                "UPDATE embeddings SET accessed_at = ? WHERE key = ?", (time.time(), key)
+            )
+            self.disk_hits += 1
+        
+        embedding = np.frombuffer(row[0], dtype=np.float32)
+        self.memory.put(key, embedding)
+        return embedding
+    
+    def put(self, key: str, embedding: np.ndarray) -> None:
+        """
+        Store an embedding in memory and on disk.
+        
+        Args:
+            key: Cache key
+            embedding: Embedding vector
+        """
+        embedding = np.ascontiguousarray(embedding, dtype=np.float32).reshape(-1)
+        embedding.setflags(write=False)
+        self.memory.put(key, embedding)
+        
+        with self._lock:
+            self._touched.pop(key, None)
+            self._conn.execute(
+                "INSERT OR REPLACE INTO embeddings (key, embedding, accessed_at) VALUES (?, ?, ?)",
+                (key, embedding.tobytes(), time.time())
+            )
+            self._puts_since_evict += 1
+            due = self._puts_since_evict >= _EVICT_EVERY
+        if due:
+            self.evict()
+    
+    def _flush_touched(self) -> None:
+        """Write the access times of pending memory hits to disk. Call with the lock held."""
+        if not self._touched:
+            return
+        self._conn.execute("BEGIN IMMEDIATE")
+        try:
+            self._conn.executemany(
+                "UPDATE embeddings SET accessed_at = ? WHERE key = ?",
+                [(accessed_at, key) for key, accessed_at in self._touched.items()]
+            )
+            self._conn.execute("COMMIT")
+        except Exception:
+            self._conn.execute("ROLLBACK")
+            raise
+        self._touched.clear()
+    
+    def evict(self) -> int:
+        """
+        Remove expired entries, then the least recently used ones until the
+        store fits its size limit.
+        
+        Returns:
+            Number of entries removed from disk
+        """
+        with self._lock:
+            self._puts_since_evict = 0
+            self._flush_touched()
+            removed = self._conn.execute(
+                "DELETE FROM embeddings WHERE accessed_at < ?",
+                (time.time() - self.max_age_seconds,)
+            ).rowcount
+            
+            count, total_bytes = self._conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(LENGTH(embedding)), 0) FROM embeddings"
+            ).fetchone()
+            if total_bytes > self.max_disk_bytes:
+                excess = (total_bytes - self.max_disk_bytes) * count / total_bytes
+                removed += self._conn.execute(
+                    "DELETE FROM embeddings WHERE key IN "
+                    "(SELECT key FROM embeddings ORDER BY accessed_at LIMIT ?)",
+                    (int(np.ceil(excess)),)
+                ).rowcount
+            self.evictions += removed
+        
+        if removed:
+            logger.info(f"Evicted {removed} embeddings from cache {self.db_path}")
+        return removed
+    
+    def stats(self) -> Dict[str, Any]:
+        """
+        Get hit/miss counters and occupancy.
+        
+        Returns:
+            Dictionary with memory and disk hits, misses, hit rate,
+            evictions, and the number and size of stored entries
+        """
+        with self._lock:
+            disk_entries, disk_bytes = self._conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(LENGTH(embedding)), 0) FROM embeddings"
+            ).fetchone()
+            lookups = self.memory.hits + self.disk_hits + self.misses
+            return {
+                "memory_hits": self.memory.hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "hit_rate": (self.memory.hits + self.disk_hits) / lookups if lookups else 0.0,
+                "evictions": self.evictions,
+                "memory_entries": len(self.memory),
+                "disk_entries": disk_entries,
+                "disk_bytes": disk_bytes,
+            }
+    
+    def clear(self) -> None:
+        """Remove all entries and reset the counters."""
+        self.memory.clear()
+        with self._lock:
+            self._touched.clear()
+            self._conn.execute("DELETE FROM embeddings")
+            self.disk_hits = 0
+            self.misses = 0
+            self.evictions = 0
+    
+    def close(self) -> None:
+        """Write pending access times and close the database connection."""
+        with self._lock:
+            self._flush_touched()
+            self._conn.close()
+
+
+# Global cache instances (lazy created)
+_image_cache_instance: Optional[EmbeddingCache] = None
+_text_cache_instance: Optional[LRUCache] = None
+_cache_lock = threading.Lock()
+
+
+def get_image_cache() -> EmbeddingCache:
+    """
+    Get or create global image embedding cache.
+    
+    Returns:
+        EmbeddingCache instance
+    """
+    global _image_cache_instance
+    if _image_cache_instance is None:
+        with _cache_lock:
+            if _image_cache_instance is None:
+                _image_cache_instance = EmbeddingCache(Config.get_image_cache_path())
+    return _image_cache_instance
+
+
+def get_text_cache() -> LRUCache:
+    """
+    Get or create global text embedding cache.
+    
+    Returns:
+        LRUCache instance
+    """
+    global _text_cache_instance
+    if _text_cache_instance is None:
+        with _cache_lock:
+            if _text_cache_instance is None:
+                _text_cache_instance = LRUCache(Config.TEXT_CACHE_ITEMS)
+    return _text_cache_instance
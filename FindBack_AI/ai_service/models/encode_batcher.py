@@ -0,0 +1,209 @@
+"""
+Dynamic micro-batching of CLIP encode requests.
+"""
+import asyncio
+from collections import Counter
+from typing import Any, Dict, List, Optional, Tuple, Union
+import numpy as np
+
+from ai_service.utils.config import Config
+from ai_service.utils.executor import run_blocking
+from ai_service.utils.logger import logger
+
+
+class BatchMetrics:
+    """Counters of realised batch sizes per encode kind."""
+    
+    def __init__(self):
+        """Initialize empty metrics."""
+        self.batch_sizes: Dict[str, Counter] = {}
+    
+    def record(self, kind: str, size: int) -> None:
+        """
+        Record one forward pass.
+        
+        Args:
+            kind: Encode kind ("image" or "text")
+            size: Number of items in the batch
+        """
+        self.batch_sizes.setdefault(kind, Counter())[size] += 1
+    
+    def snapshot(self) -> Dict[str, Dict[str, Any]]:
+        """
+        Summarize the recorded batches.
+        
+        Returns:
+            Per kind: number of batches and items, mean and max batch size,
+            and the count of batches of each size
+        """
+        summary = {}
+        for kind, sizes in self.batch_sizes.items():
+            batches = sum(sizes.values())
+            items = sum(size * count for size, count in sizes.items())
+            summary[kind] = {
+                "batches": batches,
+                "items": items,
+                "mean_batch_size": items / batches if batches else 0.0,
+                "max_batch_size": max(sizes) if sizes else 0,
+                "batch_sizes": {str(size): count for size, count in sorted(sizes.items())}
+            }
+        return summary
+    
+    def reset(self) -> None:
+        """Forget all recorded batches."""
+        self.batch_sizes = {}
+
+
+class _KindState:
+    """Pending requests and scheduling state of one encode kind."""
+    
+    def __init__(self):
+        self.pending: List[Tuple[Any, asyncio.Future]] = []
+        self.timer: Optional[asyncio.TimerHandle] = None
+        self.running: bool = False
+
+
+class EncodeBatcher:
+    """
+    Collects concurrent encode requests into batched CLIP forward passes.
+    
+    Callers await ``encode_image``/``encode_text`` as if encoding one item.
+    Requests of the same kind wait for up to ``max_wait_ms`` after the first
+    one (or until ``max_batch_size`` are pending), then run as one forward
+    pass off the event loop, and each caller gets its own embedding or its
+    own error. One pass per kind runs at a time; requests arriving during a
+    pass form the next batch.
+    """
+    
+    def __init__(
+        self,
+        max_batch_size: int = Config.ENCODE_BATCH_MAX_SIZE,
+        max_wait_ms: float = Config.ENCODE_BATCH_MAX_WAIT_MS
+    ):
+        """
+        Initialize encode batcher.
+        
+        Args:
+            max_batch_size: Maximum number of items per forward pass
+            max_wait_ms: Maximum time to wait for more items after the first
+        """
+        self.max_batch_size = max(1, max_batch_size)
+        self.max_wait_ms = max_wait_ms
+        self.metrics = BatchMetrics()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._states: Dict[str, _KindState] = {}
+        self._tasks: set = set()  # Running batch tasks (asyncio keeps only weak references)
+    
+    async def encode_image(self, image_input: Union[str, bytes]) -> np.ndarray:
+        """
+        Encode an image to a normalized embedding.
+        
+        Args:
+            image_input: Image as file path or bytes
+            
+        Returns:
+            Image embedding as numpy array
+        """
+        return await self._submit("image", image_input)
+    
+    async def encode_text(self, text: str) -> np.ndarray:
+        """
+        Encode text to a normalized embedding.
+        
+        Args:
+            text: Text string
+            
+        Returns:
+            Text embedding as numpy array
+        """
+        return await self._submit("text", text)
+    
+    async def _submit(self, kind: str, payload: Any) -> np.ndarray:
+        """Queue one item and wait for its embedding."""
+        loop = asyncio.get_running_loop()
+        state = self._state(kind, loop)
+        future = loop.create_future()
+        state.pending.append((payload, future))
+        
+        if not state.running:
+            if len(state.pending) >= self.max_batch_size:
+                self._flush(kind)
+            elif state.timer is None:
+                state.timer = loop.call_later(self.max_wait_ms / 1000.0, self._flush, kind)
+        return await future
+    
+    def _state(self, kind: str, loop: asyncio.AbstractEventLoop) -> _KindState:
+        """Get the scheduling state of a kind on the running loop."""
+        if loop is not self._loop:
+            # Timers and futures belong to one event loop
+            self._loop = loop
+            self._states = {}
+        return self._states.setdefault(kind, _KindState())
+    
+    def _flush(self, kind: str) -> None:
+        """Start a forward pass over the pending requests of a kind."""
+        state = self._states[kind]
+        if state.timer is not None:
+            state.timer.cancel()
+            state.timer = None
+        if state.running or not state.pending:
+            return
+        
+        batch = state.pending[:self.max_batch_size]
+        state.pending = state.pending[self.max_batch_size:]
+        state.running = True
+        task = self._loop.create_task(self._encode(kind, batch))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+    
+    async def _encode(self, kind: str, batch: List[Tuple[Any, asyncio.Future]]) -> None:
+        """Encode a batch off the event loop and resolve the callers' futures."""
+        self.metrics.record(kind, len(batch))
+        try:
+            results = await run_blocking(
+                self._encode_batch, kind, [payload for payload, _ in batch]
+            )
+        except Exception as e:
+            logger.error(f"Batched {kind} encode of {len(batch)} items failed: {str(e)}")
+            results = [e] * len(batch)
+        finally:
+            self._states[kind].running = False
+        
+        for (_, future), result in zip(batch, results):
+            if future.done():  # Caller went away
+                continue
+            if isinstance(result, Exception):
+                future.set_exception(result)
+            else:
+                future.set_result(result)
+        
+        # Requests that arrived during this pass have waited long enough
+        self._flush(kind)
+    
+    @staticmethod
+    def _encode_batch(kind: str, payloads: List[Any]) -> List[Union[np.ndarray, Exception]]:
+        """Encode a batch in one forward pass; inputs that fail to preprocess get their error."""
+        # Imported on first encode so importing the API does not load torch and CLIP
+        from ai_service.models.clip_model import get_clip_model
+        
+        clip_model = get_clip_model()
+        if kind == "text":
+            return list(clip_model.encode_texts_batch(payloads, normalize=True))
+        return clip_model.encode_images_each(payloads, normalize=True)
+
+
+# Global batcher instance (lazy created)
+_batcher_instance: Optional[EncodeBatcher] = None
+
+
+def get_encode_batcher() -> EncodeBatcher:
+    """
+    Get or create global encode batcher.
+    
+    Returns:
+        EncodeBatcher instance
+    """
+    global _batcher_instance
+    if _batcher_instance is None:
+        _batcher_instance = EncodeBatcher()
+    return _batcher_instance
@@ -0,0 +1,154 @@
+"""
+ONNX Runtime inference backend for the CLIP image and text towers.
+"""
+import inspect
+import os
+import re
+from pathlib import Path
+from typing import Optional, Tuple
+import numpy as np
+import torch
+
+from ai_service.utils.config import Config
+from ai_service.utils.logger import logger
+
+
+class _TextTower(torch.nn.Module):
+    """Exportable module computing ``encode_text`` from token ids."""
+    
+    def __init__(self, model: torch.nn.Module):
+        super().__init__()
+        self.model = model
+    
+    def forward(self, tokens: torch.Tensor) -> torch.Tensor:
+        return self.model.encode_text(tokens)
+
+
+class ONNXEncoders:
+    """
+    CLIP image and text towers running in ONNX Runtime.
+    
+    The towers are exported from the loaded PyTorch model the first time a
+    model is used and cached as ONNX graphs; later starts reuse the cached
+    graphs. Sessions run with all graph optimizations enabled.
+    """
+    
+    def __init__(self, model: torch.nn.Module, model_name: str, cache_dir: Optional[Path] = None):
+        """
+        Initialize ONNX encoders.
+        
+        Args:
+            model: Loaded PyTorch CLIP model (used only for the export)
+            model_name: CLIP model name, part of the cache key
+            cache_dir: Directory holding the exported graphs
+                (defaults to Config.ONNX_CACHE_DIR)
+                
+        Raises:
+            ImportError: If onnxruntime (or onnx, when exporting) is not installed
+        """
+        try:
+            import onnxruntime
+        except ImportError as e:
+            raise ImportError(
+                "INFERENCE_BACKEND='onnx' requires the onnxruntime and onnx packages"
+            ) from e
+        
+        cache_dir = cache_dir or Config.ONNX_CACHE_DIR
+        image_path, text_path = self.graph_paths(model_name, cache_dir)
+        if not image_path.exists():
+            self._export(
+                model.visual,
+                torch.zeros(1, 3, Config.IMAGE_SIZE, Config.IMAGE_SIZE),
+                image_path,
+                "pixel_values",
+                "image_embeds"
+            )
+        if not text_path.exists():
+            self._export(
+                _TextTower(model),
+                torch.zeros(1, model.context_length, dtype=torch.long),
+                text_path,
+                "input_ids",
+                "text_embeds"
+            )
+        
+        options = onnxruntime.SessionOptions()
+        options.graph_optimization_level = onnxruntime.GraphOptimizationLevel.ORT_ENABLE_ALL
+        providers = ["CPUExecutionProvider"]
+        self.image_session = onnxruntime.InferenceSession(str(image_path), options, providers=providers)
+        self.text_session = onnxruntime.InferenceSession(str(text_path), options, providers=providers)
+        logger.info(f"Loaded ONNX Runtime CLIP encoders from {cache_dir}")
+    
+    @staticmethod
+    def graph_paths(model_name: str, cache_dir: Optional[Path] = None) -> Tuple[Path, Path]:
+        """
+        Get the cache paths of the exported graphs of a model.
+        
+        Args:
+            model_name: CLIP model name
+            cache_dir: Directory holding the exported graphs
+                (defaults to Config.ONNX_CACHE_DIR)
+                
+        Returns:
+            (image tower path, text tower path)
+        """
+        cache_dir = cache_dir or Config.ONNX_CACHE_DIR
+        stem = re.sub(r"[^A-Za-z0-9]+", "-", model_name).strip("-")
+        return cache_dir / f"{stem}-image.onnx", cache_dir / f"{stem}-text.onnx"
+    
+    def encode_image(self, image_tensor: torch.Tensor) -> torch.Tensor:
+        """
+        Run the image tower.
+        
+        Args:
+            image_tensor: Preprocessed images (N, 3, H, W)
+            
+        Returns:
+            Unnormalized image features (N, D)
+        """
+        pixel_values = np.ascontiguousarray(image_tensor.cpu().numpy(), dtype=np.float32)
+        (features,) = self.image_session.run(None, {"pixel_values": pixel_values})
+        return torch.from_numpy(features)
+    
+    def encode_text(self, text_tokens: torch.Tensor) -> torch.Tensor:
+        """
+        Run the text tower.
+        
+        Args:
+            text_tokens: Token ids (N, context_length)
+            
+        Returns:
+            Unnormalized text features (N, D)
+        """
+        input_ids = text_tokens.cpu().numpy().astype(np.int64)
+        (features,) = self.text_session.run(None, {"input_ids": input_ids})
+        return torch.from_numpy(features)
+    
+    @staticmethod
+    def _export(
+        module: torch.nn.Module,
+        example: torch.Tensor,
+        path: Path,
+        input_name: str,
+        output_name: str
+    ) -> None:
+        """Export one tower to ONNX with a dynamic batch axis, replacing `path` atomically."""
+        logger.info(f"Exporting CLIP tower to {path}")
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_name(path.name + ".tmp")
+        # Newer torch releases default to the dynamo exporter; older ones lack the argument
+        options = {}
+        if "dynamo" in inspect.signature(torch.onnx.export).parameters:
+            options["dynamo"] = False
+        with torch.no_grad():
+            torch.onnx.export(
+                module,
+                (example,),
+                str(tmp_path),
+                input_names=[input_name],
+                output_names=[output_name],
+                dynamic_axes={input_name: {0: "batch"}, output_name: {0: "batch"}},
+                opset_version=17,
+                **options
+            )
+        os.replace(tmp_path, path)
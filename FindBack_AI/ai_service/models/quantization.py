@@ -0,0 +1,89 @@
+"""
+Dynamic INT8 quantization of the CLIP towers for CPU inference.
+"""
+import numpy as np
+import torch
+from PIL import Image
+from typing import Dict, List
+
+
+# Descriptions used to measure text embedding drift
+CALIBRATION_TEXTS = [
+    "black leather wallet",
+    "set of house keys on a red keyring",
+    "blue umbrella with a wooden handle",
+    "silver iPhone in a clear case",
+    "brown teddy bear",
+    "student ID card",
+    "grey hoodie with a zipper",
+    "prescription glasses in a black case",
+    "green water bottle with stickers",
+    "white wireless earbuds charging case",
+    "red backpack with laptop inside",
+    "gold ring with a small diamond",
+]
+
+
+def quantize_model(model: torch.nn.Module) -> torch.nn.Module:
+    """
+    Apply dynamic INT8 quantization to the linear layers of a model.
+    
+    Linear weights are stored as int8 and activations are quantized on the
+    fly per batch, so no calibration pass is needed. Attention projections
+    and convolutions stay in fp32.
+    
+    Args:
+        model: fp32 model on CPU
+        
+    Returns:
+        Quantized copy of the model (the input model is unchanged)
+    """
+    return torch.ao.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+
+
+def calibration_images(count: int = 16, size: int = 256, seed: int = 0) -> List[Image.Image]:
+    """
+    Build a deterministic set of images for measuring image embedding drift.
+    
+    Mixes solid colors, gradients and noise so the set covers flat and
+    high-frequency content without shipping image files.
+    
+    Args:
+        count: Number of images
+        size: Width and height in pixels
+        seed: Random seed
+        
+    Returns:
+        List of RGB images
+    """
+    rng = np.random.default_rng(seed)
+    ramp = np.linspace(0, 255, size, dtype=np.float32)
+    images = []
+    for i in range(count):
+        if i % 3 == 0:
+            pixels = np.empty((size, size, 3), dtype=np.float32)
+            pixels[:] = rng.integers(0, 256, 3)
+        elif i % 3 == 1:
+            color = rng.random(3, dtype=np.float32)
+            pixels = (ramp[None, :, None] + ramp[:, None, None]) / 2 * color
+        else:
+            pixels = rng.integers(0, 256, (size, size, 3)).astype(np.float32)
+        images.append(Image.fromarray(pixels.astype(np.uint8), mode="RGB"))
+    return images
+
+
+def embedding_drift(reference: np.ndarray, candidate: np.ndarray) -> Dict[str, float]:
+    """
+    Compare embeddings row by row with cosine similarity.
+    
+    Args:
+        reference: Reference embeddings (N, D)
+        candidate: Embeddings of the same inputs from another model (N, D)
+        
+    Returns:
+        Dictionary with mean and min cosine similarity
+    """
+    cosine = np.sum(reference * candidate, axis=1) / (
+        np.linalg.norm(reference, axis=1) * np.linalg.norm(candidate, axis=1)
+    )
+    return {"mean_cosine": float(cosine.mean()), "min_cosine": float(cosine.min())}
@@ -1,14 +1,16 @@
 """
 Image preprocessing utilities for CLIP model.
 """
+import math
 import torch
 import numpy as np
-from PIL import Image
-import cv2
-from typing import Union, List
+from PIL import Image, ImageOps
+from concurrent.futures import Executor
+from typing import List, Optional, Tuple, Union
 import io
 
 from ai_service.utils.config import Config
+from ai_service.utils.executor import get_preprocess_executor
 from ai_service.utils.logger import logger
 
 
@@ -16,6 +18,8 @@ def fix_image_orientation(image: Image.Image) -> Image.Image:
     """
     Fix EXIF orientation issues.
     
+    Handles all eight EXIF orientations (rotations and mirrored variants).
+    
     Args:
         image: PIL Image
         
@@ -24,43 +28,61 @@ def fix_image_orientation(image: Image.Image) -> Image.Image:
     """
     try:
         # Check for EXIF orientation tag
-        exif = image._getexif()
-        if exif is not None:
-            orientation = exif.get(274)  # EXIF orientation tag
-            if orientation == 3:
-                image = image.rotate(180, expand=True)
-            elif orientation == 6:
-                image = image.rotate(270, expand=True)
-            elif orientation == 8:
-                image = image.rotate(90, expand=True)
-    except (AttributeError, KeyError, TypeError):
+        orientation = image.getexif().get(274)  # EXIF orientation tag
+        if orientation is not None and orientation != 1:
+            image = ImageOps.exif_transpose(image)
+    except (AttributeError, KeyError, TypeError, ValueError, SyntaxError):
         # No EXIF data or error reading it
         pass
     
     return image
 
 
-def preprocess_image(
+def decode_image(image: Image.Image, size: int = Config.IMAGE_SIZE) -> Image.Image:
+    """
+    Decode an opened image file to an upright RGB image.
+    
+    JPEGs are decoded with DCT-domain downscaling (``Image.draft``) by the
+    largest factor (1/2, 1/4 or 1/8 per side) that keeps the image at
+    least twice the size it is resized to, so a 12 MP phone photo is
+    decoded at 1/64 of its pixels.
+    The EXIF orientation comes from the file header and is applied to the
+    reduced image.
+    
+    Args:
+        image: Image as returned by ``Image.open`` (not yet loaded)
+        size: Target size the image will be resized to
+        
+    Returns:
+        Decoded, orientation-corrected RGB image
+    """
+    if Config.JPEG_DRAFT_DECODE and image.format == "JPEG":
+        # Aspect-preserving resized size with 2x headroom, like Image.thumbnail's reducing_gap
+        scale = 2 * size / max(image.size)
+        image.draft("RGB", (math.ceil(image.width * scale), math.ceil(image.height * scale)))
+    return fix_image_orientation(image).convert("RGB")
+
+
+def load_image(
     image_input: Union[str, bytes, Image.Image, np.ndarray],
     size: int = Config.IMAGE_SIZE
-) -> torch.Tensor:
+) -> Image.Image:
     """
-    Preprocess image for CLIP model.
+    Load an image and shrink it to fit a size x size square.
     
     Steps:
-    1. Load image (from file path, bytes, PIL Image, or numpy array)
+    1. Load image (from file path, bytes, PIL Image, or numpy array);
+       JPEG files and bytes are decoded at reduced resolution
     2. Fix EXIF orientation
     3. Convert to RGB
-    4. Resize to square
-    5. Normalize using CLIP statistics
-    6. Convert to tensor
+    4. Resize so the longer side is at most `size`, keeping aspect ratio
     
     Args:
         image_input: Image as file path, bytes, PIL Image, or numpy array
         size: Target size (default 224)
         
     Returns:
-        Preprocessed image tensor of shape (3, H, W)
+        RGB image no larger than size x size
         
     Raises:
         ValueError: If image cannot be processed
@@ -69,50 +91,133 @@ def preprocess_image(
         # Load image based on input type
         if isinstance(image_input, str):
             # File path
-            image = Image.open(image_input).convert("RGB")
+            image = decode_image(Image.open(image_input), size)
         elif isinstance(image_input, bytes):
             # Bytes data
-            image = Image.open(io.BytesIO(image_input)).convert("RGB")
+            image = decode_image(Image.open(io.BytesIO(image_input)), size)
         elif isinstance(image_input, Image.Image):
             # PIL Image
-            image = image_input.convert("RGB")
+            image = fix_image_orientation(image_input).convert("RGB")
         elif isinstance(image_input, np.ndarray):
-            # NumPy array (from OpenCV)
+            # NumPy array (from OpenCV); cv2 is only needed for this input type
+            import cv2
+            
             if image_input.dtype != np.uint8:
                 image_input = (image_input * 255).astype(np.uint8)
             image = Image.fromarray(cv2.cvtColor(image_input, cv2.COLOR_BGR2RGB))
         else:
             raise ValueError(f"Unsupported image input type: {type(image_input)}")
         
-        # Fix orientation
-        image = fix_image_orientation(image)
-        
-        # Resize to 224x224 while maintaining aspect ratio (center padding)
-        # Thumbnail maintains aspect ratio, then we center it on a 224x224 canvas
+        # Thumbnail maintains aspect ratio; the caller centers it on the square canvas
         image.thumbnail((size, size), Image.Resampling.LANCZOS)
+        return image
         
-        # Create a new image with the target size and paste centered
-        new_image = Image.new("RGB", (size, size), (0, 0, 0))
+    except Exception as e:
+        logger.error(f"Error preprocessing image: {str(e)}")
+        raise ValueError(f"Failed to preprocess image: {str(e)}")
+
+
+def normalize_pixels(pixels: np.ndarray) -> torch.Tensor:
+    """
+    Normalize a batch of RGB pixels with the CLIP statistics.
+    
+    Each channel is mapped through a 256-entry float32 lookup table of
+    ``(x / 255 - mean) / std`` straight into one preallocated (N, 3, H, W)
+    array, so there are no per-image or float64 temporaries, and the array
+    is handed to torch without a copy.
+    
+    Args:
+        pixels: uint8 array of shape (N, H, W, 3)
+        
+    Returns:
+        float32 tensor of shape (N, 3, H, W) sharing memory with a new array
+    """
+    levels = np.arange(256, dtype=np.float32) / 255.0
+    mean = np.array(Config.CLIP_MEAN).reshape(3, 1)
+    std = np.array(Config.CLIP_STD).reshape(3, 1)
+    lookup = ((levels - mean) / std).astype(np.float32)
+    
+    n, height, width, _ = pixels.shape
+    batch = np.empty((n, 3, height, width), dtype=np.float32)
+    for channel in range(3):
+        np.take(lookup[channel], pixels[..., channel], out=batch[:, channel])
+    return torch.from_numpy(batch)
+
+
+def preprocess_images_each(
+    images: List[Union[str, bytes, Image.Image, np.ndarray]],
+    size: int = Config.IMAGE_SIZE,
+    executor: Optional[Executor] = None
+) -> Tuple[torch.Tensor, List[Optional[Exception]]]:
+    """
+    Preprocess a batch of images, reporting failures per image.
+    
+    Images are decoded and resized in parallel on the preprocessing pool,
+    letterboxed (centered on a black square) into one uint8 buffer and
+    normalized together.
+    
+    Args:
+        images: List of image inputs
+        size: Target size
+        executor: Pool to decode images on (defaults to the shared
+            preprocessing pool; serial if that is disabled)
+            
+    Returns:
+        Tuple of the batch tensor (M, 3, H, W) holding the images that
+        succeeded, in input order, and the error of each input (None if
+        it succeeded)
+    """
+    pixels = np.zeros((len(images), size, size, 3), dtype=np.uint8)
+    
+    def load_into(position: int) -> None:
+        image = load_image(images[position], size)
         paste_x = (size - image.width) // 2
         paste_y = (size - image.height) // 2
-        new_image.paste(image, (paste_x, paste_y))
-        
-        # Convert to numpy array and normalize
-        img_array = np.array(new_image).astype(np.float32) / 255.0
-        
-        # Normalize using CLIP statistics
-        mean = np.array(Config.CLIP_MEAN).reshape(1, 1, 3)
-        std = np.array(Config.CLIP_STD).reshape(1, 1, 3)
-        img_array = (img_array - mean) / std
-        
-        # Convert to tensor: (H, W, C) -> (C, H, W)
-        img_tensor = torch.from_numpy(img_array).permute(2, 0, 1).float()
+        pixels[position, paste_y:paste_y + image.height, paste_x:paste_x + image.width] = np.asarray(image)
+    
+    executor = executor or get_preprocess_executor()
+    errors: List[Optional[Exception]] = [None] * len(images)
+    if executor is None or len(images) < 2:
+        for position in range(len(images)):
+            try:
+                load_into(position)
+            except Exception as e:
+                errors[position] = e
+    else:
+        futures = [executor.submit(load_into, position) for position in range(len(images))]
+        for position, future in enumerate(futures):
+            errors[position] = future.exception()
+    
+    ok = [position for position, error in enumerate(errors) if error is None]
+    if len(ok) < len(images):
+        pixels = pixels[ok]
+    return normalize_pixels(pixels), errors
+
+
+def preprocess_image(
+    image_input: Union[str, bytes, Image.Image, np.ndarray],
+    size: int = Config.IMAGE_SIZE
+) -> torch.Tensor:
+    """
+    Preprocess image for CLIP model.
+    
+    Steps:
+    1. Load, orient and shrink the image (see load_image)
+    2. Center it on a black square canvas
+    3. Normalize using CLIP statistics
+    4. Convert to tensor
+    
+    Args:
+        image_input: Image as file path, bytes, PIL Image, or numpy array
+        size: Target size (default 224)
         
-        return img_tensor
+    Returns:
+        Preprocessed image tensor of shape (3, H, W)
         
-    except Exception as e:
-        logger.error(f"Error preprocessing image: {str(e)}")
-        raise ValueError(f"Failed to preprocess image: {str(e)}")
+    Raises:
+        ValueError: If image cannot be processed
+    """
+    return preprocess_image_batch([image_input], size)[0]
 
 
 def preprocess_image_batch(
@@ -128,6 +233,12 @@ def preprocess_image_batch(
         
     Returns:
         Batch tensor of shape (N, 3, H, W)
+        
+    Raises:
+        ValueError: If any image cannot be processed
     """
-    processed = [preprocess_image(img, size) for img in images]
-    return torch.stack(processed)
+    batch, errors = preprocess_images_each(images, size)
+    for error in errors:
+        if error is not None:
+            raise error
+    return batch
@@ -0,0 +1,21 @@
+"""
+Shared fixtures for the test suite.
+"""
+import pytest
+
+from ai_service.models import embedding_cache
+from ai_service.utils.config import Config
+
+
+@pytest.fixture(scope="session", autouse=True)
+def image_cache_dir(tmp_path_factory):
+    """Keep the image embedding cache written by the tests out of data/cache."""
+    original = Config.CACHE_DIR
+    Config.CACHE_DIR = tmp_path_factory.mktemp("cache")
+    try:
+        yield Config.CACHE_DIR
+    finally:
+        if embedding_cache._image_cache_instance is not None:
+            embedding_cache._image_cache_instance.close()
+            embedding_cache._image_cache_instance = None
+        Config.CACHE_DIR = original
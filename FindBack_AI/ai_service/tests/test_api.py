@@ -3,11 +3,21 @@ Tests for API endpoints.
 """
 import pytest
 import uuid
+import time
+import asyncio
+import base64
+import json
+import subprocess
+import sys
+import threading
+from pathlib import Path
+import httpx
 from fastapi.testclient import TestClient
 from PIL import Image
 import io
 
 from ai_service.api.main import app
+from ai_service.models.encode_batcher import EncodeBatcher
 from ai_service.utils.config import Config
 
 # Initialize directories for tests
@@ -15,6 +25,9 @@ Config.initialize_directories()
 
 client = TestClient(app)
 
+# Import-time budget of the API module in a fresh interpreter (torch alone takes longer)
+IMPORT_TIME_BUDGET_S = 2.5
+
 
 def unique_id(prefix: str = "test") -> str:
     """Generate a unique ID for testing."""
@@ -30,6 +43,37 @@ class TestHealthCheck:
         assert response.status_code == 200
         data = response.json()
         assert data["status"] == "healthy"
+    
+    def test_metrics(self):
+        """Test metrics endpoint reports embedding cache counters."""
+        client.post("/encode/text", json={"text": "metrics probe"})
+        client.post("/encode/text", json={"text": "Metrics  probe"})
+        
+        response = client.get("/metrics")
+        assert response.status_code == 200
+        data = response.json()
+        assert data["text_cache"]["hits"] >= 1
+        assert {"memory_hits", "disk_hits", "misses", "hit_rate"} <= set(data["image_cache"])
+    
+    def test_ready_after_preload(self, monkeypatch):
+        """Test readiness endpoint reports ready once the startup preload finishes."""
+        monkeypatch.setattr(Config, "WARMUP_BATCH_SIZES", (1, 2))
+        with TestClient(app) as lifespan_client:
+            deadline = time.monotonic() + 120
+            response = lifespan_client.get("/ready")
+            while response.status_code == 503 and time.monotonic() < deadline:
+                assert response.json()["error"] is None
+                time.sleep(0.1)
+                response = lifespan_client.get("/ready")
+            
+            assert response.status_code == 200
+            data = response.json()
+            assert data["ready"] is True
+            assert data["stage"] == "ready"
+            assert data["time_to_ready_s"] >= 0
+            
+            # Liveness is independent of readiness
+            assert lifespan_client.get("/healthcheck").status_code == 200
 
 
 class TestEncodeEndpoints:
@@ -144,6 +188,48 @@ class TestItemEndpoints:
             }
         )
         assert response.status_code == 400
+    
+    
+    def test_add_batch(self):
+        """Test adding many items in one request with per-item outcomes."""
+        existing = unique_id("found_batch_existing")
+        client.post("/add/found_item", data={"item_id": existing, "description": "old item"})
+        ids = [unique_id("found_batch") for _ in range(3)]
+        img = Image.new('RGB', (224, 224), color='navy')
+        img_bytes = io.BytesIO()
+        img.save(img_bytes, format='PNG')
+        
+        lines = [
+            {"item_id": ids[0], "description": f"found a navy umbrella {ids[0]}"},
+            {"item_id": ids[1], "description": "navy jacket", "image": "jacket.png"},
+            {"item_id": ids[2], "image": "missing.png"},
+            {"item_id": ids[0], "description": "duplicate line"},
+            {"item_id": existing, "description": "old item again"},
+            {"description": "no id"},
+        ]
+        response = client.post(
+            "/add/batch",
+            data={"side": "found", "items": "\n".join(json.dumps(line) for line in lines)},
+            files=[("images", ("jacket.png", img_bytes.getvalue(), "image/png"))]
+        )
+        assert response.status_code == 200
+        data = response.json()
+        assert data["added"] == 2
+        assert data["failed"] == 4
+        assert [r["status"] for r in data["results"]] == ["added", "added", "failed", "failed", "failed", "failed"]
+        assert data["results"][1]["has_image"] and data["results"][1]["has_text"]
+        assert "already exists" in data["results"][4]["error"]
+        
+        # Added items are searchable
+        search = client.post("/search/lost?top_k=5", data={"text": f"found a navy umbrella {ids[0]}"}).json()
+        assert ids[0] in [m["item_id"] for m in search["matches"]]
+        
+        # Replacing existing items is opt-in
+        response = client.post(
+            "/add/batch",
+            data={"side": "found", "items": json.dumps({"item_id": existing, "description": "new"}), "replace": "true"}
+        )
+        assert response.json()["added"] == 1
 
 
 class TestSearchEndpoints:
@@ -252,6 +338,216 @@ class TestSearchEndpoints:
         assert response.status_code == 200
         data = response.json()
         assert data["query_type"] == "both"
+    
+    def test_search_by_item(self):
+        """Test searching with a stored item matches a search with its description."""
+        found_id = unique_id("found_by_item")
+        lost_id = unique_id("lost_by_item")
+        client.post("/add/found_item", data={"item_id": found_id, "description": f"found a green thermos {found_id}"})
+        client.post("/add/lost_item", data={"item_id": lost_id, "description": f"lost a green thermos {found_id}"})
+        
+        response = client.post("/search/by_item", json={"item_id": lost_id, "side": "lost", "top_k": 5})
+        assert response.status_code == 200
+        data = response.json()
+        assert data["query_type"] == "text"
+        assert found_id in [m["item_id"] for m in data["matches"]]
+        
+        single = client.post("/search/lost?top_k=5", data={"text": f"lost a green thermos {found_id}"}).json()
+        assert [m["item_id"] for m in data["matches"]] == [m["item_id"] for m in single["matches"]]
+    
+    def test_search_by_unknown_item(self):
+        """Test searching with an item that was never added."""
+        response = client.post("/search/by_item", json={"item_id": unique_id("missing"), "side": "found"})
+        assert response.status_code == 404
+    
+    def test_search_batch(self):
+        """Test batch search returns per-query results in order."""
+        item_id = unique_id("found_batch")
+        client.post(
+            "/add/found_item",
+            data={"item_id": item_id, "description": f"found a purple scarf {item_id}"}
+        )
+        img = Image.new('RGB', (224, 224), color='purple')
+        img_bytes = io.BytesIO()
+        img.save(img_bytes, format='PNG')
+        
+        response = client.post("/search/batch", json={
+            "side": "lost",
+            "top_k": 5,
+            "queries": [
+                {"query_id": "q-text", "text": f"purple scarf {item_id}"},
+                {"query_id": "q-empty"},
+                {"query_id": "q-both", "text": "purple scarf",
+                 "image": base64.b64encode(img_bytes.getvalue()).decode()},
+                {"query_id": "q-bad-image", "image": "not base64!"},
+            ]
+        })
+        assert response.status_code == 200
+        results = response.json()["results"]
+        assert [r["query_id"] for r in results] == ["q-text", "q-empty", "q-both", "q-bad-image"]
+        assert [r["query_type"] for r in results] == ["text", None, "both", None]
+        assert results[1]["error"] and results[3]["error"]
+        assert results[0]["error"] is None
+        
+        # Same matches as the single-query endpoint
+        single = client.post("/search/lost?top_k=5", data={"text": f"purple scarf {item_id}"}).json()
+        assert [m["item_id"] for m in results[0]["matches"]] == [m["item_id"] for m in single["matches"]]
+        assert item_id in [m["item_id"] for m in results[0]["matches"]]
+    
+    def test_search_batch_stream(self, monkeypatch):
+        """Test streamed batch search sends one NDJSON line per query, in order."""
+        monkeypatch.setattr(Config, "SEARCH_BATCH_STREAM_CHUNK", 2)
+        queries = [{"query_id": f"q{i}", "text": f"lost item number {i}"} for i in range(5)]
+        
+        response = client.post("/search/batch?stream=true", json={"side": "found", "queries": queries})
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("application/x-ndjson")
+        lines = [json.loads(line) for line in response.text.splitlines()]
+        assert [line["query_id"] for line in lines] == [q["query_id"] for q in queries]
+        assert all(line["query_type"] == "text" and line["error"] is None for line in lines)
+    
+    def test_search_batch_too_many_queries(self, monkeypatch):
+        """Test batch search rejects requests over the query limit."""
+        monkeypatch.setattr(Config, "SEARCH_BATCH_MAX_QUERIES", 2)
+        response = client.post("/search/batch", json={
+            "side": "lost",
+            "queries": [{"text": "keys"}] * 3
+        })
+        assert response.status_code == 400
+
+
+class TestIngestEndpoints:
+    """Tests for the add-and-match endpoint."""
+    
+    def test_ingest_adds_and_matches(self):
+        """Test ingest adds the item and returns matches from the opposite side."""
+        found_id = unique_id("found_ingest")
+        lost_id = unique_id("lost_ingest")
+        response = client.post(
+            "/ingest/found",
+            data={"item_id": found_id, "description": f"found an orange bicycle helmet {found_id}"}
+        )
+        assert response.status_code == 200
+        assert response.json()["status"] == "added"
+        
+        response = client.post(
+            "/ingest/lost?top_k=5",
+            data={"item_id": lost_id, "description": f"lost my orange bicycle helmet {found_id}"}
+        )
+        assert response.status_code == 200
+        data = response.json()
+        assert data["item_id"] == lost_id
+        assert data["status"] == "added"
+        assert data["has_text"] and not data["has_image"]
+        assert data["query_type"] == "text"
+        assert found_id in [m["item_id"] for m in data["matches"]]
+        
+        # Same as adding and then searching with the stored item
+        by_item = client.post("/search/by_item", json={"item_id": lost_id, "side": "lost", "top_k": 5}).json()
+        assert [m["item_id"] for m in data["matches"]] == [m["item_id"] for m in by_item["matches"]]
+    
+    def test_ingest_with_image(self):
+        """Test ingest with an image and a description."""
+        img = Image.new('RGB', (224, 224), color='orange')
+        img_bytes = io.BytesIO()
+        img.save(img_bytes, format='PNG')
+        img_bytes.seek(0)
+        
+        response = client.post(
+            "/ingest/found",
+            data={"item_id": unique_id("found_ingest_img"), "description": "orange mug"},
+            files={"image": ("item.png", img_bytes, "image/png")}
+        )
+        assert response.status_code == 200
+        assert response.json()["query_type"] == "both"
+    
+    def test_ingest_duplicate_and_invalid_side(self):
+        """Test ingest rejects existing items and unknown sides."""
+        item_id = unique_id("lost_ingest_dup")
+        assert client.post("/ingest/lost", data={"item_id": item_id, "description": "keys"}).status_code == 200
+        assert client.post("/ingest/lost", data={"item_id": item_id, "description": "keys"}).status_code == 400
+        assert client.post("/ingest/stolen", data={"item_id": item_id, "description": "keys"}).status_code == 422
+
+
+class TestSharedMedia:
+    """Tests for reading images by path from the shared media root."""
+    
+    @pytest.fixture
+    def media_root(self, monkeypatch, tmp_path):
+        """Point the media root at a temporary directory holding one image."""
+        root = tmp_path / "media"
+        (root / "items").mkdir(parents=True)
+        # Unique pixels, so items added by earlier runs do not crowd the top matches
+        img = Image.new('RGB', (224, 224), color='teal')
+        for x, byte in enumerate(uuid.uuid4().bytes):
+            img.putpixel((x, 0), (byte, 255 - byte, byte))
+        img.save(root / "items" / "teal.png")
+        (tmp_path / "outside.png").write_bytes((root / "items" / "teal.png").read_bytes())
+        monkeypatch.setattr(Config, "MEDIA_ROOT", root)
+        return root
+    
+    def test_add_and_search_by_path(self, media_root):
+        """Test an image read by path is encoded like the same file uploaded."""
+        item_id = unique_id("found_path")
+        response = client.post(
+            "/add/found_item",
+            data={"item_id": item_id, "image_path": "items/teal.png"}
+        )
+        assert response.status_code == 200
+        assert response.json()["has_image"] is True
+        
+        by_path = client.post("/search/lost?top_k=5", data={"image_path": "items/teal.png"}).json()
+        uploaded = client.post(
+            "/search/lost?top_k=5",
+            files={"image": ("teal.png", (media_root / "items" / "teal.png").read_bytes(), "image/png")}
+        ).json()
+        assert by_path["query_type"] == "image"
+        assert by_path["matches"] == uploaded["matches"]
+        assert item_id in [m["item_id"] for m in by_path["matches"]]
+    
+    def test_path_traversal_rejected(self, media_root):
+        """Test paths leading outside the media root are rejected."""
+        (media_root / "items" / "link.png").symlink_to(media_root.parent / "outside.png")
+        for image_path in ["../outside.png", "items/../../outside.png", str(media_root.parent / "outside.png"),
+                           "items/link.png"]:
+            response = client.post("/search/lost", data={"image_path": image_path})
+            assert response.status_code == 400, image_path
+    
+    def test_missing_path_and_both_sources(self, media_root):
+        """Test a missing file is a 404 and a path plus an upload is rejected."""
+        response = client.post("/search/lost", data={"image_path": "items/missing.png"})
+        assert response.status_code == 404
+        
+        response = client.post(
+            "/search/lost",
+            data={"image_path": "items/teal.png"},
+            files={"image": ("teal.png", (media_root / "items" / "teal.png").read_bytes(), "image/png")}
+        )
+        assert response.status_code == 400
+    
+    def test_batch_endpoints_by_path(self, media_root):
+        """Test batch add and batch search accept image paths per item."""
+        item_id = unique_id("lost_path")
+        response = client.post("/add/batch", data={
+            "side": "lost",
+            "items": "\n".join([
+                json.dumps({"item_id": item_id, "image_path": "items/teal.png"}),
+                json.dumps({"item_id": unique_id("lost_path"), "image_path": "../outside.png"}),
+            ])
+        })
+        assert response.status_code == 200
+        assert [r["status"] for r in response.json()["results"]] == ["added", "failed"]
+        
+        response = client.post("/search/batch", json={
+            "side": "found",
+            "queries": [
+                {"query_id": "q-path", "image_path": "items/teal.png"},
+                {"query_id": "q-missing", "image_path": "items/missing.png"},
+            ]
+        })
+        results = response.json()["results"]
+        assert item_id in [m["item_id"] for m in results[0]["matches"]]
+        assert results[1]["error"]
 
 
 class TestEdgeCases:
@@ -318,3 +614,84 @@ class TestEdgeCases:
         assert "version" in data
         assert "docs" in data
 
+
+class TestConcurrency:
+    """Tests that blocking work does not stall the event loop."""
+    
+    @pytest.mark.asyncio
+    async def test_healthcheck_responsive_while_encoding(self, monkeypatch):
+        """Test /healthcheck answers while encodes hold the worker threads."""
+        release = threading.Event()
+        encode_threads = []
+        encode_batch = EncodeBatcher._encode_batch
+        
+        def blocked_encode_batch(kind, payloads):
+            encode_threads.append(threading.get_ident())
+            # Bounded, so encodes run on the event loop fail the test instead of hanging it
+            release.wait(timeout=10)
+            return encode_batch(kind, payloads)
+        
+        monkeypatch.setattr(EncodeBatcher, "_encode_batch", staticmethod(blocked_encode_batch))
+        
+        # Unique inputs, so none of them is served from the embedding caches
+        images = []
+        for _ in range(4):
+            img = Image.new('RGB', (64, 48), color='green')
+            for x, byte in enumerate(uuid.uuid4().bytes):
+                img.putpixel((x, 0), (byte, 255 - byte, byte))
+            img_bytes = io.BytesIO()
+            img.save(img_bytes, format='JPEG')
+            images.append(img_bytes.getvalue())
+        
+        async with httpx.AsyncClient(app=app, base_url="http://test") as async_client:
+            encodes = [
+                asyncio.create_task(async_client.post(
+                    "/encode/image",
+                    files={"file": (f"test{i}.jpg", image, "image/jpeg")}
+                ))
+                for i, image in enumerate(images)
+            ] + [
+                asyncio.create_task(async_client.post("/encode/text", json={"text": unique_id("text")}))
+                for _ in range(4)
+            ]
+            try:
+                # Wait until the image and text batches are both blocked in workers
+                deadline = time.monotonic() + 10
+                while len(encode_threads) < 2 and time.monotonic() < deadline:
+                    await asyncio.sleep(0.01)
+                
+                response = await async_client.get("/healthcheck")
+                assert response.status_code == 200
+                assert not any(task.done() for task in encodes)
+            finally:
+                release.set()
+            responses = await asyncio.gather(*encodes)
+        
+        assert all(response.status_code == 200 for response in responses)
+        assert len(encode_threads) >= 2
+        assert threading.get_ident() not in encode_threads
+
+
+class TestStartup:
+    """Tests for the import-time cost of the API module."""
+    
+    def test_import_time_budget(self):
+        """Test the API imports without heavy libraries and within the budget."""
+        heavy = ("torch", "clip", "cv2", "faiss", "onnxruntime")
+        probe = (
+            "import sys, ai_service.api.main; "
+            f"print(','.join(m for m in {heavy!r} if m in sys.modules))"
+        )
+        result = subprocess.run(
+            [sys.executable, "-X", "importtime", "-c", probe],
+            cwd=Path(__file__).resolve().parents[2],
+            capture_output=True, text=True, check=True
+        )
+        
+        assert result.stdout.strip() == ""
+        line = next(
+            line for line in result.stderr.splitlines()
+            if line.endswith("| ai_service.api.main")
+        )
+        cumulative_us = int(line.split("|")[1])
+        assert cumulative_us / 1e6 < IMPORT_TIME_BUDGET_S
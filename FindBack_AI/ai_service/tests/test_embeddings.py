@@ -1,11 +1,16 @@
 """
 Tests for CLIP embeddings.
 """
+import io
+import asyncio
 import pytest
 import numpy as np
+import torch
 from PIL import Image
 
-from ai_service.models.clip_model import get_clip_model
+from ai_service.models.clip_model import CLIPModel, get_clip_model
+from ai_service.models.embedding_cache import EmbeddingCache, LRUCache, get_text_cache
+from ai_service.models.encode_batcher import EncodeBatcher
 from ai_service.utils.config import Config
 
 
@@ -83,3 +88,297 @@ class TestCLIPModel:
         assert similarity <= 1.0
 
 
+def _image_bytes(color: str) -> bytes:
+    """Encode a small solid-color image as PNG bytes."""
+    buffer = io.BytesIO()
+    Image.new('RGB', (64, 64), color=color).save(buffer, format='PNG')
+    return buffer.getvalue()
+
+
+class TestEncodeBatcher:
+    """Tests for batched encoding."""
+    
+    @pytest.fixture
+    def clip_model(self):
+        """Create CLIP model instance."""
+        return get_clip_model()
+    
+    @pytest.mark.asyncio
+    async def test_concurrent_texts_share_a_batch(self, clip_model):
+        """Test concurrent requests are encoded together and fanned back out."""
+        batcher = EncodeBatcher(max_batch_size=8, max_wait_ms=50)
+        texts = [f"item number {i}" for i in range(6)]
+        
+        embeddings = await asyncio.gather(*(batcher.encode_text(text) for text in texts))
+        
+        for text, embedding in zip(texts, embeddings):
+            np.testing.assert_allclose(embedding, clip_model.encode_text(text), atol=1e-5)
+        assert batcher.metrics.snapshot()["text"]["batches"] == 1
+        assert batcher.metrics.snapshot()["text"]["max_batch_size"] == 6
+    
+    @pytest.mark.asyncio
+    async def test_max_batch_size(self):
+        """Test batches never exceed the configured size."""
+        batcher = EncodeBatcher(max_batch_size=4, max_wait_ms=50)
+        await asyncio.gather(*(batcher.encode_text(f"text {i}") for i in range(10)))
+        
+        metrics = batcher.metrics.snapshot()["text"]
+        assert metrics["items"] == 10
+        assert metrics["max_batch_size"] == 4
+    
+    @pytest.mark.asyncio
+    async def test_failure_is_per_item(self, clip_model):
+        """Test an undecodable image fails only its own request."""
+        batcher = EncodeBatcher(max_batch_size=8, max_wait_ms=50)
+        good = _image_bytes('red')
+        
+        results = await asyncio.gather(
+            batcher.encode_image(good),
+            batcher.encode_image(b"not an image"),
+            return_exceptions=True
+        )
+        
+        np.testing.assert_allclose(results[0], clip_model.encode_image(good), atol=1e-5)
+        assert isinstance(results[1], Exception)
+        assert batcher.metrics.snapshot()["image"]["batches"] == 1
+
+
+@pytest.fixture(scope="module")
+def onnx_model(tmp_path_factory):
+    """Create a CLIP model on the ONNX backend with a fresh graph cache."""
+    pytest.importorskip("onnxruntime")
+    pytest.importorskip("onnx")
+    original = Config.ONNX_CACHE_DIR
+    Config.ONNX_CACHE_DIR = tmp_path_factory.mktemp("onnx")
+    try:
+        yield CLIPModel(backend="onnx")
+    finally:
+        Config.ONNX_CACHE_DIR = original
+
+
+class TestONNXBackend:
+    """Parity of the ONNX Runtime backend with PyTorch."""
+    
+    @pytest.fixture
+    def clip_model(self):
+        """Create CLIP model instance."""
+        return get_clip_model()
+    
+    def test_image_parity(self, onnx_model, clip_model):
+        """Test ONNX image embeddings match PyTorch."""
+        img = Image.new('RGB', (320, 240), color='orange')
+        np.testing.assert_allclose(
+            onnx_model.encode_image(img, normalize=True),
+            clip_model.encode_image(img, normalize=True),
+            atol=1e-4
+        )
+    
+    def test_batch_parity(self, onnx_model, clip_model):
+        """Test ONNX batch embeddings match PyTorch for varying batch sizes."""
+        images = [Image.new('RGB', (100, 100), color=c) for c in ('red', 'green', 'blue')]
+        texts = ["black wallet", "set of keys on a ring", "blue umbrella"]
+        
+        np.testing.assert_allclose(
+            onnx_model.encode_images_batch(images, normalize=True),
+            clip_model.encode_images_batch(images, normalize=True),
+            atol=1e-4
+        )
+        np.testing.assert_allclose(
+            onnx_model.encode_texts_batch(texts, normalize=True),
+            clip_model.encode_texts_batch(texts, normalize=True),
+            atol=1e-4
+        )
+        np.testing.assert_allclose(
+            onnx_model.encode_text("black wallet", normalize=True),
+            clip_model.encode_text("black wallet", normalize=True),
+            atol=1e-4
+        )
+    
+    def test_graphs_are_cached(self, onnx_model):
+        """Test the exported graphs are written to the cache directory."""
+        from ai_service.models.onnx_backend import ONNXEncoders
+        
+        for path in ONNXEncoders.graph_paths(onnx_model.model_name):
+            assert path.exists()
+
+
+@pytest.fixture(scope="module")
+def quantized_model():
+    """Create a CLIP model with INT8 linear layers."""
+    return CLIPModel(quantize=True)
+
+
+class TestQuantization:
+    """Test dynamic INT8 quantization mode."""
+    
+    def test_drift_reported(self, quantized_model):
+        """Test drift from fp32 is measured at load and stays small."""
+        drift = quantized_model.quantization_drift
+        assert set(drift) == {"image", "text"}
+        for tower in drift.values():
+            assert 0.99 < tower["min_cosine"] <= tower["mean_cosine"] <= 1.0 + 1e-6
+    
+    def test_linear_layers_quantized(self, quantized_model):
+        """Test the MLP layers of both towers are replaced."""
+        quantized = {
+            name for name, module in quantized_model.model.named_modules()
+            if isinstance(module, torch.ao.nn.quantized.dynamic.Linear)
+        }
+        assert any(name.startswith("visual.") for name in quantized)
+        assert any(name.startswith("transformer.") for name in quantized)
+    
+    def test_embeddings_close_to_fp32(self, quantized_model):
+        """Test quantized embeddings stay close to fp32 ones."""
+        clip_model = get_clip_model()
+        img = Image.new('RGB', (200, 150), color='purple')
+        
+        image_embedding = quantized_model.encode_image(img, normalize=True)
+        text_embedding = quantized_model.encode_text("brown leather bag", normalize=True)
+        
+        assert image_embedding.shape == (Config.EMBEDDING_DIM,)
+        assert np.dot(image_embedding, clip_model.encode_image(img, normalize=True)) > 0.99
+        assert np.dot(text_embedding, clip_model.encode_text("brown leather bag", normalize=True)) > 0.99
+    
+    def test_requires_torch_backend(self):
+        """Test quantization is rejected with the ONNX backend."""
+        with pytest.raises(ValueError, match="INT8"):
+            CLIPModel(backend="onnx", quantize=True)
+
+
+class TestEmbeddingCache:
+    """Test the content-addressed image embedding cache."""
+    
+    @pytest.fixture
+    def cache(self, tmp_path):
+        """Create an empty cache in a temporary directory."""
+        cache = EmbeddingCache(tmp_path / "cache.db", memory_items=2)
+        yield cache
+        cache.close()
+    
+    @pytest.fixture
+    def cached_model(self, cache):
+        """Point the shared CLIP model at the temporary cache."""
+        clip_model = get_clip_model()
+        original = clip_model.image_cache
+        clip_model.image_cache = cache
+        yield clip_model
+        clip_model.image_cache = original
+    
+    def test_lru_eviction(self):
+        """Test the least recently used entry is evicted first."""
+        lru = LRUCache(max_items=2)
+        lru.put("a", 1)
+        lru.put("b", 2)
+        assert lru.get("a") == 1
+        lru.put("c", 3)
+        
+        assert lru.get("b") is None
+        assert lru.get("a") == 1 and lru.get("c") == 3
+        assert (lru.hits, lru.misses) == (3, 1)
+    
+    def test_disk_layer_survives_restart(self, cache, tmp_path):
+        """Test entries are found on disk by a new cache instance."""
+        cache.put("key", np.arange(4, dtype=np.float32))
+        cache.close()
+        
+        reopened = EmbeddingCache(tmp_path / "cache.db")
+        np.testing.assert_array_equal(reopened.get("key"), np.arange(4, dtype=np.float32))
+        assert reopened.get("missing") is None
+        stats = reopened.stats()
+        assert (stats["memory_hits"], stats["disk_hits"], stats["misses"]) == (0, 1, 1)
+        reopened.close()
+    
+    def test_size_eviction(self, tmp_path):
+        """Test least recently used entries are dropped over the size limit."""
+        cache = EmbeddingCache(tmp_path / "small.db", memory_items=0, max_disk_mb=4096 / (1024 * 1024))
+        for i in range(4):
+            cache.put(f"key{i}", np.full(512, i, dtype=np.float32))  # 2 KB each
+        cache.get("key0")  # Most recently used now
+        
+        assert cache.evict() == 2
+        assert cache.get("key0") is not None and cache.get("key3") is not None
+        assert cache.get("key1") is None and cache.get("key2") is None
+        cache.close()
+    
+    def test_age_eviction(self, cache):
+        """Test entries unused for longer than the maximum age are dropped."""
+        cache.put("old", np.ones(4, dtype=np.float32))
+        cache.put("new", np.ones(4, dtype=np.float32))
+        cache._conn.execute("UPDATE embeddings SET accessed_at = 0 WHERE key = 'old'")
+        
+        assert cache.evict() == 1
+        assert cache.stats()["disk_entries"] == 1
+    
+    def test_memory_hits_refresh_disk_access_time(self, cache):
+        """Test entries read from memory are not evicted as unused."""
+        cache.put("hot", np.ones(4, dtype=np.float32))
+        cache.put("cold", np.ones(4, dtype=np.float32))
+        cache._conn.execute("UPDATE embeddings SET accessed_at = 0")
+        assert cache.get("hot") is not None
+        assert cache.stats()["memory_hits"] == 1
+        
+        assert cache.evict() == 1
+        assert cache._conn.execute("SELECT key FROM embeddings").fetchall() == [("hot",)]
+    
+    def test_encode_image_uses_cache(self, cached_model, cache):
+        """Test repeated image bytes are encoded once."""
+        image_bytes = _image_bytes("navy")
+        first = cached_model.encode_image(image_bytes, normalize=True)
+        second = cached_model.encode_image(image_bytes, normalize=True)
+        
+        np.testing.assert_allclose(first, second, atol=1e-6)
+        assert np.isclose(np.linalg.norm(second), 1.0, atol=1e-5)
+        assert cache.stats()["misses"] == 1 and cache.stats()["memory_hits"] == 1
+    
+    def test_batch_uses_cache(self, cached_model, cache):
+        """Test the batch path mixes cached and new images and reports errors per image."""
+        cached_model.encode_image(_image_bytes("red"))
+        images = [_image_bytes("red"), _image_bytes("green"), b"not an image"]
+        
+        results = cached_model.encode_images_each(images, normalize=True)
+        
+        assert isinstance(results[2], ValueError)
+        np.testing.assert_allclose(results[0], cached_model.encode_image(_image_bytes("red")), atol=1e-6)
+        assert results[1].shape == (Config.EMBEDDING_DIM,)
+        assert cache.stats()["disk_entries"] == 2
+        with pytest.raises(ValueError):
+            cached_model.encode_images_batch(images)
+
+
+class TestTextCache:
+    """Test the text embedding cache."""
+    
+    @pytest.fixture
+    def clip_model(self):
+        """Create CLIP model instance with an empty text cache."""
+        get_text_cache().clear()
+        return get_clip_model()
+    
+    def test_keyed_on_preprocessed_text(self, clip_model):
+        """Test texts that preprocess to the same string share an entry."""
+        first = clip_model.encode_text("Black  Wallet ", normalize=True)
+        second = clip_model.encode_text("black wallet", normalize=True)
+        
+        np.testing.assert_array_equal(first, second)
+        assert get_text_cache().stats()["hits"] == 1
+        assert get_text_cache().stats()["entries"] == 1
+    
+    def test_batch_shares_cache(self, clip_model):
+        """Test the batch path reuses cached texts and encodes duplicates once."""
+        single = clip_model.encode_text("set of keys", normalize=False)
+        batch = clip_model.encode_texts_batch(["set of keys", "iphone", "IPHONE"], normalize=False)
+        
+        np.testing.assert_array_equal(batch[0], single)
+        np.testing.assert_array_equal(batch[1], batch[2])
+        assert get_text_cache().stats()["entries"] == 2
+        
+        batch[0] += 1  # Results are copies, not the cached arrays
+        np.testing.assert_array_equal(clip_model.encode_text("set of keys", normalize=False), single)
+    
+    def test_warm_text_cache(self, clip_model):
+        """Test warm-loaded texts are served from the cache."""
+        clip_model.warm_text_cache(["umbrella", "student id card", "red backpack"], batch_size=2)
+        clip_model.encode_text("Red Backpack")
+        
+        assert get_text_cache().stats()["hits"] == 1
+        assert get_text_cache().stats()["entries"] == 3
@@ -1,12 +1,16 @@
 """
 Tests for image and text preprocessing.
 """
+import io
 import pytest
+from concurrent.futures import ThreadPoolExecutor
 import numpy as np
 from PIL import Image
 import torch
 
-from ai_service.processing.image_preprocess import preprocess_image, preprocess_image_batch
+from ai_service.processing.image_preprocess import (
+    preprocess_image, preprocess_image_batch, preprocess_images_each
+)
 from ai_service.processing.text_preprocess import preprocess_text, preprocess_text_batch
 from ai_service.utils.config import Config
 
@@ -44,10 +48,97 @@ class TestImagePreprocessing:
         assert isinstance(batch, torch.Tensor)
         assert batch.shape == (2, 3, Config.IMAGE_SIZE, Config.IMAGE_SIZE)
     
+    def test_batch_matches_single(self):
+        """Test batch preprocessing gives the same tensors as one image at a time."""
+        images = [
+            Image.new('RGB', (300, 120), color='orange'),
+            np.random.randint(0, 255, (90, 160, 3), dtype=np.uint8),
+            Image.new('RGB', (40, 60), color='teal')
+        ]
+        batch = preprocess_image_batch(images)
+        
+        assert batch.dtype == torch.float32 and batch.is_contiguous()
+        for row, image in zip(batch, images):
+            assert torch.equal(row, preprocess_image(image))
+    
+    def test_normalization_matches_reference(self):
+        """Test the lookup-table normalization matches the CLIP formula."""
+        pixels = np.random.randint(0, 256, (Config.IMAGE_SIZE, Config.IMAGE_SIZE, 3), dtype=np.uint8)
+        expected = (pixels / 255.0 - np.array(Config.CLIP_MEAN)) / np.array(Config.CLIP_STD)
+        
+        tensor = preprocess_image(Image.fromarray(pixels))
+        
+        np.testing.assert_allclose(tensor.numpy(), expected.transpose(2, 0, 1), atol=1e-5)
+    
+    def test_preprocess_images_each(self):
+        """Test failed images are reported per image and left out of the batch."""
+        images = [Image.new('RGB', (64, 64), color='red'), b"not an image", Image.new('RGB', (64, 64), color='blue')]
+        batch, errors = preprocess_images_each(images)
+        
+        assert batch.shape == (2, 3, Config.IMAGE_SIZE, Config.IMAGE_SIZE)
+        assert errors[0] is None and errors[2] is None
+        assert isinstance(errors[1], ValueError)
+        assert torch.equal(batch[1], preprocess_image(images[2]))
+        with pytest.raises(ValueError):
+            preprocess_image_batch(images)
+    
+    def test_parallel_matches_serial(self):
+        """Test preprocessing on a thread pool matches serial preprocessing, failures included."""
+        images = [_jpeg_bytes(Image.new('RGB', (320 + 16 * i, 240), color=(20 * i, 80, 160))) for i in range(8)]
+        images[5] = b"corrupt"
+        
+        serial, serial_errors = preprocess_images_each(images, executor=None)
+        with ThreadPoolExecutor(max_workers=4) as executor:
+            parallel, parallel_errors = preprocess_images_each(images, executor=executor)
+        
+        assert torch.equal(serial, parallel)
+        assert parallel.shape[0] == 7
+        assert [e is None for e in parallel_errors] == [e is None for e in serial_errors]
+        assert isinstance(parallel_errors[5], ValueError)
+    
     def test_invalid_input(self):
         """Test invalid input handling."""
         with pytest.raises(ValueError):
             preprocess_image(None)
+    
+    def test_jpeg_draft_decode_matches_full_decode(self, monkeypatch):
+        """Test reduced-resolution JPEG decoding stays close to a full decode."""
+        x = np.linspace(0, 255, 3000, dtype=np.float32)[None, :]
+        y = np.linspace(0, 255, 2000, dtype=np.float32)[:, None]
+        pixels = np.stack([np.broadcast_to(x, (2000, 3000)), np.broadcast_to(y, (2000, 3000)), (x + y) / 2], axis=-1)
+        image_bytes = _jpeg_bytes(Image.fromarray(pixels.astype(np.uint8)))
+        
+        monkeypatch.setattr(Config, "JPEG_DRAFT_DECODE", False)
+        full = preprocess_image(image_bytes)
+        monkeypatch.setattr(Config, "JPEG_DRAFT_DECODE", True)
+        draft = preprocess_image(image_bytes)
+        
+        assert draft.shape == full.shape
+        assert (draft - full).abs().mean() < 0.02
+    
+    @pytest.mark.parametrize("draft", [True, False])
+    def test_exif_orientation_from_bytes(self, monkeypatch, draft):
+        """Test EXIF orientation is applied to JPEG bytes, with and without draft decoding."""
+        monkeypatch.setattr(Config, "JPEG_DRAFT_DECODE", draft)
+        # Landscape pixels, red left half and blue right half, shown rotated 90 degrees clockwise
+        img = Image.new('RGB', (2400, 1200), color='red')
+        img.paste(Image.new('RGB', (1200, 1200), color='blue'), (1200, 0))
+        exif = Image.Exif()
+        exif[274] = 6
+        
+        tensor = preprocess_image(_jpeg_bytes(img, exif=exif.tobytes()))
+        
+        center = Config.IMAGE_SIZE // 2
+        top, bottom = tensor[:, 20, center], tensor[:, -20, center]
+        assert top[0] > top[2] and bottom[2] > bottom[0]  # Red on top, blue at the bottom
+        assert torch.allclose(tensor[:, center, 0], tensor[:, 0, 0])  # Portrait: padded at the sides
+
+
+def _jpeg_bytes(img: Image.Image, **save_kwargs) -> bytes:
+    """Encode an image as JPEG bytes."""
+    buffer = io.BytesIO()
+    img.save(buffer, format='JPEG', quality=90, **save_kwargs)
+    return buffer.getvalue()
 
 
 class TestTextPreprocessing:
@@ -7,7 +7,10 @@ import tempfile
 from pathlib import Path
 
 from ai_service.vector_store.faiss_index import FAISSIndex
+from ai_service.vector_store.index_factory import can_train
 from ai_service.vector_store.metadata_store import MetadataStore
+from ai_service.vector_store.sqlite_metadata_store import SQLiteMetadataStore
+from ai_service.vector_store.registry import IndexRegistry
 from ai_service.utils.config import Config
 
 
@@ -104,6 +107,570 @@ class TestFAISSIndex:
         # Load in new instance
         index2 = FAISSIndex(temp_index_path, dimension=Config.EMBEDDING_DIM)
         assert index2.count() == 3
+    
+    def test_removed_item_not_returned(self, faiss_index):
+        """Test removed items no longer show up in search results."""
+        vectors = {}
+        for i in range(5):
+            embedding = np.random.randn(Config.EMBEDDING_DIM).astype(np.float32)
+            vectors[f"item{i}"] = embedding / np.linalg.norm(embedding)
+            faiss_index.add(vectors[f"item{i}"], f"item{i}", save=False)
+        
+        faiss_index.remove("item2", save=False)
+        
+        results = faiss_index.search(vectors["item2"], top_k=5)
+        assert "item2" not in [item_id for item_id, _ in results]
+        assert len(results) == 4
+        assert faiss_index.get_vector("item2") is None
+    
+    def test_ids_are_stable(self, faiss_index):
+        """Test removing an item does not change the ids of other items."""
+        for i in range(3):
+            embedding = np.random.randn(Config.EMBEDDING_DIM).astype(np.float32)
+            faiss_index.add(embedding / np.linalg.norm(embedding), f"item{i}", save=False)
+        
+        before = dict(faiss_index.id_to_index)
+        faiss_index.remove("item0", save=False)
+        faiss_index.compact()
+        
+        assert faiss_index.id_to_index["item1"] == before["item1"]
+        assert faiss_index.id_to_index["item2"] == before["item2"]
+        assert faiss_index.index.ntotal == 2
+    
+    def test_update_replaces_vector(self, faiss_index):
+        """Test search uses the updated vector of an item."""
+        embedding1 = np.random.randn(Config.EMBEDDING_DIM).astype(np.float32)
+        embedding2 = np.random.randn(Config.EMBEDDING_DIM).astype(np.float32)
+        embedding1 /= np.linalg.norm(embedding1)
+        embedding2 /= np.linalg.norm(embedding2)
+        
+        faiss_index.add(embedding1, "item1", save=False)
+        faiss_index.update(embedding2, "item1", save=False)
+        
+        np.testing.assert_allclose(faiss_index.get_vector("item1"), embedding2, rtol=1e-5)
+        results = faiss_index.search(embedding2, top_k=5)
+        assert results == [("item1", pytest.approx(1.0, abs=1e-4))]
+    
+    def test_migrates_positional_index(self, temp_index_path):
+        """Test a legacy position-addressed index is migrated on load."""
+        import faiss
+        import pickle
+        
+        vectors = np.random.randn(3, Config.EMBEDDING_DIM).astype(np.float32)
+        vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+        legacy = faiss.IndexFlatIP(Config.EMBEDDING_DIM)
+        legacy.add(vectors)
+        faiss.write_index(legacy, str(temp_index_path))
+        with open(temp_index_path.with_suffix('.mappings.pkl'), 'wb') as f:
+            pickle.dump({
+                'id_to_index': {"item0": 0, "item2": 2},
+                'index_to_id': {0: "item0", 1: "orphan", 2: "item2"}
+            }, f)
+        
+        index = FAISSIndex(temp_index_path, dimension=Config.EMBEDDING_DIM)
+        
+        assert isinstance(index.index, faiss.IndexIDMap2)
+        assert index.count() == 2
+        np.testing.assert_allclose(index.get_vector("item2"), vectors[2], rtol=1e-5)
+        assert index.search(vectors[0], top_k=1)[0][0] == "item0"
+        
+        # New items never reuse a legacy position
+        assert index.add(vectors[1], "item3", save=True) == 3
+        assert FAISSIndex(temp_index_path, dimension=Config.EMBEDDING_DIM).count() == 3
+
+
+class TestIndexTypes:
+    """Tests for selectable index engines."""
+    
+    @pytest.fixture
+    def temp_index_path(self):
+        """Create temporary index path."""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            yield Path(tmpdir) / "test.index"
+    
+    @pytest.fixture
+    def hnsw_config(self, monkeypatch):
+        """Configure HNSW without a conversion threshold."""
+        monkeypatch.setattr(Config, "INDEX_TYPE", "hnsw")
+        monkeypatch.setattr(Config, "INDEX_CONVERT_THRESHOLD", 0)
+    
+    @staticmethod
+    def _vectors(n):
+        vectors = np.random.randn(n, Config.EMBEDDING_DIM).astype(np.float32)
+        return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+    
+    def test_hnsw_search(self, temp_index_path, hnsw_config):
+        """Test HNSW index finds stored vectors."""
+        index = FAISSIndex(temp_index_path, dimension=Config.EMBEDDING_DIM)
+        assert index.index_type() == "hnsw"
+        
+        vectors = self._vectors(20)
+        for i, vector in enumerate(vectors):
+            index.add(vector, f"item{i}", save=False)
+        
+        results = index.search(vectors[7], top_k=3)
+        assert results[0][0] == "item7"
+        assert results[0][1] == pytest.approx(1.0, abs=1e-4)
+    
+    def test_hnsw_remove_survives_reload(self, temp_index_path, hnsw_config):
+        """Test removed HNSW entries stay hidden after a checkpoint and reload."""
+        index = FAISSIndex(temp_index_path, dimension=Config.EMBEDDING_DIM)
+        vectors = self._vectors(20)
+        for i, vector in enumerate(vectors):
+            index.add(vector, f"item{i}", save=False)
+        index.remove("item3", save=False)
+        index.checkpoint()
+        
+        reloaded = FAISSIndex(temp_index_path, dimension=Config.EMBEDDING_DIM)
+        assert reloaded.count() == 19
+        assert "item3" not in [item_id for item_id, _ in reloaded.search(vectors[3], top_k=5)]
+        
+        reloaded.compact()
+        reloaded.wait_for_rebuild()
+        assert reloaded.index.ntotal == 19
+        assert reloaded.index_type() == "hnsw"
+        assert reloaded.search(vectors[4], top_k=1)[0][0] == "item4"
+    
+    def test_rebuild_runs_outside_lock(self, temp_index_path, hnsw_config, monkeypatch):
+        """Test the index serves requests while a rebuild builds, and keeps their mutations."""
+        import threading
+        from ai_service.vector_store import faiss_index as faiss_index_module
+        
+        index = FAISSIndex(temp_index_path, dimension=Config.EMBEDDING_DIM)
+        vectors = self._vectors(31)
+        for i, vector in enumerate(vectors[:30]):
+            index.add(vector, f"item{i}", save=False)
+        index.remove("item3", save=False)
+        
+        served = []
+        create_index = faiss_index_module.create_index
+        
+        def create_while_serving(*args, **kwargs):
+            # Called while the new index is being built
+            def serve():
+                served.append(index.search(vectors[5], top_k=1)[0][0])
+                index.add(vectors[30], "item30", save=False)
+                index.remove("item4", save=False)
+            thread = threading.Thread(target=serve)
+            thread.start()
+            thread.join(timeout=5)
+            served.append(thread.is_alive())
+            return create_index(*args, **kwargs)
+        
+        monkeypatch.setattr(faiss_index_module, "create_index", create_while_serving)
+        index.convert("hnsw")
+        
+        assert served == ["item5", False]
+        assert index.index.ntotal == 30
+        assert index.count() == 29
+        assert index.search(vectors[30], top_k=1)[0][0] == "item30"
+        assert {"item3", "item4"}.isdisjoint(item_id for item_id, _ in index.search(vectors[4], top_k=5))
+    
+    def test_converts_past_threshold(self, temp_index_path, monkeypatch):
+        """Test a flat index is converted once it reaches the threshold."""
+        monkeypatch.setattr(Config, "INDEX_TYPE", "hnsw")
+        monkeypatch.setattr(Config, "INDEX_CONVERT_THRESHOLD", 10)
+        index = FAISSIndex(temp_index_path, dimension=Config.EMBEDDING_DIM)
+        
+        vectors = self._vectors(12)
+        for i, vector in enumerate(vectors[:9]):
+            index.add(vector, f"item{i}", save=False)
+        index.checkpoint()
+        assert index.index_type() == "flat"
+        
+        for i, vector in enumerate(vectors[9:], start=9):
+            index.add(vector, f"item{i}", save=False)
+        ids = dict(index.id_to_index)
+        index.checkpoint()
+        index.wait_for_rebuild()
+        
+        assert index.index_type() == "hnsw"
+        assert index.id_to_index == ids
+        assert index.search(vectors[10], top_k=1)[0][0] == "item10"
+        assert FAISSIndex(temp_index_path, dimension=Config.EMBEDDING_DIM).index_type() == "hnsw"
+    
+    @pytest.fixture
+    def ivfpq_config(self, monkeypatch):
+        """Configure a small IVF-PQ index that trains on 156 (39 * 4 centroids) vectors."""
+        monkeypatch.setattr(Config, "INDEX_TYPE", "ivfpq")
+        monkeypatch.setattr(Config, "INDEX_CONVERT_THRESHOLD", 100)
+        monkeypatch.setattr(Config, "IVF_NLIST", 4)
+        monkeypatch.setattr(Config, "IVF_NPROBE", 4)
+        monkeypatch.setattr(Config, "PQ_M", 8)
+        monkeypatch.setattr(Config, "PQ_NBITS", 2)
+        # Re-score every candidate so results do not depend on the coarse codes
+        monkeypatch.setattr(Config, "RERANK_FACTOR", 1000)
+    
+    def test_ivfpq_scores_are_exact(self, temp_index_path, ivfpq_config):
+        """Test IVF-PQ candidates are re-scored against the exact vectors."""
+        index = FAISSIndex(temp_index_path, dimension=Config.EMBEDDING_DIM)
+        vectors = self._vectors(301)
+        for i, vector in enumerate(vectors[:300]):
+            index.add(vector, f"item{i}", save=False)
+        index.checkpoint()
+        index.wait_for_rebuild()
+        assert index.index_type() == "ivfpq"
+        
+        results = index.search(vectors[5], top_k=3)
+        assert results[0][0] == "item5"
+        assert results[0][1] == pytest.approx(1.0, abs=1e-5)
+        assert results[1][1] == pytest.approx(float(vectors[5] @ vectors[int(results[1][0][4:])]), abs=1e-5)
+        np.testing.assert_array_equal(index.get_vector("item5"), vectors[5])
+        
+        # Vectors added after training are searchable too
+        index.add(vectors[300], "item300", save=False)
+        assert index.search(vectors[300], top_k=1)[0] == ("item300", pytest.approx(1.0, abs=1e-5))
+        
+        index.remove("item5", save=False)
+        index.checkpoint()
+        reloaded = FAISSIndex(temp_index_path, dimension=Config.EMBEDDING_DIM)
+        assert reloaded.index_type() == "ivfpq"
+        assert reloaded.count() == 300
+        assert "item5" not in [item_id for item_id, _ in reloaded.search(vectors[5], top_k=5)]
+        np.testing.assert_array_equal(reloaded.get_vector("item6"), vectors[6])
+    
+    def test_ivfpq_needs_training_vectors(self, temp_index_path, ivfpq_config):
+        """Test a collection too small to train stays flat."""
+        index = FAISSIndex(temp_index_path, dimension=Config.EMBEDDING_DIM)
+        for i, vector in enumerate(self._vectors(150)):
+            index.add(vector, f"item{i}", save=False)
+        index.checkpoint()
+        assert index.index_type() == "flat"
+        
+        # FAISS wants about 39 training points per k-means centroid
+        assert not can_train("ivfpq", 39 * 4 - 1)
+        assert can_train("ivfpq", 39 * 4)
+        Config.PQ_NBITS = 8
+        assert not can_train("ivfpq", 255)
+        assert can_train("ivfpq", 39 * 256)
+    
+    def test_rebuild_command(self, temp_index_path, ivfpq_config):
+        """Test the offline rebuild converts and writes the index."""
+        from ai_service.vector_store.rebuild import rebuild_index
+        
+        Config.INDEX_TYPE = "flat"
+        index = FAISSIndex(temp_index_path, dimension=Config.EMBEDDING_DIM)
+        vectors = self._vectors(200)
+        for i, vector in enumerate(vectors):
+            index.add(vector, f"item{i}", save=False)
+        index.checkpoint()
+        
+        rebuild_index(temp_index_path, "ivfpq", dimension=Config.EMBEDDING_DIM)
+        assert Config.INDEX_TYPE == "flat"
+        assert index.is_stale()
+        reloaded = FAISSIndex(temp_index_path, dimension=Config.EMBEDDING_DIM)
+        assert reloaded.index_type() == "ivfpq"
+        assert reloaded.search(vectors[9], top_k=1)[0][0] == "item9"
+        
+        # The service keeps the rebuilt type instead of converting back to the configured one
+        index.refresh()
+        index.add(vectors[0], "item200", save=False)
+        index.checkpoint()
+        index.wait_for_rebuild()
+        assert index.index_type() == "ivfpq"
+        
+        rebuild_index(temp_index_path, None, dimension=Config.EMBEDDING_DIM)
+        reloaded = FAISSIndex(temp_index_path, dimension=Config.EMBEDDING_DIM)
+        assert reloaded.index_type() == "flat"
+        assert reloaded.target_type is None
+        assert not reloaded.raw_vectors.path.exists()
+        np.testing.assert_allclose(reloaded.get_vector("item9"), vectors[9], atol=1e-6)
+    
+    @pytest.mark.parametrize("index_type,code_bytes", [("fp16", 2), ("sq8", 1)])
+    def test_scalar_quantized_storage(self, temp_index_path, monkeypatch, index_type, code_bytes):
+        """Test half-precision and 8-bit storage behind the same API."""
+        monkeypatch.setattr(Config, "INDEX_TYPE", index_type)
+        monkeypatch.setattr(Config, "INDEX_CONVERT_THRESHOLD", 20)
+        index = FAISSIndex(temp_index_path, dimension=Config.EMBEDDING_DIM)
+        vectors = self._vectors(30)
+        for i, vector in enumerate(vectors):
+            index.add(vector, f"item{i}", save=False)
+        index.remove("item0", save=False)
+        index.checkpoint()
+        index.wait_for_rebuild()
+        
+        reloaded = FAISSIndex(temp_index_path, dimension=Config.EMBEDDING_DIM)
+        assert reloaded.index_type() == index_type
+        assert reloaded.count() == 29
+        assert reloaded.index.index.sa_code_size() == code_bytes * Config.EMBEDDING_DIM
+        
+        vector = reloaded.get_vector("item3")
+        assert vector.dtype == np.float32
+        np.testing.assert_allclose(vector, vectors[3], atol=1e-2)
+        results = reloaded.search(vectors[3], top_k=2)
+        assert results[0][0] == "item3"
+        assert results[0][1] == pytest.approx(1.0, abs=1e-2)
+        assert "item0" not in [item_id for item_id, _ in reloaded.search(vectors[0], top_k=5)]
+    
+    def test_add_batch(self, temp_index_path):
+        """Test adding many vectors at once, replacing existing items."""
+        index = FAISSIndex(temp_index_path, dimension=Config.EMBEDDING_DIM)
+        vectors = self._vectors(6)
+        index.add(vectors[0], "item0", save=False)
+        
+        vector_ids = index.add_batch(vectors[1:], ["item1", "item2", "item3", "item4", "item0"], save=False)
+        assert vector_ids == [1, 2, 3, 4, 5]
+        assert index.count() == 5
+        assert index.search(vectors[3], top_k=1)[0][0] == "item3"
+        assert index.search(vectors[5], top_k=1)[0][0] == "item0"
+        
+        with pytest.raises(ValueError):
+            index.add_batch(vectors[:2], ["item7", "item7"], save=False)
+        with pytest.raises(ValueError):
+            index.add_batch(vectors[:2], ["item8"], save=False)
+    
+    def test_search_batch(self, temp_index_path, ivfpq_config):
+        """Test a batched search returns the per-query results in order."""
+        index = FAISSIndex(temp_index_path, dimension=Config.EMBEDDING_DIM)
+        vectors = self._vectors(300)
+        for i, vector in enumerate(vectors):
+            index.add(vector, f"item{i}", save=False)
+        index.remove("item7", save=False)
+        
+        queries = vectors[[3, 7, 3, 250]]
+        expected = [index.search(query, top_k=4) for query in queries]
+        assert index.search_batch(queries, top_k=4) == expected
+        
+        index.checkpoint()
+        index.wait_for_rebuild()
+        assert index.index_type() == "ivfpq"
+        batched = index.search_batch(queries, top_k=4)
+        assert batched == [index.search(query, top_k=4) for query in queries]
+        assert [batched[i][0][0] for i in (0, 2, 3)] == ["item3", "item3", "item250"]
+        assert "item7" not in [item_id for item_id, _ in batched[1]]
+        assert index.search_batch(np.empty((0, Config.EMBEDDING_DIM)), top_k=4) == []
+    
+    def test_unknown_index_type(self, temp_index_path, monkeypatch):
+        """Test an unknown index type is rejected."""
+        monkeypatch.setattr(Config, "INDEX_TYPE", "annoy")
+        monkeypatch.setattr(Config, "INDEX_CONVERT_THRESHOLD", 0)
+        with pytest.raises(ValueError):
+            FAISSIndex(temp_index_path, dimension=Config.EMBEDDING_DIM)
+
+
+class TestMappedIndex:
+    """Tests for memory-mapped index loading."""
+    
+    @pytest.fixture
+    def temp_index_path(self, monkeypatch):
+        """Create temporary index path with memory mapping enabled."""
+        monkeypatch.setattr(Config, "INDEX_MMAP", True)
+        with tempfile.TemporaryDirectory() as tmpdir:
+            yield Path(tmpdir) / "test.index"
+    
+    @pytest.fixture
+    def vectors(self):
+        """Create normalized test vectors."""
+        vectors = np.random.randn(30, Config.EMBEDDING_DIM).astype(np.float32)
+        return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+    
+    def _saved_index(self, path, vectors):
+        index = FAISSIndex(path, dimension=Config.EMBEDDING_DIM)
+        for i, vector in enumerate(vectors[:20]):
+            index.add(vector, f"item{i}", save=False)
+        index.checkpoint()
+        return FAISSIndex(path, dimension=Config.EMBEDDING_DIM)
+    
+    def test_load_is_mapped(self, temp_index_path, vectors):
+        """Test a saved index is mapped and searchable."""
+        index = self._saved_index(temp_index_path, vectors)
+        assert index.delta is not None
+        assert index.count() == 20
+        assert index.search(vectors[4], top_k=1)[0][0] == "item4"
+    
+    def test_load_without_whole_index_mapping(self, temp_index_path, vectors, monkeypatch):
+        """Test loading on faiss releases without IO_FLAG_MMAP_IFC."""
+        from ai_service.vector_store import faiss_index as faiss_index_module
+        
+        monkeypatch.setattr(faiss_index_module, "_MMAP_FLAG", faiss_index_module.faiss.IO_FLAG_MMAP)
+        index = self._saved_index(temp_index_path, vectors)
+        assert index.count() == 20
+        assert index.search(vectors[4], top_k=1)[0][0] == "item4"
+    
+    def test_mutations_on_mapped_index(self, temp_index_path, vectors):
+        """Test adds go to the delta and removals hide mapped vectors."""
+        index = self._saved_index(temp_index_path, vectors)
+        index.add(vectors[20], "item20", save=False)
+        index.add(vectors[21], "item3", save=False)  # Re-adding replaces the mapped vector
+        index.remove("item5", save=False)
+        
+        assert index.delta.ntotal == 2
+        assert index.count() == 20
+        assert index.search(vectors[20], top_k=1)[0][0] == "item20"
+        assert index.search(vectors[21], top_k=1)[0][0] == "item3"
+        assert dict(index.search(vectors[3], top_k=20))["item3"] < 0.99
+        assert "item5" not in [item_id for item_id, _ in index.search(vectors[5], top_k=20)]
+        np.testing.assert_array_equal(index.get_vector("item20"), vectors[20])
+        np.testing.assert_array_equal(index.get_vector("item6"), vectors[6])
+        
+        results = index.search(vectors[20], top_k=25)
+        scores = [score for _, score in results]
+        assert len(results) == 20
+        assert scores == sorted(scores, reverse=True)
+    
+    def test_search_batch_merges_delta(self, temp_index_path, vectors):
+        """Test a batched search merges each query's delta results."""
+        index = self._saved_index(temp_index_path, vectors)
+        index.add(vectors[20], "item20", save=False)
+        index.remove("item5", save=False)
+        
+        queries = vectors[[20, 4, 5]]
+        batched = index.search_batch(queries, top_k=3)
+        assert batched == [index.search(query, top_k=3) for query in queries]
+        assert batched[0][0][0] == "item20"
+        assert batched[1][0][0] == "item4"
+        assert "item5" not in [item_id for item_id, _ in batched[2]]
+    
+    def test_checkpoint_folds_delta(self, temp_index_path, vectors):
+        """Test a checkpoint writes the delta into the file and maps it again."""
+        index = self._saved_index(temp_index_path, vectors)
+        index.add(vectors[20], "item20", save=False)
+        index.remove("item5", save=False)
+        index.checkpoint()
+        
+        assert index.delta is not None and index.delta.ntotal == 0
+        assert index.index.ntotal == 20
+        
+        reloaded = FAISSIndex(temp_index_path, dimension=Config.EMBEDDING_DIM)
+        assert reloaded.count() == 20
+        assert reloaded.search(vectors[20], top_k=1)[0][0] == "item20"
+        assert "item5" not in reloaded.id_to_index
+
+
+class TestIndexJournal:
+    """Tests for journaled index durability."""
+    
+    @pytest.fixture
+    def temp_index_path(self):
+        """Create temporary index path."""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            yield Path(tmpdir) / "test.index"
+    
+    @staticmethod
+    def _vector():
+        embedding = np.random.randn(Config.EMBEDDING_DIM).astype(np.float32)
+        return embedding / np.linalg.norm(embedding)
+    
+    def test_mutations_go_to_journal(self, temp_index_path):
+        """Test saved mutations are journaled instead of rewriting the index."""
+        index = FAISSIndex(temp_index_path, dimension=Config.EMBEDDING_DIM)
+        index.add(self._vector(), "item1", save=True)
+        index.remove("item1", save=True)
+        
+        assert not temp_index_path.exists()
+        assert index.journal.size_bytes() > 0
+    
+    def test_replay_without_checkpoint(self, temp_index_path):
+        """Test journaled mutations survive a restart without checkpoint."""
+        index1 = FAISSIndex(temp_index_path, dimension=Config.EMBEDDING_DIM)
+        vectors = [self._vector() for _ in range(3)]
+        for i, vector in enumerate(vectors):
+            index1.add(vector, f"item{i}", save=True)
+        index1.remove("item0", save=True)
+        index1.update(vectors[0], "item2", save=True)
+        
+        index2 = FAISSIndex(temp_index_path, dimension=Config.EMBEDDING_DIM)
+        assert set(index2.id_to_index) == {"item1", "item2"}
+        assert index2.id_to_index == index1.id_to_index
+        np.testing.assert_allclose(index2.get_vector("item2"), vectors[0], rtol=1e-5)
+    
+    def test_checkpoint_truncates_journal(self, temp_index_path):
+        """Test a checkpoint writes the index and empties the journal."""
+        index1 = FAISSIndex(temp_index_path, dimension=Config.EMBEDDING_DIM)
+        index1.add(self._vector(), "item1", save=True)
+        index1.checkpoint()
+        
+        assert temp_index_path.exists()
+        assert index1.journal.size_bytes() == 0
+        assert FAISSIndex(temp_index_path, dimension=Config.EMBEDDING_DIM).count() == 1
+    
+    def test_replay_is_idempotent(self, temp_index_path):
+        """Test replaying records already in the checkpoint changes nothing."""
+        index1 = FAISSIndex(temp_index_path, dimension=Config.EMBEDDING_DIM)
+        index1.add(self._vector(), "item1", save=True)
+        index1.add(self._vector(), "item2", save=True)
+        index1.remove("item1", save=True)
+        journal = index1.journal.journal_path.read_bytes()
+        index1.checkpoint()
+        
+        # Crash between checkpoint and journal truncation
+        index1.journal.journal_path.write_bytes(journal)
+        
+        index2 = FAISSIndex(temp_index_path, dimension=Config.EMBEDDING_DIM)
+        assert index2.id_to_index == {"item2": 1}
+        assert index2.count() == 1
+    
+    @pytest.mark.parametrize("index_type", ["flat", "hnsw"])
+    def test_checkpoint_interrupted_before_mappings(self, temp_index_path, monkeypatch, index_type):
+        """Test nothing is lost if a checkpoint dies between the index and mappings files."""
+        import pickle
+        
+        monkeypatch.setattr(Config, "INDEX_TYPE", index_type)
+        monkeypatch.setattr(Config, "INDEX_CONVERT_THRESHOLD", 0)
+        index1 = FAISSIndex(temp_index_path, dimension=Config.EMBEDDING_DIM)
+        vectors = [self._vector() for _ in range(10)]
+        for i in range(5):
+            index1.add(vectors[i], f"i{i}", save=True)
+        index1.checkpoint()
+        for i in range(5, 10):
+            index1.add(vectors[i], f"i{i}", save=True)
+        index1.remove("i1", save=True)
+        index1.update(vectors[0], "i2", save=True)
+        
+        def interrupted(*args, **kwargs):
+            raise OSError("No space left on device")
+        
+        with monkeypatch.context() as patch:
+            patch.setattr(pickle, "dump", interrupted)
+            with pytest.raises(OSError):
+                index1.checkpoint()
+        
+        index2 = FAISSIndex(temp_index_path, dimension=Config.EMBEDDING_DIM)
+        assert index2.count() == 9
+        assert index2.id_to_index == index1.id_to_index
+        np.testing.assert_allclose(index2.get_vector("i7"), vectors[7], rtol=1e-5)
+        np.testing.assert_allclose(index2.get_vector("i2"), vectors[0], rtol=1e-5)
+        
+        ids = [item_id for item_id, _ in index2.search(vectors[0], top_k=10)]
+        assert len(ids) == len(set(ids)) == 9
+        assert "i1" not in ids
+    
+    def test_torn_tail_is_dropped(self, temp_index_path):
+        """Test a record torn by a crash is ignored on replay."""
+        index1 = FAISSIndex(temp_index_path, dimension=Config.EMBEDDING_DIM)
+        index1.add(self._vector(), "item1", save=True)
+        index1.add(self._vector(), "item2", save=True)
+        
+        journal_path = index1.journal.journal_path
+        journal_path.write_bytes(journal_path.read_bytes()[:-100])
+        
+        index2 = FAISSIndex(temp_index_path, dimension=Config.EMBEDDING_DIM)
+        assert list(index2.id_to_index) == ["item1"]
+        
+        # New appends start on a clean record boundary
+        index2.add(self._vector(), "item3", save=True)
+        assert list(FAISSIndex(temp_index_path, dimension=Config.EMBEDDING_DIM).id_to_index) == ["item1", "item3"]
+    
+    def test_add_batch_replays(self, temp_index_path):
+        """Test a journaled batch add survives a restart."""
+        index1 = FAISSIndex(temp_index_path, dimension=Config.EMBEDDING_DIM)
+        vectors = np.stack([self._vector() for _ in range(4)])
+        index1.add_batch(vectors, [f"item{i}" for i in range(4)], save=True)
+        
+        assert not temp_index_path.exists()
+        index2 = FAISSIndex(temp_index_path, dimension=Config.EMBEDDING_DIM)
+        assert index2.id_to_index == index1.id_to_index
+        np.testing.assert_allclose(index2.get_vector("item2"), vectors[2], rtol=1e-5)
+    
+    def test_size_threshold_checkpoints(self, temp_index_path, monkeypatch):
+        """Test the index is checkpointed once the journal grows too large."""
+        monkeypatch.setattr(Config, "JOURNAL_CHECKPOINT_BYTES", 3 * Config.EMBEDDING_DIM * 4)
+        index = FAISSIndex(temp_index_path, dimension=Config.EMBEDDING_DIM)
+        for i in range(3):
+            index.add(self._vector(), f"item{i}", save=True)
+        
+        assert temp_index_path.exists()
+        assert index.journal.size_bytes() == 0
 
 
 class TestMetadataStore:
@@ -177,5 +744,349 @@ class TestMetadataStore:
         all_items = metadata_store.list_all()
         assert len(all_items) == 5
         assert "item0" in all_items
+    
+    def test_add_many(self, metadata_store, temp_metadata_path):
+        """Test adding several items with one write."""
+        metadata_store.add_many([
+            {"item_id": "item1", "description": "blue scarf", "has_text": True},
+            {"item_id": "item2", "has_image": True},
+        ])
+        
+        reloaded = MetadataStore(temp_metadata_path)
+        assert reloaded.list_all() == ["item1", "item2"]
+        assert reloaded.get("item1")["description"] == "blue scarf"
+        assert reloaded.get("item2")["has_text"] is False
+
+class TestSQLiteMetadataStore:
+    """Tests for the SQLite metadata store."""
+    
+    @pytest.fixture
+    def temp_metadata_path(self):
+        """Create temporary metadata path."""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            yield Path(tmpdir) / "test_metadata.json"
+    
+    @pytest.fixture
+    def metadata_store(self, temp_metadata_path):
+        """Create metadata store instance."""
+        store = SQLiteMetadataStore(temp_metadata_path)
+        yield store
+        store.close()
+    
+    def test_add_and_get(self, metadata_store):
+        """Test adding and getting metadata."""
+        metadata_store.add(
+            item_id="item1",
+            description="a red backpack",
+            has_image=True,
+            has_text=True
+        )
+        
+        metadata = metadata_store.get("item1")
+        assert metadata["item_id"] == "item1"
+        assert metadata["description"] == "a red backpack"
+        assert metadata["has_image"] is True
+        assert metadata_store.exists("item1")
+        assert metadata_store.get("missing") is None
+    
+    def test_update_and_remove(self, metadata_store):
+        """Test updating and removing metadata."""
+        metadata_store.add(item_id="item1", description="old description", has_text=True)
+        
+        assert metadata_store.update("item1", description="new description") is True
+        assert metadata_store.get("item1")["description"] == "new description"
+        assert metadata_store.update("missing", description="x") is False
+        
+        assert metadata_store.remove("item1") is True
+        assert metadata_store.remove("item1") is False
+        assert metadata_store.count() == 0
+    
+    def test_list_all_keeps_insertion_order(self, metadata_store):
+        """Test listing all items in insertion order."""
+        for i in range(5):
+            metadata_store.add(item_id=f"item{i}", has_text=True)
+        
+        assert metadata_store.list_all() == [f"item{i}" for i in range(5)]
+        assert metadata_store.count() == 5
+    
+    def test_persistence(self, temp_metadata_path):
+        """Test rows are visible to a new store instance."""
+        store1 = SQLiteMetadataStore(temp_metadata_path)
+        store1.add(item_id="item1", description="keys", has_text=True)
+        
+        store2 = SQLiteMetadataStore(temp_metadata_path)
+        assert store2.get("item1")["description"] == "keys"
+        store1.close()
+        store2.close()
+    
+    def test_migrates_json_file(self, temp_metadata_path):
+        """Test an existing JSON store is migrated on first start."""
+        legacy = MetadataStore(temp_metadata_path)
+        legacy.add(item_id="item1", description="black wallet", has_text=True)
+        legacy.add(item_id="item2", has_image=True)
+        
+        store = SQLiteMetadataStore(temp_metadata_path)
+        assert store.list_all() == ["item1", "item2"]
+        assert store.get("item1")["description"] == "black wallet"
+        assert not temp_metadata_path.exists()
+        store.close()
+    
+    def test_add_many(self, metadata_store):
+        """Test adding several items in one transaction."""
+        metadata_store.add(item_id="item1", description="old description", has_text=True)
+        metadata_store.add_many([
+            {"item_id": "item1", "description": "blue scarf", "has_text": True},
+            {"item_id": "item2", "has_image": True},
+        ])
+        
+        assert metadata_store.list_all() == ["item1", "item2"]
+        assert metadata_store.get("item1")["description"] == "blue scarf"
+        assert metadata_store.get("item2")["has_image"] is True
+
+class TestIndexRegistry:
+    """Tests for the resident index registry."""
+    
+    @pytest.fixture
+    def temp_index_path(self):
+        """Create temporary index path."""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            yield Path(tmpdir) / "found.index"
+    
+    def test_returns_resident_instance(self, temp_index_path):
+        """Test the same index instance is handed out on every call."""
+        registry = IndexRegistry({"found": temp_index_path})
+        assert registry.get("found") is registry.get("found")
+    
+    def test_unknown_collection(self, temp_index_path):
+        """Test unknown collections are rejected."""
+        registry = IndexRegistry({"found": temp_index_path})
+        with pytest.raises(KeyError):
+            registry.get("stolen")
+    
+    def test_reloads_on_new_generation(self, temp_index_path):
+        """Test the resident index reloads when another writer saves."""
+        registry = IndexRegistry({"found": temp_index_path})
+        resident = registry.get("found")
+        assert resident.count() == 0
+        
+        # Simulate a write from another process
+        writer = FAISSIndex(temp_index_path, dimension=Config.EMBEDDING_DIM)
+        embedding = np.random.randn(Config.EMBEDDING_DIM).astype(np.float32)
+        writer.add(embedding / np.linalg.norm(embedding), "item1", save=True)
+        
+        assert registry.get("found") is resident
+        assert resident.count() == 1
+        assert "item1" in resident.id_to_index
+    
+    def test_own_writes_do_not_reload(self, temp_index_path):
+        """Test saves through the resident index keep it fresh."""
+        registry = IndexRegistry({"found": temp_index_path})
+        resident = registry.get("found")
+        embedding = np.random.randn(Config.EMBEDDING_DIM).astype(np.float32)
+        resident.add(embedding / np.linalg.norm(embedding), "item1", save=True)
+        
+        assert not resident.is_stale()
+    
+    def test_concurrent_writers_keep_each_others_items(self, temp_index_path):
+        """Test two processes writing one index allocate distinct ids and lose no items."""
+        def vector():
+            embedding = np.random.randn(Config.EMBEDDING_DIM).astype(np.float32)
+            return embedding / np.linalg.norm(embedding)
+        
+        seed = FAISSIndex(temp_index_path, dimension=Config.EMBEDDING_DIM)
+        seed.add(vector(), "seed", save=True)
+        seed.checkpoint()
+        seed.close()
+        
+        # One registry per worker process
+        index_a = IndexRegistry({"found": temp_index_path}).get("found")
+        index_b = IndexRegistry({"found": temp_index_path}).get("found")
+        id_a = index_a.add(vector(), "from_a", save=True)
+        id_b = index_b.add(vector(), "from_b", save=True)
+        assert id_a != id_b
+        
+        assert index_a.is_stale()
+        index_b.checkpoint()
+        assert index_a.refresh()
+        assert set(index_a.id_to_index) == {"seed", "from_a", "from_b"}
+        
+        reloaded = FAISSIndex(temp_index_path, dimension=Config.EMBEDDING_DIM)
+        assert reloaded.id_to_index == index_b.id_to_index == index_a.id_to_index
+        assert reloaded.count() == 3
+    
+    def test_refresh_does_not_wait_for_writer(self, temp_index_path):
+        """Test a reader skips refreshing while another process holds unsaved mutations."""
+        writer = FAISSIndex(temp_index_path, dimension=Config.EMBEDDING_DIM)
+        reader = FAISSIndex(temp_index_path, dimension=Config.EMBEDDING_DIM)
+        embedding = np.random.randn(Config.EMBEDDING_DIM).astype(np.float32)
+        writer.add(embedding / np.linalg.norm(embedding), "item1", save=True)
+        writer.add(embedding / np.linalg.norm(embedding), "item2", save=False)
+        
+        assert reader.is_stale() and not reader.refresh()
+        writer.checkpoint()
+        assert reader.refresh()
+        assert set(reader.id_to_index) == {"item1", "item2"}
+    
+    def test_clear_checkpoints_indexes(self, temp_index_path):
+        """Test dropping the resident indexes checkpoints their journaled mutations."""
+        registry = IndexRegistry({"found": temp_index_path})
+        embedding = np.random.randn(Config.EMBEDDING_DIM).astype(np.float32)
+        registry.get("found").add(embedding / np.linalg.norm(embedding), "item1", save=True)
+        assert registry.get("found").journal.size_bytes() > 0
+        
+        registry.clear()
+        reloaded = registry.get("found")
+        assert reloaded.journal.size_bytes() == 0
+        assert "item1" in reloaded.id_to_index
+    
+    def test_refresh_does_not_block_other_collections(self, temp_index_path, monkeypatch):
+        """Test a slow refresh of one collection does not hold up another."""
+        import threading
+        
+        registry = IndexRegistry({
+            "found": temp_index_path,
+            "lost": temp_index_path.with_name("lost.index")
+        })
+        found = registry.get("found")
+        registry.get("lost")
+        refreshing = threading.Event()
+        release = threading.Event()
+        
+        def slow_refresh():
+            refreshing.set()
+            release.wait(timeout=10)
+            return False
+        
+        monkeypatch.setattr(found, "refresh", slow_refresh)
+        thread = threading.Thread(target=registry.get, args=("found",))
+        thread.start()
+        try:
+            assert refreshing.wait(timeout=10)
+            result = []
+            other = threading.Thread(target=lambda: result.append(registry.get("lost")))
+            other.start()
+            other.join(timeout=5)
+            assert result and thread.is_alive()
+        finally:
+            release.set()
+            thread.join()
+    
+    def test_resident_metadata_store(self, temp_index_path):
+        """Test the metadata store of a collection is opened once."""
+        registry = IndexRegistry(
+            {"found": temp_index_path},
+            metadata_paths={"found": temp_index_path.with_name("found.json")}
+        )
+        store = registry.get_metadata_store("found")
+        assert registry.get_metadata_store("found") is store
+        registry.clear()
 
 
+class TestBulkIngest:
+    """Tests for the streaming bulk load."""
+    
+    @pytest.fixture
+    def registry(self, temp_index_path):
+        """Create a registry over temporary collections."""
+        directory = temp_index_path.parent
+        registry = IndexRegistry(
+            {side: directory / f"{side}.index" for side in ("lost", "found")},
+            metadata_paths={side: directory / f"{side}.json" for side in ("lost", "found")}
+        )
+        yield registry
+        registry.clear()
+    
+    @pytest.fixture
+    def temp_index_path(self):
+        """Create temporary index path."""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            yield Path(tmpdir) / "test.index"
+    
+    @staticmethod
+    def _tar(members):
+        """Build an in-memory tar archive from (name, bytes) pairs."""
+        import io
+        import tarfile
+        
+        buffer = io.BytesIO()
+        with tarfile.open(fileobj=buffer, mode="w") as tar:
+            for name, data in members:
+                info = tarfile.TarInfo(name)
+                info.size = len(data)
+                tar.addfile(info, io.BytesIO(data))
+        buffer.seek(0)
+        return buffer
+    
+    def test_tar_ingest(self, registry, temp_index_path):
+        """Test a tar archive is loaded, skipping bad records."""
+        import io
+        import json
+        from PIL import Image
+        from ai_service.vector_store.bulk_ingest import bulk_ingest, read_state, read_tar
+        
+        image = io.BytesIO()
+        Image.new('RGB', (64, 64), color='red').save(image, format='PNG')
+        archive = self._tar([
+            ("items/0001.json", json.dumps({"side": "found", "description": "red wallet"}).encode()),
+            ("items/0001.png", image.getvalue()),
+            ("items/0002.json", json.dumps({"side": "lost", "description": "black umbrella"}).encode()),
+            ("items/0003.json", json.dumps({"side": "stolen", "description": "bike"}).encode()),
+            ("items/0004.json", b"{not json"),
+        ])
+        state_path = temp_index_path.with_name("ingest.progress")
+        
+        stats = bulk_ingest(read_tar(archive), registry, state_path, batch_size=2, commit_every=2)
+        
+        assert (stats.added, stats.failed) == (2, 2)
+        assert read_state(state_path) == 4
+        assert "0001" in registry.get("found").id_to_index
+        assert "0002" in registry.get("lost").id_to_index
+        assert registry.get_metadata_store("found").get("0001")["has_image"]
+    
+    def test_resume_skips_committed(self, registry, temp_index_path):
+        """Test a load resumes after the committed records."""
+        import json
+        from ai_service.vector_store.bulk_ingest import bulk_ingest, read_ndjson, read_state
+        
+        manifest = temp_index_path.with_name("items.ndjson")
+        manifest.write_text("\n".join(
+            json.dumps({"item_id": f"item{i}", "side": "lost", "description": f"item number {i}"})
+            for i in range(5)
+        ))
+        state_path = temp_index_path.with_name("items.ndjson.progress")
+        state_path.write_text(json.dumps({"committed": 3}))
+        
+        committed = read_state(state_path)
+        stats = bulk_ingest(read_ndjson(manifest, skip=committed), registry, state_path, committed=committed)
+        
+        assert stats.added == 2
+        assert sorted(registry.get("lost").id_to_index) == ["item3", "item4"]
+        assert read_state(state_path) == 5
+        
+        # A finished source loads nothing
+        stats = bulk_ingest(read_ndjson(manifest, skip=5), registry, state_path, committed=5)
+        assert stats.added == 0
+        assert registry.get("lost").count() == 2
+    
+    def test_main_closes_registry(self, registry, temp_index_path, monkeypatch):
+        """Test the command checkpoints and releases the indexes, even when interrupted."""
+        import json
+        from ai_service.vector_store import bulk_ingest
+        
+        manifest = temp_index_path.with_name("items.ndjson")
+        manifest.write_text(json.dumps({"item_id": "item0", "side": "found", "description": "blue scarf"}))
+        closed = []
+        monkeypatch.setattr(registry, "close", lambda: closed.append(True))
+        monkeypatch.setattr(bulk_ingest, "IndexRegistry", lambda: registry)
+        
+        bulk_ingest.main([str(manifest)])
+        assert closed == [True]
+        assert "item0" in registry.get("found").id_to_index
+        
+        def interrupt(*args, **kwargs):
+            raise KeyboardInterrupt
+        
+        monkeypatch.setattr(bulk_ingest, "bulk_ingest", interrupt)
+        with pytest.raises(SystemExit):
+            bulk_ingest.main([str(manifest), "--restart"])
+        assert closed == [True, True]
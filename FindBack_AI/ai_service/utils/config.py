@@ -10,29 +10,75 @@ class Config:
     # Model settings
     CLIP_MODEL_NAME: str = "ViT-B/32"
     DEVICE: str = "cpu"
+    INFERENCE_BACKEND: str = "torch"  # "torch" or "onnx" (ONNX Runtime, CPU)
+    QUANTIZE_INT8: bool = False  # Dynamic INT8 quantization of linear layers (torch backend, CPU)
+    ENCODE_BATCH_MAX_SIZE: int = 16  # Max concurrent encode requests combined into one forward pass
+    ENCODE_BATCH_MAX_WAIT_MS: float = 5.0  # Max wait for more requests after the first one arrives
+    EXECUTOR_MAX_WORKERS: int = 4  # Threads running encodes, index and metadata I/O off the event loop
+    PRELOAD_ON_STARTUP: bool = True  # Load and warm up the model and indexes before /ready reports ready
+    WARMUP_BATCH_SIZES: tuple = (1, ENCODE_BATCH_MAX_SIZE)  # Throwaway encode batches run at startup
+    
+    # Image embedding cache, keyed by SHA-256 of the uploaded bytes (memory LRU over SQLite)
+    IMAGE_CACHE_ENABLED: bool = True
+    IMAGE_CACHE_MEMORY_ITEMS: int = 10_000  # Embeddings kept in memory (2 KB each at 512 dims)
+    IMAGE_CACHE_MAX_DISK_MB: float = 512.0  # Size limit of the on-disk store
+    IMAGE_CACHE_MAX_AGE_DAYS: float = 30.0  # Entries unused for this long are evicted
+    
+    # Text embedding cache, keyed by the preprocessed text (memory LRU)
+    TEXT_CACHE_ITEMS: int = 10_000  # Embeddings kept in memory (0 disables the cache)
+    TEXT_CACHE_WARM_TOP_N: int = 0  # Encode this many most frequent stored descriptions at startup
     
     # Image preprocessing
     IMAGE_SIZE: int = 224
+    JPEG_DRAFT_DECODE: bool = True  # Decode JPEGs near the target size (DCT scaling) instead of at full resolution
+    PREPROCESS_WORKERS: int = 4  # Threads decoding and resizing the images of a batch in parallel (1 = serial)
     CLIP_MEAN: tuple = (0.48145466, 0.4578275, 0.40821073)
     CLIP_STD: tuple = (0.26862954, 0.24768475, 0.25532175)
     
     # FAISS settings
     EMBEDDING_DIM: int = 512  # CLIP ViT-B/32 produces 512-dim embeddings
-    INDEX_TYPE: str = "L2"
+    INDEX_TYPE: str = "flat"  # "flat", "hnsw", "ivfpq", "fp16" or "sq8" (see vector_store/index_factory.py)
+    INDEX_CONVERT_THRESHOLD: int = 50_000  # Collections stay flat until they reach this many vectors
+    HNSW_M: int = 32  # Graph neighbours per node (memory vs. recall)
+    HNSW_EF_CONSTRUCTION: int = 80  # Candidate list size while building
+    HNSW_EF_SEARCH: int = 64  # Candidate list size while searching (latency vs. recall)
+    IVF_NLIST: int = 0  # Coarse clusters for IVF-PQ (0 = about 4 * sqrt(collection size))
+    IVF_NPROBE: int = 16  # Clusters scanned per search (latency vs. recall)
+    IVF_TRAIN_SAMPLE: int = 100_000  # Vectors sampled to train the coarse quantizer and PQ codebooks
+    PQ_M: int = 64  # PQ sub-quantizers; must divide EMBEDDING_DIM (bytes per vector at 8 bits)
+    PQ_NBITS: int = 8  # Bits per sub-quantizer code
+    RERANK_FACTOR: int = 4  # Compressed indexes re-score top_k * this many candidates exactly
+    INDEX_COMPACT_FRACTION: float = 0.1  # Compact once this fraction of stored vectors are removed
+    INDEX_MMAP: bool = False  # Memory-map saved indexes read-only (fast start, pages shared between workers)
+    
+    # Index durability: "journal" (append mutations, checkpoint periodically) or "snapshot" (full write per change)
+    INDEX_DURABILITY: str = "journal"
+    JOURNAL_CHECKPOINT_BYTES: int = 64 * 1024 * 1024  # Checkpoint once the journal reaches this size
+    JOURNAL_CHECKPOINT_SECONDS: float = 300.0  # ...or once the last checkpoint is this old
+    JOURNAL_FSYNC: bool = False  # fsync every append (power-loss safe, slower)
     
     # Storage paths
     BASE_DIR: Path = Path(__file__).parent.parent.parent
     DATA_DIR: Path = BASE_DIR / "data"
     INDEXES_DIR: Path = DATA_DIR / "indexes"
     METADATA_DIR: Path = DATA_DIR / "metadata"
+    ONNX_CACHE_DIR: Path = DATA_DIR / "onnx"  # Exported CLIP graphs for the ONNX backend
+    CACHE_DIR: Path = DATA_DIR / "cache"
+    MEDIA_ROOT: Path = BASE_DIR / "media"  # Media volume shared with the backend; image_path fields resolve under it
+    
+    # Metadata backend: "sqlite" (row-level writes, WAL mode) or "json" (legacy, whole-file rewrites)
+    METADATA_BACKEND: str = "sqlite"
     
     # API settings
     MAX_IMAGE_SIZE: int = 10 * 1024 * 1024  # 10MB
     MAX_TEXT_LENGTH: int = 1000
+    ADD_BATCH_MAX_ITEMS: int = 256  # Max items per /add/batch request
     
     # Search settings
     DEFAULT_TOP_K: int = 10
     MIN_SIMILARITY_SCORE: float = 0.0
+    SEARCH_BATCH_MAX_QUERIES: int = 1000  # Max queries per /search/batch request
+    SEARCH_BATCH_STREAM_CHUNK: int = 64  # Queries encoded and searched per streamed chunk
     
     @classmethod
     def initialize_directories(cls) -> None:
@@ -59,3 +105,8 @@ class Config:
     def get_found_items_metadata_path(cls) -> Path:
         """Get path to found items metadata store."""
         return cls.METADATA_DIR / "found_items.json"
+    
+    @classmethod
+    def get_image_cache_path(cls) -> Path:
+        """Get path to the image embedding cache database."""
+        return cls.CACHE_DIR / "image_embeddings.db"
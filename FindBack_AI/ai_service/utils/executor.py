@@ -0,0 +1,92 @@
+"""
+Bounded executors for blocking work called from async request handlers
+and for parallel image preprocessing.
+"""
+import asyncio
+import functools
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Optional, TypeVar
+
+from ai_service.utils.config import Config
+
+T = TypeVar("T")
+
+
+# Global executor instances (lazy created)
+_executor_instance: Optional[ThreadPoolExecutor] = None
+_preprocess_executor_instance: Optional[ThreadPoolExecutor] = None
+_executor_lock = threading.Lock()
+
+
+def get_executor() -> ThreadPoolExecutor:
+    """
+    Get or create the global worker pool.
+    
+    Threads suit the work done here: CLIP forward passes, FAISS searches
+    and file I/O release the GIL.
+    
+    Returns:
+        ThreadPoolExecutor with Config.EXECUTOR_MAX_WORKERS threads
+    """
+    global _executor_instance
+    if _executor_instance is None:
+        with _executor_lock:
+            if _executor_instance is None:
+                _executor_instance = ThreadPoolExecutor(
+                    max_workers=Config.EXECUTOR_MAX_WORKERS,
+                    thread_name_prefix="findback-worker"
+                )
+    return _executor_instance
+
+
+def get_preprocess_executor() -> Optional[ThreadPoolExecutor]:
+    """
+    Get or create the image preprocessing pool.
+    
+    Separate from the worker pool because encodes running there wait on
+    it. Image decoding and resizing in PIL release the GIL, so the images
+    of a batch are prepared in parallel threads.
+    
+    Returns:
+        ThreadPoolExecutor with Config.PREPROCESS_WORKERS threads, or None
+        if preprocessing is configured to run serially
+    """
+    global _preprocess_executor_instance
+    if Config.PREPROCESS_WORKERS <= 1:
+        return None
+    if _preprocess_executor_instance is None:
+        with _executor_lock:
+            if _preprocess_executor_instance is None:
+                _preprocess_executor_instance = ThreadPoolExecutor(
+                    max_workers=Config.PREPROCESS_WORKERS,
+                    thread_name_prefix="findback-preprocess"
+                )
+    return _preprocess_executor_instance
+
+
+async def run_blocking(func: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+    """
+    Run a blocking function in the worker pool without blocking the event loop.
+    
+    Args:
+        func: Function to call
+        *args: Positional arguments
+        **kwargs: Keyword arguments
+        
+    Returns:
+        The function's return value
+    """
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(get_executor(), functools.partial(func, *args, **kwargs))
+
+
+def shutdown_executor() -> None:
+    """Wait for running work to finish and stop the worker and preprocessing pools."""
+    global _executor_instance, _preprocess_executor_instance
+    if _executor_instance is not None:
+        _executor_instance.shutdown(wait=True)
+        _executor_instance = None
+    if _preprocess_executor_instance is not None:
+        _preprocess_executor_instance.shutdown(wait=True)
+        _preprocess_executor_instance = None
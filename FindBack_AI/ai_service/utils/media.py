@@ -0,0 +1,67 @@
+"""
+Reading images from the media volume shared with the backend.
+"""
+import os
+from pathlib import Path, PurePosixPath
+from typing import Optional
+
+from ai_service.utils.config import Config
+
+
+def resolve_media_path(image_path: str, root: Optional[Path] = None) -> Path:
+    """
+    Resolve an image path relative to the shared media root.
+    
+    Absolute paths, ``..`` components and symlinks leading outside the
+    root are rejected, so a request can only read files under the root.
+    
+    Args:
+        image_path: POSIX path relative to the media root (e.g. "items/1.jpg")
+        root: Media root (default Config.MEDIA_ROOT)
+        
+    Returns:
+        Resolved path of an existing file under the root
+        
+    Raises:
+        ValueError: If the path is empty, absolute or escapes the root
+        FileNotFoundError: If no file exists at the path
+    """
+    root = (root or Config.MEDIA_ROOT).resolve()
+    relative = PurePosixPath(image_path or "")
+    if not image_path or "\x00" in image_path or relative.is_absolute() or ".." in relative.parts:
+        raise ValueError(f"Invalid image path: {image_path!r}. Expected a path relative to the media root")
+    
+    path = (root / relative).resolve()
+    if not path.is_relative_to(root):
+        raise ValueError(f"Invalid image path: {image_path!r}. Expected a path relative to the media root")
+    if not path.is_file():
+        raise FileNotFoundError(f"Image not found in shared media: {image_path}")
+    return path
+
+
+def read_media_file(image_path: str, root: Optional[Path] = None) -> bytes:
+    """
+    Read an image from the shared media root.
+    
+    The size is checked before reading, so an oversized file is rejected
+    without being loaded.
+    
+    Args:
+        image_path: POSIX path relative to the media root
+        root: Media root (default Config.MEDIA_ROOT)
+        
+    Returns:
+        File contents
+        
+    Raises:
+        ValueError: If the path is invalid, or the file is empty or too large
+        FileNotFoundError: If no file exists at the path
+    """
+    path = resolve_media_path(image_path, root)
+    with open(path, "rb") as f:
+        size = os.fstat(f.fileno()).st_size
+        if size == 0:
+            raise ValueError(f"Empty image file: {image_path}")
+        if size > Config.MAX_IMAGE_SIZE:
+            raise ValueError(f"Image too large. Maximum size is {Config.MAX_IMAGE_SIZE // (1024*1024)}MB")
+        return f.read()
@@ -0,0 +1,385 @@
+"""
+Streaming bulk load of lost and found items from a tar archive or NDJSON manifest.
+
+Records are read one at a time, encoded in batches of ``--batch-size``
+(images and texts each in one forward pass) and added to the collections
+without saving. Every ``--commit-every`` records the touched indexes are
+checkpointed, the buffered metadata is written, and the number of records
+consumed is stored in a state file. An interrupted load started again with
+the same state file skips the committed records; records after the last
+commit are loaded again, which replaces whatever part of them made it to
+disk. As with the rebuild tool, pause writes to the collections while it
+runs.
+
+Sources:
+    NDJSON (.ndjson / .jsonl): one object per line with item_id, side
+        ("lost" or "found"), optional description and optional image, a
+        path relative to the manifest.
+    tar (any compression, read as a stream): the files of an item share a
+        name up to the extension, e.g. ``0001.json`` with side,
+        description and optional item_id (defaults to the name), and
+        ``0001.jpg``. Files of one item must be adjacent.
+
+Run from the FindBack_AI directory:
+    python -m ai_service.vector_store.bulk_ingest archive.tar.gz --batch-size 64
+    curl -s https://host/archive.tar | python -m ai_service.vector_store.bulk_ingest - --format tar
+"""
+import argparse
+import itertools
+import json
+import os
+import posixpath
+import sys
+import tarfile
+import time
+import numpy as np
+from pathlib import Path
+from typing import Dict, Iterator, List, NamedTuple, Optional, Tuple
+
+from ai_service.vector_store.registry import COLLECTIONS, IndexRegistry
+from ai_service.utils.config import Config
+from ai_service.utils.logger import logger
+
+
+class IngestRecord(NamedTuple):
+    """Single item read from a bulk source."""
+    position: int  # Ordinal of the record in the source
+    item_id: str
+    side: str
+    description: Optional[str]
+    image: Optional[bytes]
+    error: Optional[str]  # Set if the record could not be read
+
+
+class IngestStats:
+    """Running counters and throughput of a bulk load."""
+    
+    def __init__(self, committed: int = 0):
+        """
+        Initialize counters.
+        
+        Args:
+            committed: Records committed by an earlier run
+        """
+        self.committed = committed
+        self.added = 0
+        self.failed = 0
+        self.started = time.perf_counter()
+        self._last_commit = (self.started, committed)
+    
+    def rates(self) -> Tuple[float, float]:
+        """
+        Get throughput since the last report and since the start.
+        
+        Returns:
+            Records per second (recent, overall)
+        """
+        now = time.perf_counter()
+        since, count = self._last_commit
+        recent = (self.committed - count) / max(now - since, 1e-9)
+        overall = (self.added + self.failed) / max(now - self.started, 1e-9)
+        self._last_commit = (now, self.committed)
+        return recent, overall
+
+
+def read_ndjson(path: Path, skip: int = 0) -> Iterator[IngestRecord]:
+    """
+    Read records from an NDJSON manifest.
+    
+    Args:
+        path: Manifest path (image paths are relative to its directory)
+        skip: Number of leading records to pass over without loading images
+        
+    Yields:
+        Ingest records in manifest order
+    """
+    base = path.parent
+    with open(path, "r", encoding="utf-8") as f:
+        position = 0
+        for line in f:
+            if not line.strip():
+                continue
+            position += 1
+            if position <= skip:
+                continue
+            try:
+                item = json.loads(line)
+                image = None
+                if item.get("image"):
+                    image = (base / item["image"]).read_bytes()
+                yield _record(position, item, image)
+            except Exception as e:
+                yield IngestRecord(position, "", "", None, None, f"Unreadable record: {str(e)}")
+
+
+def read_tar(fileobj, skip: int = 0) -> Iterator[IngestRecord]:
+    """
+    Read records from a tar stream, grouping adjacent files by name.
+    
+    Args:
+        fileobj: Binary file object positioned at the start of the archive
+        skip: Number of leading records to pass over without reading them
+        
+    Yields:
+        Ingest records in archive order
+    """
+    position = 0
+    key = None
+    files: Dict[str, bytes] = {}
+    
+    with tarfile.open(fileobj=fileobj, mode="r|*") as tar:
+        for member in tar:
+            if not member.isfile():
+                continue
+            member_key, extension = posixpath.splitext(member.name)
+            if member_key != key:
+                if key is not None and position > skip:
+                    yield _tar_record(position, key, files)
+                key = member_key
+                files = {}
+                position += 1
+            if position > skip:
+                files[extension.lower()] = tar.extractfile(member).read()
+        
+        if key is not None and position > skip:
+            yield _tar_record(position, key, files)
+
+
+def _tar_record(position: int, key: str, files: Dict[str, bytes]) -> IngestRecord:
+    """Build a record from the files of one item in a tar archive."""
+    try:
+        item = json.loads(files.pop(".json")) if ".json" in files else {}
+        item.setdefault("item_id", posixpath.basename(key))
+        image = next(iter(files.values()), None)
+        return _record(position, item, image)
+    except Exception as e:
+        return IngestRecord(position, posixpath.basename(key), "", None, None, f"Unreadable record: {str(e)}")
+
+
+def _record(position: int, item: dict, image: Optional[bytes]) -> IngestRecord:
+    """Validate the fields of a source item."""
+    item_id = str(item.get("item_id") or "")
+    side = item.get("side")
+    description = item.get("description")
+    error = None
+    if not item_id:
+        error = "Record has no item_id"
+    elif side not in COLLECTIONS:
+        error = f"Record side must be one of {list(COLLECTIONS)}, got {side!r}"
+    elif image is not None and len(image) > Config.MAX_IMAGE_SIZE:
+        error = f"Image too large. Maximum size is {Config.MAX_IMAGE_SIZE // (1024*1024)}MB"
+    elif image is None and not (description and description.strip()):
+        error = "Item must have at least an image or text description"
+    return IngestRecord(position, item_id, side or "", description, image, error)
+
+
+def encode_records(records: List[IngestRecord]) -> List[Tuple[IngestRecord, Optional[np.ndarray], Optional[str]]]:
+    """
+    Encode a batch of records, images and texts each in one forward pass.
+    
+    Args:
+        records: Records without read errors
+        
+    Returns:
+        (record, embedding, error) per record; embedding is None if it failed
+    """
+    # Imported here so reading and skipping do not load torch and CLIP
+    from ai_service.api.queries import combine_embeddings
+    from ai_service.models.clip_model import get_clip_model
+    
+    clip_model = get_clip_model()
+    with_image = [r for r in records if r.image is not None]
+    with_text = [r for r in records if r.description and r.description.strip()]
+    image_embeddings = dict(zip(
+        (r.position for r in with_image),
+        clip_model.encode_images_each([r.image for r in with_image], normalize=True)
+    ))
+    text_embeddings = {}
+    if with_text:
+        text_embeddings = dict(zip(
+            (r.position for r in with_text),
+            clip_model.encode_texts_batch([r.description for r in with_text], normalize=True)
+        ))
+    
+    results = []
+    for record in records:
+        image_embedding = image_embeddings.get(record.position)
+        text_embedding = text_embeddings.get(record.position)
+        if isinstance(image_embedding, Exception):
+            results.append((record, None, str(image_embedding)))
+            continue
+        embedding, _ = combine_embeddings(image_embedding, text_embedding)
+        results.append((record, embedding, None))
+    return results
+
+
+def bulk_ingest(
+    records: Iterator[IngestRecord],
+    registry: IndexRegistry,
+    state_path: Path,
+    committed: int = 0,
+    batch_size: int = 64,
+    commit_every: int = 1024
+) -> IngestStats:
+    """
+    Load records into the collections, committing periodically.
+    
+    Args:
+        records: Records following the ``committed`` ones already loaded
+        registry: Registry of the target collections
+        state_path: File recording the number of committed records
+        committed: Records committed by an earlier run
+        batch_size: Records encoded together
+        commit_every: Records between two commits
+        
+    Returns:
+        Counters of the load
+    """
+    stats = IngestStats(committed)
+    pending_metadata: Dict[str, List[dict]] = {}
+    consumed = committed
+    
+    while True:
+        batch = list(itertools.islice(records, batch_size))
+        if not batch:
+            break
+        
+        readable = [r for r in batch if r.error is None]
+        encoded = encode_records(readable) if readable else []
+        for record in batch:
+            if record.error is not None:
+                logger.warning(f"Skipping record {record.position} ({record.item_id}): {record.error}")
+                stats.failed += 1
+        
+        # Later records of the same item within a batch win
+        by_item: Dict[Tuple[str, str], Tuple[IngestRecord, np.ndarray]] = {}
+        for record, embedding, error in encoded:
+            if error is not None:
+                logger.warning(f"Failed to encode record {record.position} ({record.item_id}): {error}")
+                stats.failed += 1
+                continue
+            by_item[(record.side, record.item_id)] = (record, embedding)
+        
+        for side in COLLECTIONS:
+            entries = [entry for (entry_side, _), entry in by_item.items() if entry_side == side]
+            if not entries:
+                continue
+            registry.get(side).add_batch(
+                np.stack([embedding for _, embedding in entries]),
+                [record.item_id for record, _ in entries],
+                save=False
+            )
+            pending_metadata.setdefault(side, []).extend(
+                {
+                    "item_id": record.item_id,
+                    "description": record.description,
+                    "has_image": record.image is not None,
+                    "has_text": bool(record.description and record.description.strip())
+                }
+                for record, _ in entries
+            )
+        stats.added += len(by_item)
+        consumed = batch[-1].position
+        
+        if consumed - stats.committed >= commit_every:
+            _commit(registry, pending_metadata, state_path, consumed, stats)
+    
+    if consumed > stats.committed:
+        _commit(registry, pending_metadata, state_path, consumed, stats)
+    return stats
+
+
+def _commit(
+    registry: IndexRegistry,
+    pending_metadata: Dict[str, List[dict]],
+    state_path: Path,
+    consumed: int,
+    stats: IngestStats
+) -> None:
+    """Checkpoint touched indexes, write buffered metadata, then record progress."""
+    for side, rows in pending_metadata.items():
+        registry.get(side).checkpoint()
+        registry.get_metadata_store(side).add_many(rows)
+    pending_metadata.clear()
+    
+    # Written last and atomically: a crash before this re-loads the batch
+    tmp_path = state_path.with_name(state_path.name + ".tmp")
+    tmp_path.write_text(json.dumps({"committed": consumed}))
+    os.replace(tmp_path, state_path)
+    
+    stats.committed = consumed
+    recent, overall = stats.rates()
+    logger.info(
+        f"Committed {consumed} records ({stats.added} added, {stats.failed} failed this run); "
+        f"{recent:.1f} records/s recent, {overall:.1f} records/s overall"
+    )
+
+
+def read_state(state_path: Path) -> int:
+    """
+    Get the number of records committed by earlier runs.
+    
+    Args:
+        state_path: State file
+        
+    Returns:
+        Committed records (0 if there is no state yet)
+    """
+    if not state_path.exists():
+        return 0
+    return int(json.loads(state_path.read_text())["committed"])
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Bulk load items from a tar archive or NDJSON manifest")
+    parser.add_argument("source", help="Archive or manifest path, or - for a tar stream on stdin")
+    parser.add_argument("--format", choices=["auto", "tar", "ndjson"], default="auto")
+    parser.add_argument("--batch-size", type=int, default=64)
+    parser.add_argument("--commit-every", type=int, default=1024)
+    parser.add_argument("--state", type=Path, help="Progress file (default: <source>.progress)")
+    parser.add_argument("--restart", action="store_true", help="Ignore earlier progress")
+    args = parser.parse_args(argv)
+    
+    fmt = args.format
+    if fmt == "auto":
+        fmt = "ndjson" if args.source.endswith((".ndjson", ".jsonl")) else "tar"
+    if fmt == "ndjson" and args.source == "-":
+        parser.error("NDJSON manifests must be read from a file (image paths are relative to it)")
+    state_path = args.state or Path((args.source if args.source != "-" else "stdin") + ".progress")
+    committed = 0 if args.restart else read_state(state_path)
+    if committed:
+        logger.info(f"Resuming after {committed} committed records from {state_path}")
+    
+    Config.initialize_directories()
+    if fmt == "ndjson":
+        records = read_ndjson(Path(args.source), skip=committed)
+    elif args.source == "-":
+        records = read_tar(sys.stdin.buffer, skip=committed)
+    else:
+        records = read_tar(open(args.source, "rb"), skip=committed)
+    
+    registry = IndexRegistry()
+    try:
+        stats = bulk_ingest(
+            records, registry, state_path,
+            committed=committed,
+            batch_size=args.batch_size,
+            commit_every=args.commit_every
+        )
+    except KeyboardInterrupt:
+        logger.warning("Interrupted; run again with the same --state to resume after the last commit")
+        raise SystemExit(130)
+    finally:
+        # Conversions started by the commits run in daemon threads: close
+        # waits for them before checkpointing and releasing the indexes
+        registry.close()
+    
+    elapsed = time.perf_counter() - stats.started
+    logger.info(
+        f"Loaded {stats.added} items ({stats.failed} failed) in {elapsed:.1f}s, "
+        f"{(stats.added + stats.failed) / max(elapsed, 1e-9):.1f} records/s"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -1,36 +1,158 @@
 """
 FAISS vector index management for similarity search.
 """
+import os
+import time
+import contextlib
+import functools
+import threading
 import faiss
 import numpy as np
 from pathlib import Path
-from typing import List, Tuple, Optional
+from typing import Iterator, List, Tuple, Optional
 import pickle
 
+try:
+    import fcntl
+except ImportError:  # Windows: no advisory file locks, a single writer process is assumed
+    fcntl = None
+
+from ai_service.vector_store.index_factory import (
+    create_index, configure_index, index_type_of, supports_removal,
+    is_exact, requires_training, can_train, search_parameters, stored_ids
+)
+from ai_service.vector_store.journal import IndexJournal, OP_ADD, OP_REMOVE, OP_UPDATE
+from ai_service.vector_store.vector_file import VectorFile
 from ai_service.utils.config import Config
 from ai_service.utils.logger import logger
 
 
+# Maps whole indexes in place; older faiss releases only have IO_FLAG_MMAP,
+# which maps the inverted lists of IVF indexes and reads the rest into memory
+_MMAP_FLAG = getattr(faiss, "IO_FLAG_MMAP_IFC", faiss.IO_FLAG_MMAP)
+
+
+def _split_generation(generation: Optional[tuple]) -> Tuple[tuple, int]:
+    """Split a disk generation into the part identifying the checkpoint and the journal size."""
+    if generation is None:
+        return (), 0
+    return generation[:-1], generation[-1]
+
+
+def _synchronized(method):
+    """Run a FAISSIndex method while holding the instance's lock."""
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        with self._lock:
+            return method(self, *args, **kwargs)
+    return wrapper
+
+
 class FAISSIndex:
-    """FAISS index wrapper for vector similarity search."""
+    """
+    FAISS index wrapper for vector similarity search.
     
-    def __init__(self, index_path: Path, dimension: int = Config.EMBEDDING_DIM):
+    Vectors are stored under stable int64 ids in an ``IndexIDMap2``, so an
+    item keeps its id for its whole life. Removing an item only marks its
+    id as deleted (a tombstone) and search skips tombstoned ids; the
+    vectors themselves are dropped in one batched pass when the index is
+    compacted, which happens on save or when tombstones pile up.
+    
+    The engine is chosen by ``Config.INDEX_TYPE``. New collections start
+    as an exact flat index and are converted to the configured type at the
+    first checkpoint after they reach ``Config.INDEX_CONVERT_THRESHOLD``
+    vectors. Conversions and rebuilds run in a background thread: the new
+    index is built from a snapshot without holding the lock, then vectors
+    added or removed meanwhile are carried over and it is swapped in, so
+    searches are not blocked while a graph is built. Compressed (IVF-PQ)
+    indexes keep the exact vectors in a
+    ``VectorFile`` next to the index; their candidates are re-scored
+    against it, so scores stay exact cosine similarities.
+    
+    With ``Config.INDEX_MMAP``, a saved index is memory-mapped read-only
+    instead of copied into the heap, so startup does not read the file and
+    several processes share its pages through the OS page cache. Vectors
+    added afterwards go to a small in-memory flat ``delta`` index that is
+    searched alongside; both are folded into a new file at checkpoint.
+    
+    With ``Config.INDEX_DURABILITY == "journal"``, a saved mutation is only
+    appended to a small journal next to the index. The full index is
+    checkpointed once the journal passes a size or age threshold (and at
+    shutdown), and the journal is replayed on top of the last checkpoint
+    on load.
+    
+    Public methods are serialized by a per-instance lock: requests run in
+    several worker threads, and a FAISS index must not be searched while
+    it is being modified.
+    
+    Several processes (e.g. uvicorn workers) may write the same index.
+    Mutations and checkpoints take an exclusive lock on a ``.lock`` file
+    next to the index, and first apply whatever other processes wrote
+    since this copy was loaded: journal records appended since are
+    replayed, a newer checkpoint is loaded in full. Vector ids are
+    therefore allocated after every other writer's, and a checkpoint
+    contains their items. Mutations made with ``save=False`` keep the
+    lock until the next checkpoint, so other processes' writes wait for
+    them instead of being overwritten.
+    """
+    
+    def __init__(
+        self,
+        index_path: Path,
+        dimension: int = Config.EMBEDDING_DIM,
+        index_type: Optional[str] = None
+    ):
         """
         Initialize FAISS index.
         
         Args:
             index_path: Path to save/load index
             dimension: Embedding dimension
+            index_type: Index type to create and convert to, unless the saved
+                index stores one (default Config.INDEX_TYPE)
         """
         self.index_path = index_path
         self.dimension = dimension
+        self.target_type = index_type  # Saved with the mappings; None follows Config.INDEX_TYPE
+        self._lock = threading.RLock()
         self.index: Optional[faiss.Index] = None
-        self.id_to_index: dict = {}  # Map item_id to FAISS index position
-        self.index_to_id: dict = {}  # Map FAISS index position to item_id
-        self._initialize_index()
+        self.delta: Optional[faiss.Index] = None  # In-memory additions while self.index is mapped
+        self._delta_start: int = 0  # First vector id stored in the delta
+        self.id_to_index: dict = {}  # Map item_id to FAISS vector id
+        self.index_to_id: dict = {}  # Map FAISS vector id to item_id
+        self.generation: Optional[tuple] = None  # On-disk generation last seen
+        self._next_id: int = 0  # Next unused vector id
+        self._tombstones: set = set()  # Vector ids removed but not yet compacted
+        self._search_params: Optional[faiss.SearchParameters] = None
+        self._selectors: tuple = ()  # Keeps search selectors alive; FAISS does not own them
+        self.journal = IndexJournal(
+            index_path.with_suffix('.journal'),
+            dimension,
+            fsync=Config.JOURNAL_FSYNC
+        )
+        self.raw_vectors = VectorFile(index_path.with_suffix('.vectors'), dimension)
+        self._last_checkpoint = time.monotonic()
+        self._rebuild_lock = threading.Lock()  # One conversion or rebuild at a time
+        self._rebuild_thread: Optional[threading.Thread] = None
+        self._rebuild_deleted: Optional[set] = None  # Vector ids deleted while a rebuild builds
+        self._epoch = 0  # Bumped on every (re)load; a rebuild of an older epoch is dropped
+        self._lock_path = index_path.with_suffix('.lock')
+        self._lock_file = None  # Open while this process holds the cross-process write lock
+        self._write_depth = 0  # Nesting of _writing blocks
+        self._unsaved = False  # Mutations made with save=False and not yet checkpointed
+        self._lock_disk()
+        try:
+            self._initialize_index()
+        finally:
+            self._unlock_disk()
     
     def _initialize_index(self) -> None:
         """Initialize or load FAISS index."""
+        # Record the generation before reading so a concurrent write
+        # shows up as stale on the next check rather than being missed
+        generation = self.disk_generation()
+        self._epoch += 1
+        
         if self.index_path.exists():
             try:
                 self._load()
@@ -40,16 +162,91 @@ class FAISSIndex:
                 self._create_new_index()
         else:
             self._create_new_index()
+        
+        self._replay_journal()
+        self.generation = generation
+    
+    def disk_generation(self) -> Optional[tuple]:
+        """
+        Get the generation of the index currently on disk.
+        
+        Every save replaces the index file and every journaled mutation
+        grows the journal, so the generation changes whenever any process
+        writes the index. Comparing it with ``self.generation`` tells
+        whether the in-memory copy is stale, and whether only the journal
+        has grown since.
+        
+        Returns:
+            (inode, mtime_ns, size) of the index file plus the journal size,
+            or None if neither exists
+        """
+        journal_size = self.journal.size_bytes()
+        try:
+            stat = self.index_path.stat()
+        except FileNotFoundError:
+            return (journal_size,) if journal_size else None
+        return (stat.st_ino, stat.st_mtime_ns, stat.st_size, journal_size)
+    
+    @_synchronized
+    def is_stale(self) -> bool:
+        """
+        Check whether the index on disk is newer than the loaded one.
+        
+        Returns:
+            True if another writer has changed the index since it was loaded
+        """
+        return self.disk_generation() != self.generation
+    
+    @_synchronized
+    def reload(self) -> None:
+        """Reload index and mappings from disk, discarding unsaved changes."""
+        self._lock_disk()
+        try:
+            self._unsaved = False
+            self._initialize_index()
+        finally:
+            self._unlock_disk()
+    
+    @_synchronized
+    def refresh(self) -> bool:
+        """
+        Apply writes made by other processes since the index was loaded.
+        
+        Journal records appended since are replayed onto the loaded copy;
+        a newer checkpoint is loaded in full. If another process holds the
+        write lock, nothing is applied and the next call tries again, so
+        readers never wait for a writer.
+        
+        Returns:
+            True if writes of other processes were applied
+        """
+        if self.disk_generation() == self.generation:
+            return False
+        if not self._lock_disk(blocking=False):
+            return False
+        try:
+            self._catch_up()
+        finally:
+            self._unlock_disk()
+        return True
     
     def _create_new_index(self) -> None:
         """Create a new FAISS index."""
-        # Use IndexFlatIP (Inner Product) for cosine similarity with normalized vectors
-        # Since embeddings are L2-normalized, inner product = cosine similarity
-        self.index = faiss.IndexFlatIP(self.dimension)
+        # Inner-product indexes: embeddings are L2-normalized, so inner product = cosine similarity.
+        # Small collections start flat (exact) and are converted once they pass the threshold;
+        # trained types always start flat since there is nothing to train on yet.
+        index_type = self.target_type or Config.INDEX_TYPE
+        if Config.INDEX_CONVERT_THRESHOLD > 0 or requires_training(index_type):
+            index_type = "flat"
+        self.index = create_index(index_type, self.dimension)
+        self.delta = None
         self.id_to_index = {}
         self.index_to_id = {}
+        self._next_id = 0
+        self._clear_tombstones()
         logger.info(f"Created new FAISS index with dimension {self.dimension}")
     
+    @_synchronized
     def add(
         self,
         embedding: np.ndarray,
@@ -59,47 +256,89 @@ class FAISSIndex:
         """
         Add a vector to the index.
         
+        Adding an item that is already indexed replaces its vector.
+        
         Args:
             embedding: Embedding vector (1D array)
             item_id: Unique item identifier
             save: Whether to save index after adding
             
         Returns:
-            Index position of added vector
+            Vector id of added vector
         """
-        # Ensure embedding is 2D
-        if embedding.ndim == 1:
-            embedding = embedding.reshape(1, -1)
+        embedding = self._prepare(embedding)
         
-        # Ensure embedding is float32
-        embedding = embedding.astype(np.float32)
+        with self._writing():
+            # Add to index under a fresh id
+            vector_id = self._next_id
+            self._insert(embedding, item_id, vector_id)
+            
+            if save:
+                self._persist(OP_ADD, vector_id, item_id, embedding)
+            else:
+                self._unsaved = True
+                self._maybe_compact()
         
-        # Check dimension
-        if embedding.shape[1] != self.dimension:
-            raise ValueError(
-                f"Embedding dimension {embedding.shape[1]} "
-                f"does not match index dimension {self.dimension}"
-            )
+        logger.debug(f"Added vector for item {item_id} with id {vector_id}")
+        return vector_id
+    
+    @_synchronized
+    def add_batch(
+        self,
+        embeddings: np.ndarray,
+        item_ids: List[str],
+        save: bool = True
+    ) -> List[int]:
+        """
+        Add many vectors to the index with one FAISS call.
         
-        # Add to index
-        position = self.index.ntotal
-        self.index.add(embedding)
+        Adding an item that is already indexed replaces its vector. The
+        batch is made durable once: one save, or one journal write.
         
-        # Update mappings
-        self.id_to_index[item_id] = position
-        self.index_to_id[position] = item_id
+        Args:
+            embeddings: Embedding matrix (N x D)
+            item_ids: Unique item identifier of each row
+            save: Whether to save index after adding
+            
+        Returns:
+            Vector ids of added vectors, in row order
+            
+        Raises:
+            ValueError: If the number of ids does not match the number of
+                rows, or an item id appears more than once
+        """
+        embeddings = self._prepare(embeddings)
+        if len(item_ids) != len(embeddings):
+            raise ValueError(f"Got {len(item_ids)} item ids for {len(embeddings)} embeddings")
+        if len(set(item_ids)) != len(item_ids):
+            raise ValueError("Item ids in a batch must be unique")
+        if not len(item_ids):
+            return []
         
-        if save:
-            self._save()
+        with self._writing():
+            # Add to index under fresh ids
+            vector_ids = list(range(self._next_id, self._next_id + len(item_ids)))
+            self._insert_many(embeddings, item_ids, vector_ids)
+            
+            if save:
+                self._persist_many([
+                    (OP_ADD, vector_id, item_id, embedding)
+                    for vector_id, item_id, embedding in zip(vector_ids, item_ids, embeddings)
+                ])
+            else:
+                self._unsaved = True
+                self._maybe_compact()
         
-        logger.debug(f"Added vector for item {item_id} at position {position}")
-        return position
+        logger.debug(f"Added {len(item_ids)} vectors with ids {vector_ids[0]}-{vector_ids[-1]}")
+        return vector_ids
     
+    @_synchronized
     def remove(self, item_id: str, save: bool = True) -> bool:
         """
         Remove a vector from the index.
         
-        Note: FAISS doesn't support direct removal. We rebuild the index.
+        The vector id is tombstoned, which costs the same regardless of
+        index size; the vector is dropped from FAISS at the next compaction.
         
         Args:
             item_id: Item identifier
@@ -108,39 +347,22 @@ class FAISSIndex:
         Returns:
             True if removed, False if not found
         """
-        if item_id not in self.id_to_index:
-            return False
-        
-        # Get all vectors except the one to remove
-        all_vectors = self.index.reconstruct_n(0, self.index.ntotal)
-        positions_to_keep = [
-            pos for pos, iid in self.index_to_id.items()
-            if iid != item_id
-        ]
-        
-        if not positions_to_keep:
-            # Empty index
-            self._create_new_index()
-        else:
-            # Rebuild index without removed vector
-            # Store mappings before clearing
-            id_to_vector = {}
-            for pos in positions_to_keep:
-                item_id_to_keep = self.index_to_id[pos]
-                vector = all_vectors[pos]
-                id_to_vector[item_id_to_keep] = vector
+        with self._writing():
+            if item_id not in self.id_to_index:
+                return False
             
-            # Recreate index and re-add vectors
-            self._create_new_index()
-            for item_id_to_keep, vector in id_to_vector.items():
-                self.add(vector, item_id_to_keep, save=False)
-        
-        if save:
-            self._save()
+            vector_id = self._delete(item_id)
+            
+            if save:
+                self._persist(OP_REMOVE, vector_id, item_id)
+            else:
+                self._unsaved = True
+                self._maybe_compact()
         
         logger.debug(f"Removed vector for item {item_id}")
         return True
     
+    @_synchronized
     def update(
         self,
         embedding: np.ndarray,
@@ -158,16 +380,25 @@ class FAISSIndex:
         Returns:
             True if updated, False if not found
         """
-        if item_id not in self.id_to_index:
-            return False
-        
-        # Remove and re-add
-        self.remove(item_id, save=False)
-        self.add(embedding, item_id, save=save)
+        with self._writing():
+            if item_id not in self.id_to_index:
+                return False
+            
+            # Tombstone the old vector and add the new one under a fresh id
+            embedding = self._prepare(embedding)
+            vector_id = self._next_id
+            self._insert(embedding, item_id, vector_id)
+            
+            if save:
+                self._persist(OP_UPDATE, vector_id, item_id, embedding)
+            else:
+                self._unsaved = True
+                self._maybe_compact()
         
         logger.debug(f"Updated vector for item {item_id}")
         return True
     
+    @_synchronized
     def search(
         self,
         query_embedding: np.ndarray,
@@ -183,29 +414,62 @@ class FAISSIndex:
         Returns:
             List of (item_id, similarity_score) tuples, sorted by score (descending)
         """
-        if self.index.ntotal == 0:
-            return []
+        return self.search_batch(query_embedding.reshape(1, -1), top_k=top_k)[0]
+    
+    @_synchronized
+    def search_batch(
+        self,
+        query_embeddings: np.ndarray,
+        top_k: int = Config.DEFAULT_TOP_K
+    ) -> List[List[Tuple[str, float]]]:
+        """
+        Search for similar vectors of several queries in one FAISS call.
         
-        # Ensure query is 2D and float32
-        if query_embedding.ndim == 1:
-            query_embedding = query_embedding.reshape(1, -1)
-        query_embedding = query_embedding.astype(np.float32)
+        Args:
+            query_embeddings: Query embedding matrix (N x D)
+            top_k: Number of results to return per query
+            
+        Returns:
+            One list of (item_id, similarity_score) tuples per query, in
+            query order, each sorted by score (descending)
+        """
+        # Ensure queries are 2D and float32
+        queries = np.atleast_2d(query_embeddings).astype(np.float32)
+        live = self.count()
+        if live == 0 or not len(queries):
+            return [[] for _ in range(len(queries))]
         
-        # Search
-        scores, indices = self.index.search(query_embedding, min(top_k, self.index.ntotal))
+        # Search, skipping tombstoned ids
+        exact = is_exact(self.index)
+        k = top_k if exact else top_k * Config.RERANK_FACTOR
+        scores, ids = self.index.search(
+            queries,
+            min(k, live),
+            params=self._search_parameters()
+        )
+        if exact:
+            rows = list(zip(scores, ids))
+        else:
+            rows = self._rescore(queries, ids, top_k)
+        if self.delta is not None and self.delta.ntotal:
+            rows = self._merge_delta(queries, rows, top_k)
         
         # Convert to results
         results = []
-        for score, idx in zip(scores[0], indices[0]):
-            if idx == -1:  # FAISS returns -1 for empty slots
-                continue
-            item_id = self.index_to_id.get(idx)
-            if item_id:
-                # Convert inner product to similarity (already cosine similarity for normalized vectors)
-                results.append((item_id, float(score)))
+        for row_scores, row_ids in rows:
+            matches = []
+            for score, vector_id in zip(row_scores, row_ids):
+                if vector_id == -1:  # FAISS returns -1 for empty slots
+                    continue
+                item_id = self.index_to_id.get(int(vector_id))
+                if item_id:
+                    # Convert inner product to similarity (already cosine similarity for normalized vectors)
+                    matches.append((item_id, float(score)))
+            results.append(matches)
         
         return results
     
+    @_synchronized
     def get_vector(self, item_id: str) -> Optional[np.ndarray]:
         """
         Get vector for an item.
@@ -219,10 +483,15 @@ class FAISSIndex:
         if item_id not in self.id_to_index:
             return None
         
-        position = self.id_to_index[item_id]
-        vector = self.index.reconstruct(position)
+        vector_id = self.id_to_index[item_id]
+        if self.delta is not None and vector_id >= self._delta_start:
+            return self.delta.reconstruct(vector_id)
+        if not is_exact(self.index):
+            return self.raw_vectors.read([vector_id])[0]
+        vector = self.index.reconstruct(vector_id)
         return vector
     
+    @_synchronized
     def count(self) -> int:
         """
         Get total number of vectors in index.
@@ -230,34 +499,548 @@ class FAISSIndex:
         Returns:
             Number of vectors
         """
-        return self.index.ntotal
+        delta = self.delta.ntotal if self.delta is not None else 0
+        return self.index.ntotal + delta - len(self._tombstones)
+    
+    @_synchronized
+    def checkpoint(self) -> None:
+        """Write the full index to disk and empty the journal."""
+        with self._writing():
+            self._save()
+    
+    def close(self) -> None:
+        """Finish a running rebuild, checkpoint pending mutations and release the journal and lock."""
+        self.wait_for_rebuild()
+        with self._lock:
+            if self.journal.size_bytes() or self._unsaved:
+                self.checkpoint()
+        # The checkpoint may have started a conversion
+        self.wait_for_rebuild()
+        with self._lock:
+            self.journal.close()
+            self.raw_vectors.close()
+    
+    def wait_for_rebuild(self, timeout: Optional[float] = None) -> None:
+        """
+        Wait for a background conversion or rebuild to finish.
+        
+        Must not be called while holding the index lock.
+        
+        Args:
+            timeout: Maximum wait in seconds (None waits indefinitely)
+        """
+        thread = self._rebuild_thread
+        if thread is not None:
+            thread.join(timeout)
+    
+    @_synchronized
+    def index_type(self) -> str:
+        """
+        Get the type of the underlying FAISS index.
+        
+        Returns:
+            Index type name (see Config.INDEX_TYPE)
+        """
+        return index_type_of(self.index)
+    
+    def convert(self, index_type: str) -> None:
+        """
+        Rebuild the index as another index type, keeping all ids.
+        
+        Searches and mutations continue while the new index is built; the
+        lock is only held to snapshot the vectors and to swap the result in.
+        Must not be called while holding the index lock.
+        
+        Args:
+            index_type: Target index type (see Config.INDEX_TYPE)
+        """
+        started = time.perf_counter()
+        self._rebuild(index_type)
+        logger.info(
+            f"Converted {self.index_path} to {index_type} index with {self.count()} vectors "
+            f"in {time.perf_counter() - started:.1f}s"
+        )
+    
+    @_synchronized
+    def compact(self) -> None:
+        """Drop tombstoned vectors from the FAISS index in one pass (graph indexes are rebuilt in the background)."""
+        if not self._tombstones:
+            return
+        
+        if not supports_removal(self.index):
+            # Graph indexes cannot drop nodes; rebuild from the live vectors
+            # in the background, tombstones stay in effect until the swap
+            self._start_rebuild(self.index_type())
+            return
+        
+        self._unmap()
+        
+        removed = self.index.remove_ids(
+            np.fromiter(self._tombstones, dtype=np.int64, count=len(self._tombstones))
+        )
+        logger.debug(f"Compacted {removed} removed vectors from index")
+        self._clear_tombstones()
+    
+    def _maybe_convert(self) -> None:
+        """Start converting to the configured index type once the collection is large enough."""
+        target = self.target_type or Config.INDEX_TYPE
+        if self.index_type() == target:
+            return
+        count = self.count()
+        if target == "flat" or (count >= Config.INDEX_CONVERT_THRESHOLD and can_train(target, count)):
+            self._start_rebuild(target)
+    
+    def _start_rebuild(self, index_type: str) -> None:
+        """Convert or rebuild the index in a background thread, then checkpoint it."""
+        if self._rebuild_thread is not None and self._rebuild_thread.is_alive():
+            return
+        
+        def run() -> None:
+            try:
+                self.convert(index_type)
+                self.checkpoint()
+            except Exception as e:
+                logger.error(f"Background rebuild of {self.index_path} failed: {str(e)}")
+        
+        self._rebuild_thread = threading.Thread(
+            target=run, name=f"findback-rebuild-{self.index_path.stem}", daemon=True
+        )
+        self._rebuild_thread.start()
+    
+    def _rebuild(self, index_type: str) -> None:
+        """Recreate the index as `index_type` from its live vectors, building it outside the lock."""
+        with self._rebuild_lock:
+            with self._lock:
+                epoch = self._epoch
+                snapshot_next = self._next_id
+                was_exact = is_exact(self.index)
+                ids, vectors = self._live_vectors()
+                self._rebuild_deleted = set()
+            
+            try:
+                index = create_index(index_type, self.dimension, expected_size=len(ids))
+                if not index.is_trained:
+                    if not can_train(index_type, len(ids)):
+                        raise ValueError(f"Not enough vectors ({len(ids)}) to train a {index_type} index")
+                    index.train(self._training_sample(vectors))
+                
+                # Keep exact vectors on disk for product-quantized indexes (already
+                # there if the current index is compressed too)
+                if not is_exact(index) and was_exact:
+                    self.raw_vectors.write(ids, vectors)
+                if len(ids):
+                    index.add_with_ids(vectors, ids)
+                
+                with self._lock:
+                    if self._epoch != epoch:
+                        logger.warning(f"Dropped rebuild of {self.index_path}: it was reloaded meanwhile")
+                        return
+                    self._swap_in(index, snapshot_next)
+            finally:
+                with self._lock:
+                    self._rebuild_deleted = None
+    
+    def _swap_in(self, index: faiss.Index, snapshot_next: int) -> None:
+        """Carry mutations made since the snapshot over to a rebuilt index and make it current."""
+        # Vector ids only grow, so everything added since the snapshot is at or past it
+        added = np.array(
+            sorted(vector_id for vector_id in self.index_to_id if vector_id >= snapshot_next),
+            dtype=np.int64
+        )
+        if len(added):
+            added_vectors = self._vectors(added)
+            if not is_exact(index) and is_exact(self.index):
+                self.raw_vectors.write(added, added_vectors)
+            index.add_with_ids(added_vectors, added)
+        
+        # Vectors in the snapshot that were removed while it was built
+        dead = {vector_id for vector_id in self._rebuild_deleted if vector_id < snapshot_next}
+        if dead and supports_removal(index):
+            index.remove_ids(np.fromiter(dead, dtype=np.int64, count=len(dead)))
+            dead = set()
+        
+        if is_exact(index) and not is_exact(self.index):
+            self.raw_vectors.clear()
+        self.index = index
+        self.delta = None
+        self._tombstones = dead
+        self._search_params = None
+    
+    def _training_sample(self, vectors: np.ndarray) -> np.ndarray:
+        """Pick at most Config.IVF_TRAIN_SAMPLE random vectors for training."""
+        if len(vectors) <= Config.IVF_TRAIN_SAMPLE:
+            return vectors
+        rng = np.random.default_rng(0)
+        return vectors[rng.choice(len(vectors), Config.IVF_TRAIN_SAMPLE, replace=False)]
+    
+    def _live_vectors(self) -> Tuple[np.ndarray, np.ndarray]:
+        """Get ids and exact vectors of all non-tombstoned entries."""
+        ids = np.fromiter(sorted(self.index_to_id), dtype=np.int64, count=len(self.index_to_id))
+        return ids, self._vectors(ids)
+    
+    def _vectors(self, ids: np.ndarray) -> np.ndarray:
+        """Get the exact vectors of sorted stored ids, from the index or the delta."""
+        if not len(ids):
+            return np.empty((0, self.dimension), dtype=np.float32)
+        if not is_exact(self.index):
+            return self.raw_vectors.read(ids)
+        if self.delta is None:
+            return self.index.reconstruct_batch(ids)
+        split = int(np.searchsorted(ids, self._delta_start))
+        parts = [part for part in (ids[:split], ids[split:]) if len(part)]
+        return np.concatenate([
+            (self.index if part[0] < self._delta_start else self.delta).reconstruct_batch(part)
+            for part in parts
+        ])
+    
+    def _rescore(
+        self,
+        queries: np.ndarray,
+        ids: np.ndarray,
+        top_k: int
+    ) -> List[Tuple[np.ndarray, np.ndarray]]:
+        """Re-rank approximate candidates by exact inner product with their stored vectors."""
+        # Read each candidate once, however many queries it turned up for
+        unique = np.unique(ids[ids != -1])
+        vectors = self.raw_vectors.read(unique) if len(unique) else None
+        rows = []
+        for query, row_ids in zip(queries, ids):
+            candidates = row_ids[row_ids != -1]
+            if not len(candidates):
+                rows.append((np.empty(0, dtype=np.float32), np.empty(0, dtype=np.int64)))
+                continue
+            scores = vectors[np.searchsorted(unique, candidates)] @ query
+            order = np.argsort(-scores)[:top_k]
+            rows.append((scores[order], candidates[order]))
+        return rows
+    
+    def _merge_delta(
+        self,
+        queries: np.ndarray,
+        rows: List[Tuple[np.ndarray, np.ndarray]],
+        top_k: int
+    ) -> List[Tuple[np.ndarray, np.ndarray]]:
+        """Merge results from the mapped index with those from the in-memory delta."""
+        self._search_parameters()
+        params = faiss.SearchParameters(sel=self._selectors[1]) if self._tombstones else None
+        delta_scores, delta_ids = self.delta.search(
+            queries, min(top_k, self.delta.ntotal), params=params
+        )
+        merged = []
+        for (scores, ids), row_delta_scores, row_delta_ids in zip(rows, delta_scores, delta_ids):
+            all_scores = np.concatenate([scores, row_delta_scores])
+            all_ids = np.concatenate([ids, row_delta_ids])
+            valid = all_ids != -1
+            all_scores, all_ids = all_scores[valid], all_ids[valid]
+            order = np.argsort(-all_scores, kind='stable')[:top_k]
+            merged.append((all_scores[order], all_ids[order]))
+        return merged
+    
+    def _read_index(self) -> faiss.Index:
+        """Read the saved index, memory-mapped read-only if Config.INDEX_MMAP is set."""
+        if Config.INDEX_MMAP:
+            return faiss.read_index(
+                str(self.index_path), _MMAP_FLAG | faiss.IO_FLAG_READ_ONLY
+            )
+        return faiss.read_index(str(self.index_path))
+    
+    def _map(self) -> None:
+        """Replace the in-memory index with a memory map of the saved file."""
+        self.index = self._read_index()
+        configure_index(self.index)
+        self._start_delta()
+    
+    def _start_delta(self) -> None:
+        """Direct further additions to an empty in-memory delta index."""
+        self.delta = create_index("flat", self.dimension)
+        self._delta_start = self._next_id
+        self._search_params = None
+    
+    def _unmap(self) -> None:
+        """Copy a mapped index into memory and fold the delta into it, making it writable."""
+        if self.delta is None:
+            return
+        
+        index = faiss.deserialize_index(faiss.serialize_index(self.index))
+        configure_index(index)
+        if self.delta.ntotal:
+            index.add_with_ids(
+                self.delta.index.reconstruct_n(0, self.delta.ntotal),
+                faiss.vector_to_array(self.delta.id_map).astype(np.int64)
+            )
+        self.index = index
+        self.delta = None
+        self._search_params = None
+    
+    def _maybe_compact(self) -> None:
+        """Compact once tombstones exceed the configured fraction of the index."""
+        if self.delta is not None:
+            # Copying a mapped index into memory defeats mapping; wait for the checkpoint
+            return
+        if len(self._tombstones) > Config.INDEX_COMPACT_FRACTION * self.index.ntotal:
+            self.compact()
+    
+    def _prepare(self, embedding: np.ndarray) -> np.ndarray:
+        """Reshape an embedding to (1, D) float32 (batches stay (N, D)) and check its dimension."""
+        # Ensure embedding is 2D
+        if embedding.ndim == 1:
+            embedding = embedding.reshape(1, -1)
+        
+        # Ensure embedding is float32
+        embedding = embedding.astype(np.float32)
+        
+        # Check dimension
+        if embedding.shape[1] != self.dimension:
+            raise ValueError(
+                f"Embedding dimension {embedding.shape[1]} "
+                f"does not match index dimension {self.dimension}"
+            )
+        return embedding
+    
+    def _insert(self, embedding: np.ndarray, item_id: str, vector_id: int) -> None:
+        """Add a prepared vector under `vector_id`, replacing the item's previous vector."""
+        self._insert_many(embedding, [item_id], [vector_id])
+    
+    def _insert_many(self, embeddings: np.ndarray, item_ids: List[str], vector_ids: List[int]) -> None:
+        """Add prepared vectors under their ids, replacing the items' previous vectors."""
+        for item_id in item_ids:
+            if item_id in self.id_to_index:
+                self._delete(item_id)
+        
+        if not is_exact(self.index):
+            self.raw_vectors.write(vector_ids, embeddings)
+        target = self.delta if self.delta is not None else self.index
+        target.add_with_ids(embeddings, np.array(vector_ids, dtype=np.int64))
+        for item_id, vector_id in zip(item_ids, vector_ids):
+            self.id_to_index[item_id] = vector_id
+            self.index_to_id[vector_id] = item_id
+        self._next_id = max(self._next_id, max(vector_ids) + 1)
+    
+    def _remap(self, item_id: str, vector_id: int) -> None:
+        """Point an item at a vector already stored in the index."""
+        if item_id in self.id_to_index:
+            self._delete(item_id)
+        self.id_to_index[item_id] = vector_id
+        self.index_to_id[vector_id] = item_id
+        self._next_id = max(self._next_id, vector_id + 1)
+        self._search_params = None
+    
+    def _delete(self, item_id: str) -> int:
+        """Unmap an item and tombstone its vector id."""
+        vector_id = self.id_to_index.pop(item_id)
+        del self.index_to_id[vector_id]
+        self._tombstones.add(vector_id)
+        if self._rebuild_deleted is not None:
+            self._rebuild_deleted.add(vector_id)
+        self._search_params = None
+        return vector_id
+    
+    def _persist(
+        self,
+        op: int,
+        vector_id: int,
+        item_id: str,
+        embedding: Optional[np.ndarray] = None
+    ) -> None:
+        """Make a mutation durable according to the configured durability mode."""
+        self._persist_many([(op, vector_id, item_id, embedding)])
+    
+    def _persist_many(self, records: List[Tuple[int, int, str, Optional[np.ndarray]]]) -> None:
+        """
+        Make several mutations durable at once, as (op, vector id, item id,
+        embedding) tuples. Call inside a _writing block.
+        """
+        if Config.INDEX_DURABILITY != "journal":
+            self._save()
+            return
+        
+        self.journal.append_many(records)
+        self._maybe_compact()
+        
+        if (
+            self.journal.size_bytes() >= Config.JOURNAL_CHECKPOINT_BYTES
+            or time.monotonic() - self._last_checkpoint >= Config.JOURNAL_CHECKPOINT_SECONDS
+        ):
+            self.checkpoint()
+        else:
+            self.generation = self.disk_generation()
+    
+    def _replay_journal(self, offset: int = 0) -> None:
+        """
+        Re-apply journaled mutations on top of the loaded checkpoint.
+        
+        Args:
+            offset: Journal size already applied; only records appended
+                since (by other processes) are replayed
+        """
+        replayed = 0
+        in_index = None
+        inserted = set()
+        for record in self.journal.replay(offset):
+            # Records already contained in the checkpoint (a crash between
+            # checkpoint and journal truncation) are recognized by their id
+            if record.op == OP_REMOVE:
+                if self.id_to_index.get(record.item_id) == record.vector_id:
+                    self._delete(record.item_id)
+            elif self.index_to_id.get(record.vector_id) != record.item_id:
+                if in_index is None and offset == 0:
+                    in_index = set(stored_ids(self.index).tolist())
+                if in_index is not None and record.vector_id in in_index:
+                    # The checkpoint wrote the index but not its mappings
+                    self._remap(record.item_id, record.vector_id)
+                else:
+                    self._insert(record.vector.reshape(1, -1).copy(), record.item_id, record.vector_id)
+                    inserted.add(record.vector_id)
+            replayed += 1
+        
+        if in_index is not None:
+            # Tombstones of vectors the unmapped checkpoint already compacted away
+            self._tombstones = {
+                vector_id for vector_id in self._tombstones
+                if vector_id in in_index or vector_id in inserted
+            }
+            self._search_params = None
+        
+        if replayed:
+            logger.info(f"Replayed {replayed} journaled mutations onto {self.index_path}")
+    
+    def _clear_tombstones(self) -> None:
+        """Forget all tombstones."""
+        self._tombstones = set()
+        self._search_params = None
+    
+    def _search_parameters(self) -> Optional[faiss.SearchParameters]:
+        """Build (and cache) search parameters that exclude tombstoned ids."""
+        if not self._tombstones:
+            return None
+        if self._search_params is None:
+            dead = np.fromiter(self._tombstones, dtype=np.int64, count=len(self._tombstones))
+            batch = faiss.IDSelectorBatch(dead)
+            selector = faiss.IDSelectorNot(batch)
+            self._selectors = (batch, selector)
+            self._search_params = search_parameters(self.index, selector)
+        return self._search_params
     
     def _save(self) -> None:
         """Save index and mappings to disk."""
         try:
             self.index_path.parent.mkdir(parents=True, exist_ok=True)
+            self._unmap()
             
-            # Save FAISS index
-            faiss.write_index(self.index, str(self.index_path))
+            # Switch engines once the collection is large enough; the new
+            # index is built in the background and checkpointed when ready
+            self._maybe_convert()
+            
+            # Drop tombstoned vectors where that is cheap; otherwise the
+            # tombstones are saved with the mappings until the next rebuild
+            if supports_removal(self.index):
+                self.compact()
+            
+            # Write both files next to their targets and swap them in with
+            # os.replace, so readers in other processes never see a partial
+            # file. The index goes first: if the mappings are not written,
+            # journal replay maps the vectors found in the index again.
+            index_tmp = self.index_path.with_name(self.index_path.name + '.tmp')
+            faiss.write_index(self.index, str(index_tmp))
+            os.replace(index_tmp, self.index_path)
             
-            # Save mappings
             mappings_path = self.index_path.with_suffix('.mappings.pkl')
-            with open(mappings_path, 'wb') as f:
+            mappings_tmp = mappings_path.with_name(mappings_path.name + '.tmp')
+            with open(mappings_tmp, 'wb') as f:
                 pickle.dump({
                     'id_to_index': self.id_to_index,
-                    'index_to_id': self.index_to_id
+                    'index_to_id': self.index_to_id,
+                    'next_id': self._next_id,
+                    'tombstones': self._tombstones,
+                    'target_type': self.target_type
                 }, f)
+            os.replace(mappings_tmp, mappings_path)
+            
+            # Everything journaled so far is now in the checkpoint
+            if not is_exact(self.index):
+                self.raw_vectors.flush()
+            self.journal.truncate()
+            self._last_checkpoint = time.monotonic()
+            self._unsaved = False
+            
+            if Config.INDEX_MMAP:
+                self._map()
             
+            self.generation = self.disk_generation()
             logger.debug(f"Saved FAISS index to {self.index_path}")
         except Exception as e:
             logger.error(f"Failed to save index: {str(e)}")
             raise
     
+    def _lock_disk(self, blocking: bool = True) -> bool:
+        """
+        Take the cross-process write lock of the index files.
+        
+        Args:
+            blocking: Whether to wait for another process to release it
+            
+        Returns:
+            True if this process holds the lock, False if another one does
+            and `blocking` is False
+        """
+        if self._lock_file is not None:
+            return True
+        self._lock_path.parent.mkdir(parents=True, exist_ok=True)
+        lock_file = open(self._lock_path, 'ab')
+        if fcntl is not None:
+            try:
+                fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX | (0 if blocking else fcntl.LOCK_NB))
+            except BlockingIOError:
+                lock_file.close()
+                return False
+        self._lock_file = lock_file
+        return True
+    
+    def _unlock_disk(self) -> None:
+        """Release the cross-process write lock, unless unsaved mutations still need it."""
+        if self._lock_file is None or self._unsaved:
+            return
+        self._lock_file.close()  # Closing the file releases the lock
+        self._lock_file = None
+    
+    @contextlib.contextmanager
+    def _writing(self) -> Iterator[None]:
+        """Hold the cross-process write lock, with other processes' writes applied first."""
+        outermost = self._write_depth == 0
+        if outermost:
+            self._lock_disk()
+        self._write_depth += 1
+        try:
+            if outermost:
+                self._catch_up()
+            yield
+        finally:
+            self._write_depth -= 1
+            if outermost:
+                self._unlock_disk()
+    
+    def _catch_up(self) -> None:
+        """Apply writes other processes made since the last load. Call with the write lock held."""
+        generation = self.disk_generation()
+        if generation == self.generation:
+            return
+        checkpoint, journal_size = _split_generation(generation)
+        seen_checkpoint, seen_journal_size = _split_generation(self.generation)
+        if checkpoint == seen_checkpoint and journal_size >= seen_journal_size:
+            # Only the journal grew: replay the records appended since
+            self._replay_journal(seen_journal_size)
+            self.generation = self.disk_generation()
+        else:
+            logger.info(f"Index {self.index_path} was checkpointed by another process, reloading")
+            self._initialize_index()
+    
     def _load(self) -> None:
         """Load index and mappings from disk."""
         try:
             # Load FAISS index
-            self.index = faiss.read_index(str(self.index_path))
+            self.index = self._read_index()
+            self.delta = None
+            self._clear_tombstones()
             
             # Load mappings
             mappings_path = self.index_path.with_suffix('.mappings.pkl')
@@ -266,12 +1049,49 @@ class FAISSIndex:
                     mappings = pickle.load(f)
                     self.id_to_index = mappings.get('id_to_index', {})
                     self.index_to_id = mappings.get('index_to_id', {})
+                    self._next_id = mappings.get('next_id', self.index.ntotal)
+                    self._tombstones = set(mappings.get('tombstones', ()))
+                    self.target_type = mappings.get('target_type', self.target_type)
             else:
                 # Rebuild mappings from index (if possible)
                 self.id_to_index = {}
                 self.index_to_id = {}
+                self._next_id = self.index.ntotal
                 logger.warning("Mappings file not found, mappings will be empty")
             
+            if isinstance(self.index, faiss.IndexFlat):
+                self._migrate_positional_index()
+            configure_index(self.index)
+            
+            if Config.INDEX_MMAP and self.delta is None:
+                self._start_delta()
+            
         except Exception as e:
             logger.error(f"Failed to load index: {str(e)}")
             raise
+    
+    def _migrate_positional_index(self) -> None:
+        """
+        Convert a legacy index addressed by position into an ID-mapped one.
+        
+        Older versions stored a bare ``IndexFlatIP`` and used the vector
+        position as the id in the mappings. Positions become the new vector
+        ids, so the existing mappings stay valid; vectors no longer referenced
+        by any item (left behind by re-adding an item) are dropped.
+        """
+        legacy = self.index
+        vectors = legacy.reconstruct_n(0, legacy.ntotal) if legacy.ntotal else None
+        
+        keep = sorted(
+            position for position, item_id in self.index_to_id.items()
+            if self.id_to_index.get(item_id) == position
+        )
+        self.index = create_index("flat", self.dimension)
+        if keep:
+            positions = np.array(keep, dtype=np.int64)
+            self.index.add_with_ids(vectors[positions], positions)
+        self.index_to_id = {position: self.index_to_id[position] for position in keep}
+        self._next_id = legacy.ntotal
+        
+        self._save()
+        logger.info(f"Migrated legacy index {self.index_path} to ID-mapped layout ({len(keep)} vectors)")
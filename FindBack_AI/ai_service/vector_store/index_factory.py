@@ -0,0 +1,249 @@
+"""
+Construction and inspection of the FAISS index types behind FAISSIndex.
+"""
+import math
+import faiss
+import numpy as np
+
+from ai_service.utils.config import Config
+
+
+# Supported values of Config.INDEX_TYPE
+INDEX_TYPES = ("flat", "hnsw", "ivfpq", "fp16", "sq8")
+
+# Scalar quantizer of each scalar-quantized index type
+_SCALAR_QUANTIZERS = {
+    "fp16": faiss.ScalarQuantizer.QT_fp16,
+    "sq8": faiss.ScalarQuantizer.QT_8bit,
+}
+
+# Training points per k-means centroid below which FAISS warns of poor clusters
+_MIN_POINTS_PER_CENTROID = 39
+
+
+def create_index(index_type: str, dimension: int, expected_size: int = 0) -> faiss.Index:
+    """
+    Create an empty index of the given type that accepts explicit int64 ids.
+    
+    All types use the inner-product metric, which is cosine similarity for
+    the L2-normalized embeddings stored here. Flat and HNSW indexes are
+    wrapped in an ``IndexIDMap2``; IVF indexes store ids natively.
+    
+    Args:
+        index_type: "flat" (exact brute-force scan), "hnsw" (graph-based ANN),
+            "ivfpq" (inverted lists of product-quantized codes), or "fp16" /
+            "sq8" (brute-force scan over half-precision / 8-bit scalar codes)
+        dimension: Embedding dimension
+        expected_size: Number of vectors the index will hold, used to size
+            the IVF coarse quantizer
+            
+    Returns:
+        Empty index; IVF and 8-bit indexes must be trained before vectors
+        are added
+        
+    Raises:
+        ValueError: If the index type is unknown
+    """
+    if index_type == "flat":
+        base = faiss.IndexFlatIP(dimension)
+    elif index_type == "hnsw":
+        base = faiss.IndexHNSWFlat(dimension, Config.HNSW_M, faiss.METRIC_INNER_PRODUCT)
+        base.hnsw.efConstruction = Config.HNSW_EF_CONSTRUCTION
+    elif index_type in _SCALAR_QUANTIZERS:
+        base = faiss.IndexScalarQuantizer(
+            dimension, _SCALAR_QUANTIZERS[index_type], faiss.METRIC_INNER_PRODUCT
+        )
+    elif index_type == "ivfpq":
+        index = faiss.index_factory(
+            dimension,
+            f"IVF{ivf_nlist(expected_size)},PQ{Config.PQ_M}x{Config.PQ_NBITS}",
+            faiss.METRIC_INNER_PRODUCT
+        )
+        configure_index(index)
+        return index
+    else:
+        raise ValueError(f"Unknown index type: {index_type}. Expected one of {INDEX_TYPES}")
+    
+    index = faiss.IndexIDMap2(base)
+    configure_index(index)
+    return index
+
+
+def configure_index(index: faiss.Index) -> None:
+    """
+    Apply search-time settings from Config to a created or loaded index.
+    
+    Args:
+        index: Index as returned by create_index
+    """
+    base = _base_index(index)
+    if isinstance(base, faiss.IndexHNSW):
+        base.hnsw.efSearch = Config.HNSW_EF_SEARCH
+    elif isinstance(base, faiss.IndexIVF):
+        base.nprobe = Config.IVF_NPROBE
+
+
+def index_type_of(index: faiss.Index) -> str:
+    """
+    Get the type name of an index.
+    
+    Args:
+        index: Index as returned by create_index
+        
+    Returns:
+        One of INDEX_TYPES
+        
+    Raises:
+        ValueError: If the index is not a supported type
+    """
+    base = _base_index(index)
+    if isinstance(base, faiss.IndexHNSW):
+        return "hnsw"
+    if isinstance(base, faiss.IndexFlat):
+        return "flat"
+    if isinstance(base, faiss.IndexIVFPQ):
+        return "ivfpq"
+    if isinstance(base, faiss.IndexScalarQuantizer):
+        for index_type, qtype in _SCALAR_QUANTIZERS.items():
+            if base.sq.qtype == qtype:
+                return index_type
+    raise ValueError(f"Unsupported index class: {type(base).__name__}")
+
+
+def supports_removal(index: faiss.Index) -> bool:
+    """
+    Check whether vectors can be removed from an index in place.
+    
+    HNSW graphs cannot drop nodes, so removed vectors stay tombstoned until
+    the index is rebuilt.
+    
+    Args:
+        index: Index as returned by create_index
+        
+    Returns:
+        True if ``remove_ids`` is supported
+    """
+    return index_type_of(index) != "hnsw"
+
+
+def is_exact(index: faiss.Index) -> bool:
+    """
+    Check whether an index stores the original vectors.
+    
+    Product-quantized indexes return approximate scores and
+    reconstructions, so their exact vectors are kept separately for
+    re-scoring. Half-precision and 8-bit scalar codes are within about
+    1e-3 of the original components and are used as they are.
+    
+    Args:
+        index: Index as returned by create_index
+        
+    Returns:
+        True if scores and reconstructed vectors are exact
+    """
+    return index_type_of(index) != "ivfpq"
+
+
+def requires_training(index_type: str) -> bool:
+    """
+    Check whether an index type must be trained on sample vectors.
+    
+    Args:
+        index_type: Index type name
+        
+    Returns:
+        True if create_index returns an untrained index for this type
+    """
+    return index_type in ("ivfpq", "sq8")
+
+
+def can_train(index_type: str, num_vectors: int) -> bool:
+    """
+    Check whether enough vectors exist to train an index type.
+    
+    Args:
+        index_type: Index type name
+        num_vectors: Number of available training vectors
+        
+    Returns:
+        True if the type needs no training or there are enough vectors
+    """
+    if not requires_training(index_type):
+        return True
+    if index_type == "sq8":
+        # Only the per-dimension value range is learned
+        return num_vectors > 0
+    # The coarse quantizer is a k-means with nlist centroids and each PQ
+    # sub-quantizer one with 2**nbits centroids, trained on the same sample
+    centroids = max(ivf_nlist(num_vectors), 2 ** Config.PQ_NBITS)
+    sample = min(num_vectors, Config.IVF_TRAIN_SAMPLE)
+    return sample >= _MIN_POINTS_PER_CENTROID * centroids
+
+
+def ivf_nlist(num_vectors: int) -> int:
+    """
+    Get the number of IVF coarse clusters for a collection size.
+    
+    Uses ``Config.IVF_NLIST`` if set, otherwise about ``4 * sqrt(n)``,
+    limited so every cluster gets enough training points.
+    
+    Args:
+        num_vectors: Number of vectors in the collection
+        
+    Returns:
+        Number of inverted lists
+    """
+    if Config.IVF_NLIST > 0:
+        return Config.IVF_NLIST
+    sample = min(num_vectors, Config.IVF_TRAIN_SAMPLE)
+    return max(1, min(int(4 * math.sqrt(num_vectors)), sample // _MIN_POINTS_PER_CENTROID))
+
+
+def stored_ids(index: faiss.Index) -> np.ndarray:
+    """
+    Get the ids of all vectors held by an index, including removed ones
+    that are only tombstoned in the mappings.
+    
+    Args:
+        index: Index as returned by create_index
+        
+    Returns:
+        Vector ids (int64, unordered)
+    """
+    if isinstance(index, faiss.IndexIDMap2):
+        return faiss.vector_to_array(index.id_map).astype(np.int64)
+    
+    invlists = faiss.extract_index_ivf(index).invlists
+    ids = []
+    for list_no in range(invlists.nlist):
+        size = invlists.list_size(list_no)
+        if size:
+            pointer = invlists.get_ids(list_no)
+            ids.append(faiss.rev_swig_ptr(pointer, size).copy())
+            invlists.release_ids(list_no, pointer)
+    return np.concatenate(ids) if ids else np.empty(0, dtype=np.int64)
+
+
+def search_parameters(index: faiss.Index, selector: faiss.IDSelector) -> faiss.SearchParameters:
+    """
+    Build search parameters that restrict a search to selected ids.
+    
+    Args:
+        index: Index as returned by create_index
+        selector: Id selector
+        
+    Returns:
+        Search parameters for ``index.search``
+    """
+    base = _base_index(index)
+    if isinstance(base, faiss.IndexIVF):
+        # IVF parameters override the index's nprobe, so carry it over
+        return faiss.SearchParametersIVF(sel=selector, nprobe=base.nprobe)
+    return faiss.SearchParameters(sel=selector)
+
+
+def _base_index(index: faiss.Index) -> faiss.Index:
+    """Unwrap an ``IndexIDMap2`` to the index holding the vectors."""
+    if isinstance(index, faiss.IndexIDMap2):
+        return faiss.downcast_index(index.index)
+    return index
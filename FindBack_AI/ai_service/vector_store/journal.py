@@ -0,0 +1,174 @@
+"""
+Write-ahead journal for FAISS index mutations.
+"""
+import os
+import struct
+import zlib
+import numpy as np
+from pathlib import Path
+from typing import Iterable, Iterator, NamedTuple, Optional, Tuple
+
+from ai_service.utils.logger import logger
+
+
+# Journal operations
+OP_ADD = 1
+OP_REMOVE = 2
+OP_UPDATE = 3
+
+# Record frame: body length + CRC32 of the body
+_FRAME = struct.Struct("<II")
+# Record body header: op, vector id, length of the UTF-8 item id
+_HEADER = struct.Struct("<BqH")
+
+
+class JournalRecord(NamedTuple):
+    """Single journaled mutation."""
+    op: int
+    vector_id: int
+    item_id: str
+    vector: Optional[np.ndarray]
+
+
+class IndexJournal:
+    """
+    Append-only log of index mutations.
+    
+    Each record is ``op + vector id + item id`` followed by the float32
+    vector for adds and updates, framed with its length and a CRC32 so a
+    record torn by a crash is detected and dropped on replay.
+    """
+    
+    def __init__(self, journal_path: Path, dimension: int, fsync: bool = False):
+        """
+        Initialize journal.
+        
+        Args:
+            journal_path: Path to the journal file
+            dimension: Embedding dimension of journaled vectors
+            fsync: Whether to fsync after every append (survives power loss,
+                not just a process crash)
+        """
+        self.journal_path = journal_path
+        self.dimension = dimension
+        self.fsync = fsync
+        self._file = None
+    
+    def append(
+        self,
+        op: int,
+        vector_id: int,
+        item_id: str,
+        vector: Optional[np.ndarray] = None
+    ) -> None:
+        """
+        Append a mutation to the journal.
+        
+        Args:
+            op: Operation (OP_ADD, OP_REMOVE or OP_UPDATE)
+            vector_id: FAISS vector id
+            item_id: Item identifier
+            vector: Embedding vector for adds and updates
+        """
+        self.append_many([(op, vector_id, item_id, vector)])
+    
+    def append_many(self, records: Iterable[Tuple[int, int, str, Optional[np.ndarray]]]) -> None:
+        """
+        Append several mutations with one write and (if enabled) one fsync.
+        
+        Args:
+            records: (op, vector id, item id, vector) tuples, as for append
+        """
+        frames = []
+        for op, vector_id, item_id, vector in records:
+            item_bytes = item_id.encode("utf-8")
+            body = _HEADER.pack(op, vector_id, len(item_bytes)) + item_bytes
+            if op != OP_REMOVE:
+                body += np.ascontiguousarray(vector, dtype=np.float32).reshape(-1).tobytes()
+            frames.append(_FRAME.pack(len(body), zlib.crc32(body)) + body)
+        
+        f = self._open()
+        f.write(b"".join(frames))
+        f.flush()
+        if self.fsync:
+            os.fsync(f.fileno())
+    
+    def replay(self, offset: int = 0) -> Iterator[JournalRecord]:
+        """
+        Read back all complete records in order.
+        
+        A truncated or corrupt tail (from a crash mid-append) ends the replay
+        and is cut off so later appends start from a clean record boundary.
+        
+        Args:
+            offset: Byte offset of the first record to read (a journal size
+                seen earlier, to read only the records appended since)
+                
+        Yields:
+            Journal records
+        """
+        if not self.journal_path.exists():
+            return
+        
+        with open(self.journal_path, "rb") as f:
+            data = f.read()
+        
+        while offset + _FRAME.size <= len(data):
+            length, crc = _FRAME.unpack_from(data, offset)
+            body = data[offset + _FRAME.size:offset + _FRAME.size + length]
+            if len(body) < length or zlib.crc32(body) != crc:
+                break
+            op, vector_id, item_len = _HEADER.unpack_from(body)
+            item_id = body[_HEADER.size:_HEADER.size + item_len].decode("utf-8")
+            vector = None
+            if op != OP_REMOVE:
+                vector = np.frombuffer(
+                    body, dtype=np.float32, count=self.dimension, offset=_HEADER.size + item_len
+                )
+            yield JournalRecord(op, vector_id, item_id, vector)
+            offset += _FRAME.size + length
+        
+        if offset < len(data):
+            logger.warning(
+                f"Dropping {len(data) - offset} bytes of incomplete journal tail in {self.journal_path}"
+            )
+            self._truncate_to(offset)
+    
+    def truncate(self) -> None:
+        """Empty the journal (after a checkpoint made its records redundant)."""
+        self._truncate_to(0)
+    
+    def size_bytes(self) -> int:
+        """
+        Get journal size.
+        
+        Returns:
+            Size of the journal file in bytes
+        """
+        try:
+            return self.journal_path.stat().st_size
+        except FileNotFoundError:
+            return 0
+    
+    def close(self) -> None:
+        """Close the journal file."""
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+    
+    def _open(self):
+        """Open the journal for appending, creating it if needed."""
+        if self._file is None:
+            self.journal_path.parent.mkdir(parents=True, exist_ok=True)
+            self._file = open(self.journal_path, "ab")
+        return self._file
+    
+    def _truncate_to(self, size: int) -> None:
+        """Cut the journal file down to `size` bytes."""
+        if not self.journal_path.exists():
+            return
+        f = self._open()
+        f.flush()
+        os.ftruncate(f.fileno(), size)
+        if self.fsync:
+            os.fsync(f.fileno())
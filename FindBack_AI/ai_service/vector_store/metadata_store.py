@@ -2,10 +2,13 @@
 Metadata store for items (lost and found).
 """
 import json
+import threading
 from pathlib import Path
-from typing import Dict, Optional, List, Any
+from typing import Dict, Optional, List, Any, Union
 from datetime import datetime, timezone
 
+from ai_service.vector_store.sqlite_metadata_store import SQLiteMetadataStore
+from ai_service.utils.config import Config
 from ai_service.utils.logger import logger
 
 
@@ -21,6 +24,7 @@ class MetadataStore:
         """
         self.metadata_path = metadata_path
         self.metadata: Dict[str, Dict[str, Any]] = {}
+        self._lock = threading.RLock()  # Requests run in worker threads
         self._load()
     
     def _load(self) -> None:
@@ -67,19 +71,42 @@ class MetadataStore:
             has_text: Whether item has text
             **kwargs: Additional metadata fields
         """
-        self.metadata[item_id] = {
-            "item_id": item_id,
-            "description": description,
-            "image_path": image_path,
-            "has_image": has_image,
-            "has_text": has_text,
-            "created_at": datetime.now(timezone.utc).isoformat(),
-            "updated_at": datetime.now(timezone.utc).isoformat(),
-            **kwargs
-        }
-        self._save()
+        with self._lock:
+            self.metadata[item_id] = {
+                "item_id": item_id,
+                "description": description,
+                "image_path": image_path,
+                "has_image": has_image,
+                "has_text": has_text,
+                "created_at": datetime.now(timezone.utc).isoformat(),
+                "updated_at": datetime.now(timezone.utc).isoformat(),
+                **kwargs
+            }
+            self._save()
         logger.debug(f"Added metadata for item: {item_id}")
     
+    def add_many(self, items: List[Dict[str, Any]]) -> None:
+        """
+        Add or update metadata of several items with one file write.
+        
+        Args:
+            items: Keyword arguments of add for each item (item_id required)
+        """
+        now = datetime.now(timezone.utc).isoformat()
+        with self._lock:
+            for fields in items:
+                self.metadata[fields["item_id"]] = {
+                    "description": None,
+                    "image_path": None,
+                    "has_image": False,
+                    "has_text": False,
+                    **fields,
+                    "created_at": now,
+                    "updated_at": now
+                }
+            self._save()
+        logger.debug(f"Added metadata for {len(items)} items")
+    
     def get(self, item_id: str) -> Optional[Dict[str, Any]]:
         """
         Get metadata for an item.
@@ -103,12 +130,13 @@ class MetadataStore:
         Returns:
             True if updated, False if item not found
         """
-        if item_id not in self.metadata:
-            return False
-        
-        self.metadata[item_id].update(kwargs)
-        self.metadata[item_id]["updated_at"] = datetime.now(timezone.utc).isoformat()
-        self._save()
+        with self._lock:
+            if item_id not in self.metadata:
+                return False
+            
+            self.metadata[item_id].update(kwargs)
+            self.metadata[item_id]["updated_at"] = datetime.now(timezone.utc).isoformat()
+            self._save()
         logger.debug(f"Updated metadata for item: {item_id}")
         return True
     
@@ -122,12 +150,13 @@ class MetadataStore:
         Returns:
             True if removed, False if not found
         """
-        if item_id in self.metadata:
+        with self._lock:
+            if item_id not in self.metadata:
+                return False
             del self.metadata[item_id]
             self._save()
-            logger.debug(f"Removed metadata for item: {item_id}")
-            return True
-        return False
+        logger.debug(f"Removed metadata for item: {item_id}")
+        return True
     
     def list_all(self) -> List[str]:
         """
@@ -158,3 +187,21 @@ class MetadataStore:
             True if exists, False otherwise
         """
         return item_id in self.metadata
+
+
+def open_metadata_store(metadata_path: Path) -> Union[MetadataStore, SQLiteMetadataStore]:
+    """
+    Open a metadata store with the configured backend.
+    
+    Args:
+        metadata_path: Path to JSON metadata file (the SQLite backend keeps
+            its database next to it and migrates the file on first start)
+            
+    Returns:
+        Metadata store instance
+    """
+    if Config.METADATA_BACKEND == "sqlite":
+        return SQLiteMetadataStore(metadata_path)
+    if Config.METADATA_BACKEND == "json":
+        return MetadataStore(metadata_path)
+    raise ValueError(f"Unknown metadata backend: {Config.METADATA_BACKEND}")
@@ -0,0 +1,74 @@
+"""
+Offline rebuild of a collection's FAISS index.
+
+Retrains compressed indexes on a fresh sample of the stored vectors, drops
+removed vectors and writes the result atomically, so a running service
+picks up the new index on its next access. Pause writes to the collection
+while it runs: mutations journaled by the service during the rebuild are
+not part of the new index.
+
+An explicit --index-type is saved with the index, so running services keep
+it instead of converting back to Config.INDEX_TYPE. Rebuild without it to
+follow the configured type again.
+
+Run from the FindBack_AI directory:
+    python -m ai_service.vector_store.rebuild lost --index-type ivfpq
+"""
+import argparse
+import time
+from pathlib import Path
+from typing import List, Optional
+
+from ai_service.vector_store.faiss_index import FAISSIndex
+from ai_service.vector_store.index_factory import INDEX_TYPES
+from ai_service.vector_store.registry import COLLECTIONS
+from ai_service.utils.config import Config
+from ai_service.utils.logger import logger
+
+
+def rebuild_index(
+    index_path: Path,
+    index_type: Optional[str],
+    dimension: int = Config.EMBEDDING_DIM
+) -> FAISSIndex:
+    """
+    Rebuild an index as the given type and checkpoint it.
+    
+    Args:
+        index_path: Path of the index to rebuild
+        index_type: Target index type (see Config.INDEX_TYPE), saved with
+            the index; None rebuilds as and follows Config.INDEX_TYPE
+        dimension: Embedding dimension
+        
+    Returns:
+        The rebuilt FAISSIndex
+    """
+    index = FAISSIndex(index_path, dimension=dimension)
+    # Checkpoints in every process convert to the saved target type
+    index.target_type = index_type
+    index.convert(index_type or Config.INDEX_TYPE)
+    index.checkpoint()
+    index.close()
+    return index
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Rebuild a collection's FAISS index")
+    parser.add_argument("collection", choices=list(COLLECTIONS))
+    parser.add_argument(
+        "--index-type", choices=INDEX_TYPES, default=None,
+        help="Index type to keep the collection at (default: follow Config.INDEX_TYPE)"
+    )
+    args = parser.parse_args(argv)
+    
+    started = time.perf_counter()
+    index_path = COLLECTIONS[args.collection][0]()
+    index = rebuild_index(index_path, args.index_type)
+    logger.info(
+        f"Rebuilt {args.collection} index as {index.index_type()} with {index.count()} vectors "
+        f"in {time.perf_counter() - started:.1f}s"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,205 @@
+"""
+Process-wide registry of resident FAISS indexes and metadata stores.
+"""
+import threading
+from pathlib import Path
+from typing import TYPE_CHECKING, Callable, Dict, List, Optional, Tuple, Union
+
+from ai_service.vector_store.metadata_store import MetadataStore, open_metadata_store
+from ai_service.vector_store.sqlite_metadata_store import SQLiteMetadataStore
+from ai_service.utils.config import Config
+from ai_service.utils.logger import logger
+
+if TYPE_CHECKING:
+    from ai_service.vector_store.faiss_index import FAISSIndex
+
+
+# Logical collections and the config getters for their (index, metadata) paths
+COLLECTIONS: Dict[str, Tuple[Callable[[], Path], Callable[[], Path]]] = {
+    "lost": (Config.get_lost_items_index_path, Config.get_lost_items_metadata_path),
+    "found": (Config.get_found_items_index_path, Config.get_found_items_metadata_path),
+}
+
+
+class IndexRegistry:
+    """
+    Keeps one loaded FAISSIndex and metadata store per collection for the
+    life of the process.
+    
+    Indexes are loaded on first use and handed out as the same instance on
+    every later call. Before handing one out, the registry compares the
+    generation of the index files on disk with the one that was loaded and,
+    only if another process has written the index, applies its writes.
+    Loading and refreshing hold a lock of that collection only, so a slow
+    load of one collection does not block requests to the others.
+    """
+    
+    def __init__(
+        self,
+        index_paths: Optional[Dict[str, Path]] = None,
+        dimension: int = Config.EMBEDDING_DIM,
+        metadata_paths: Optional[Dict[str, Path]] = None
+    ):
+        """
+        Initialize index registry.
+        
+        Args:
+            index_paths: Optional map of collection name to index path
+                (defaults to the configured lost/found index paths)
+            dimension: Embedding dimension for newly created indexes
+            metadata_paths: Optional map of collection name to metadata path
+                (defaults to the configured lost/found metadata paths)
+        """
+        self.index_paths = index_paths
+        self.metadata_paths = metadata_paths
+        self.dimension = dimension
+        self._indexes: Dict[str, "FAISSIndex"] = {}
+        self._metadata_stores: Dict[str, Union[MetadataStore, SQLiteMetadataStore]] = {}
+        self._collection_locks: Dict[str, threading.Lock] = {}
+        self._lock = threading.Lock()  # Guards the dicts above
+    
+    def get(self, collection: str) -> "FAISSIndex":
+        """
+        Get the resident index for a collection.
+        
+        Args:
+            collection: Collection name ("lost" or "found")
+            
+        Returns:
+            FAISSIndex instance, fresh with respect to the on-disk generation
+            
+        Raises:
+            KeyError: If the collection is unknown
+        """
+        # Imported on first use so importing the API does not load faiss
+        from ai_service.vector_store.faiss_index import FAISSIndex
+        
+        with self._lock:
+            collection_lock = self._collection_locks.setdefault(collection, threading.Lock())
+        
+        with collection_lock:
+            with self._lock:
+                index = self._indexes.get(collection)
+            if index is None:
+                index = FAISSIndex(self._path(collection, 0), dimension=self.dimension)
+                with self._lock:
+                    self._indexes[collection] = index
+            elif index.refresh():
+                logger.info(f"Applied changes to the index for '{collection}' made by another process")
+            return index
+    
+    def get_metadata_store(self, collection: str) -> Union[MetadataStore, SQLiteMetadataStore]:
+        """
+        Get the resident metadata store for a collection.
+        
+        Args:
+            collection: Collection name ("lost" or "found")
+            
+        Returns:
+            Metadata store instance
+            
+        Raises:
+            KeyError: If the collection is unknown
+        """
+        with self._lock:
+            store = self._metadata_stores.get(collection)
+            if store is None:
+                store = open_metadata_store(self._path(collection, 1))
+                self._metadata_stores[collection] = store
+            return store
+    
+    def collections(self) -> List[str]:
+        """
+        List the collections served by this registry.
+        
+        Returns:
+            Collection names
+        """
+        if self.index_paths is not None:
+            return list(self.index_paths)
+        return list(COLLECTIONS)
+    
+    def preload(self) -> None:
+        """Load the indexes and metadata stores of all collections."""
+        for collection in self.collections():
+            self.get(collection)
+            self.get_metadata_store(collection)
+    
+    def close(self) -> None:
+        """Checkpoint journaled index mutations of all resident indexes."""
+        with self._lock:
+            self._close_indexes()
+    
+    def _path(self, collection: str, kind: int) -> Path:
+        """Resolve the index (kind 0) or metadata (kind 1) path of a collection."""
+        overrides = self.index_paths if kind == 0 else self.metadata_paths
+        if overrides is not None:
+            if collection in overrides:
+                return overrides[collection]
+        elif collection in COLLECTIONS:
+            return COLLECTIONS[collection][kind]()
+        raise KeyError(f"Unknown collection: {collection}")
+    
+    def _close_indexes(self) -> None:
+        """Close all resident indexes; the caller holds the registry lock."""
+        for collection, index in self._indexes.items():
+            try:
+                index.close()
+            except Exception as e:
+                logger.error(f"Failed to checkpoint index for '{collection}': {str(e)}")
+    
+    def clear(self) -> None:
+        """Close and drop all resident stores; they are reopened on next access."""
+        with self._lock:
+            self._close_indexes()
+            for store in self._metadata_stores.values():
+                if isinstance(store, SQLiteMetadataStore):
+                    store.close()
+            self._indexes.clear()
+            self._metadata_stores.clear()
+
+
+# Global registry instance (lazy created)
+_registry_instance: Optional[IndexRegistry] = None
+_registry_lock = threading.Lock()
+
+
+def get_index_registry() -> IndexRegistry:
+    """
+    Get or create global index registry.
+    
+    Returns:
+        IndexRegistry instance
+    """
+    global _registry_instance
+    if _registry_instance is None:
+        with _registry_lock:
+            if _registry_instance is None:
+                _registry_instance = IndexRegistry()
+    return _registry_instance
+
+
+def get_index(collection: str) -> "FAISSIndex":
+    """
+    Get the resident index for a collection from the global registry.
+    
+    Args:
+        collection: Collection name ("lost" or "found")
+        
+    Returns:
+        FAISSIndex instance
+    """
+    return get_index_registry().get(collection)
+
+
+def get_metadata_store(collection: str) -> Union[MetadataStore, SQLiteMetadataStore]:
+    """
+    Get the resident metadata store for a collection from the global registry.
+    
+    Args:
+        collection: Collection name ("lost" or "found")
+        
+    Returns:
+        Metadata store instance
+    """
+    return get_index_registry().get_metadata_store(collection)
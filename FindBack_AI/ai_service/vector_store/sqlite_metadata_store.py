@@ -0,0 +1,266 @@
+"""
+SQLite-backed metadata store for items (lost and found).
+"""
+import json
+import sqlite3
+import threading
+from pathlib import Path
+from typing import Dict, Optional, List, Any
+from datetime import datetime, timezone
+
+from ai_service.utils.logger import logger
+
+
+class SQLiteMetadataStore:
+    """
+    Store and manage metadata for items in an embedded SQLite database.
+    
+    Same public API as MetadataStore, but every add/update/remove writes a
+    single row instead of rewriting the whole file, and lookups do not need
+    the full store in memory. The database runs in WAL mode so readers in
+    other processes are not blocked by writers.
+    """
+    
+    def __init__(self, metadata_path: Path):
+        """
+        Initialize metadata store.
+        
+        Args:
+            metadata_path: Path to the legacy JSON metadata file. The database
+                lives next to it with a ``.db`` suffix, and an existing JSON
+                file is migrated into it on first start.
+        """
+        self.metadata_path = metadata_path
+        self.db_path = metadata_path.with_suffix(".db")
+        self._lock = threading.Lock()
+        self._conn = self._connect()
+        self._migrate_json()
+    
+    def _connect(self) -> sqlite3.Connection:
+        """Open the database and create the schema if needed."""
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        conn = sqlite3.connect(
+            str(self.db_path),
+            isolation_level=None,  # Autocommit; transactions are explicit
+            check_same_thread=False
+        )
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS items ("
+            "item_id TEXT PRIMARY KEY, "
+            "data TEXT NOT NULL)"
+        )
+        return conn
+    
+    def _migrate_json(self) -> None:
+        """Import a legacy JSON metadata file into an empty database."""
+        if not self.metadata_path.exists() or self.count() > 0:
+            return
+        
+        try:
+            with open(self.metadata_path, 'r', encoding='utf-8') as f:
+                metadata = json.load(f)
+        except Exception as e:
+            logger.error(f"Failed to read legacy metadata for migration: {str(e)}")
+            return
+        
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                self._conn.executemany(
+                    "INSERT OR REPLACE INTO items (item_id, data) VALUES (?, ?)",
+                    [
+                        (item_id, json.dumps(data, ensure_ascii=False))
+                        for item_id, data in metadata.items()
+                    ]
+                )
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+        
+        # Keep the original file as a backup, but out of the way
+        migrated_path = self.metadata_path.with_name(self.metadata_path.name + ".migrated")
+        self.metadata_path.replace(migrated_path)
+        logger.info(f"Migrated {len(metadata)} items from {self.metadata_path} to {self.db_path}")
+    
+    def add(
+        self,
+        item_id: str,
+        description: Optional[str] = None,
+        image_path: Optional[str] = None,
+        has_image: bool = False,
+        has_text: bool = False,
+        **kwargs
+    ) -> None:
+        """
+        Add or update item metadata.
+        
+        Args:
+            item_id: Unique item identifier
+            description: Text description
+            image_path: Optional path to image file
+            has_image: Whether item has image
+            has_text: Whether item has text
+            **kwargs: Additional metadata fields
+        """
+        data = {
+            "item_id": item_id,
+            "description": description,
+            "image_path": image_path,
+            "has_image": has_image,
+            "has_text": has_text,
+            "created_at": datetime.now(timezone.utc).isoformat(),
+            "updated_at": datetime.now(timezone.utc).isoformat(),
+            **kwargs
+        }
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO items (item_id, data) VALUES (?, ?)",
+                (item_id, json.dumps(data, ensure_ascii=False))
+            )
+        logger.debug(f"Added metadata for item: {item_id}")
+    
+    def add_many(self, items: List[Dict[str, Any]]) -> None:
+        """
+        Add or update metadata of several items in one transaction.
+        
+        Args:
+            items: Keyword arguments of add for each item (item_id required)
+        """
+        now = datetime.now(timezone.utc).isoformat()
+        rows = []
+        for fields in items:
+            data = {
+                "description": None,
+                "image_path": None,
+                "has_image": False,
+                "has_text": False,
+                **fields,
+                "created_at": now,
+                "updated_at": now
+            }
+            rows.append((fields["item_id"], json.dumps(data, ensure_ascii=False)))
+        
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                self._conn.executemany(
+                    "INSERT OR REPLACE INTO items (item_id, data) VALUES (?, ?)", rows
+                )
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+        logger.debug(f"Added metadata for {len(items)} items")
+    
+    def get(self, item_id: str) -> Optional[Dict[str, Any]]:
+        """
+        Get metadata for an item.
+        
+        Args:
+            item_id: Item identifier
+            
+        Returns:
+            Metadata dictionary or None if not found
+        """
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT data FROM items WHERE item_id = ?", (item_id,)
+            ).fetchone()
+        return json.loads(row[0]) if row else None
+    
+    def update(self, item_id: str, **kwargs) -> bool:
+        """
+        Update metadata for an item.
+        
+        Args:
+            item_id: Item identifier
+            **kwargs: Fields to update
+            
+        Returns:
+            True if updated, False if item not found
+        """
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                row = self._conn.execute(
+                    "SELECT data FROM items WHERE item_id = ?", (item_id,)
+                ).fetchone()
+                if row is None:
+                    self._conn.execute("ROLLBACK")
+                    return False
+                
+                data = json.loads(row[0])
+                data.update(kwargs)
+                data["updated_at"] = datetime.now(timezone.utc).isoformat()
+                self._conn.execute(
+                    "UPDATE items SET data = ? WHERE item_id = ?",
+                    (json.dumps(data, ensure_ascii=False), item_id)
+                )
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+        logger.debug(f"Updated metadata for item: {item_id}")
+        return True
+    
+    def remove(self, item_id: str) -> bool:
+        """
+        Remove item metadata.
+        
+        Args:
+            item_id: Item identifier
+            
+        Returns:
+            True if removed, False if not found
+        """
+        with self._lock:
+            cursor = self._conn.execute("DELETE FROM items WHERE item_id = ?", (item_id,))
+        if cursor.rowcount > 0:
+            logger.debug(f"Removed metadata for item: {item_id}")
+            return True
+        return False
+    
+    def list_all(self) -> List[str]:
+        """
+        List all item IDs.
+        
+        Returns:
+            List of item IDs
+        """
+        with self._lock:
+            rows = self._conn.execute("SELECT item_id FROM items ORDER BY rowid").fetchall()
+        return [row[0] for row in rows]
+    
+    def count(self) -> int:
+        """
+        Get total number of items.
+        
+        Returns:
+            Number of items
+        """
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM items").fetchone()[0]
+    
+    def exists(self, item_id: str) -> bool:
+        """
+        Check if item exists.
+        
+        Args:
+            item_id: Item identifier
+            
+        Returns:
+            True if exists, False otherwise
+        """
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT 1 FROM items WHERE item_id = ?", (item_id,)
+            ).fetchone()
+        return row is not None
+    
+    def close(self) -> None:
+        """Close the database connection."""
+        with self._lock:
+            self._conn.close()
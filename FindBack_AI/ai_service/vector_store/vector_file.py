@@ -0,0 +1,82 @@
+"""
+Raw float32 vector storage on disk, addressed by FAISS vector id.
+"""
+import os
+import numpy as np
+from pathlib import Path
+from typing import Optional
+
+
+class VectorFile:
+    """
+    Flat file of float32 vectors where the vector with id ``i`` lives at
+    byte offset ``i * dimension * 4``.
+    
+    Compressed indexes only keep approximate codes in memory; this file
+    keeps the exact vectors for re-scoring and ``get_vector`` without
+    holding them in RAM. Reads go through a memory map, so only the pages
+    actually touched are loaded, and they are shared through the OS page
+    cache. Rows of removed vectors are left in place.
+    """
+    
+    def __init__(self, path: Path, dimension: int):
+        """
+        Initialize vector file.
+        
+        Args:
+            path: Path to the vector file
+            dimension: Embedding dimension
+        """
+        self.path = path
+        self.dimension = dimension
+        self.row_bytes = dimension * np.dtype(np.float32).itemsize
+        self._fd: Optional[int] = None
+    
+    def write(self, vector_ids: np.ndarray, vectors: np.ndarray) -> None:
+        """
+        Write vectors at the rows of their ids.
+        
+        Args:
+            vector_ids: Vector ids, shape (N,)
+            vectors: Vectors, shape (N, dimension)
+        """
+        fd = self._open()
+        vectors = np.ascontiguousarray(vectors, dtype=np.float32).reshape(-1, self.dimension)
+        for vector_id, vector in zip(np.asarray(vector_ids).reshape(-1), vectors):
+            os.pwrite(fd, vector.tobytes(), int(vector_id) * self.row_bytes)
+    
+    def read(self, vector_ids: np.ndarray) -> np.ndarray:
+        """
+        Read the vectors stored for some ids.
+        
+        Args:
+            vector_ids: Vector ids, shape (N,)
+            
+        Returns:
+            Vectors, shape (N, dimension), float32
+        """
+        rows = np.memmap(self.path, dtype=np.float32, mode='r').reshape(-1, self.dimension)
+        return np.array(rows[np.asarray(vector_ids, dtype=np.int64)])
+    
+    def flush(self) -> None:
+        """Flush written vectors to stable storage."""
+        if self._fd is not None:
+            os.fsync(self._fd)
+    
+    def clear(self) -> None:
+        """Delete the file."""
+        self.close()
+        self.path.unlink(missing_ok=True)
+    
+    def close(self) -> None:
+        """Close the file."""
+        if self._fd is not None:
+            os.close(self._fd)
+            self._fd = None
+    
+    def _open(self) -> int:
+        """Open the file for writing, creating it if needed."""
+        if self._fd is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            self._fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o644)
+        return self._fd
@@ -0,0 +1,54 @@
+"""
+CLIP encode throughput of the PyTorch and ONNX Runtime backends.
+
+Run from the FindBack_AI directory:
+    python -m benchmarks.bench_encode_backends --batch-sizes 1 8 32
+"""
+import argparse
+import time
+from PIL import Image
+
+from ai_service.models.clip_model import CLIPModel
+from ai_service.processing.image_preprocess import preprocess_image
+from benchmarks.common import print_table
+
+
+def throughput(func, items: int, repeats: int) -> float:
+    """Items per second of `func`, which encodes `items` items per call."""
+    func()  # Warm up
+    started = time.perf_counter()
+    for _ in range(repeats):
+        func()
+    return items * repeats / (time.perf_counter() - started)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--batch-sizes", type=int, nargs="+", default=[1, 8, 32])
+    parser.add_argument("--repeats", type=int, default=3)
+    args = parser.parse_args()
+    
+    models = {backend: CLIPModel(backend=backend) for backend in ("torch", "onnx")}
+    rows = []
+    for batch_size in args.batch_sizes:
+        # Preprocess once so only the forward pass is measured
+        tensors = [
+            preprocess_image(Image.new("RGB", (640, 480), color=(i % 256, 64, 128)))
+            for i in range(batch_size)
+        ]
+        texts = [f"lost blue backpack number {i}" for i in range(batch_size)]
+        
+        results = {}
+        for backend, model in models.items():
+            results[backend] = (
+                throughput(lambda: model.encode_images_batch(tensors), batch_size, args.repeats),
+                throughput(lambda: model.encode_texts_batch(texts), batch_size, args.repeats)
+            )
+        rows.append([batch_size, "image", results["torch"][0], results["onnx"][0]])
+        rows.append([batch_size, "text", results["torch"][1], results["onnx"][1]])
+    
+    print_table("Encode throughput (items/s)", ["batch", "tower", "torch", "onnx"], rows)
+
+
+if __name__ == "__main__":
+    main()
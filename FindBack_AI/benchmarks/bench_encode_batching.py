@@ -0,0 +1,71 @@
+"""
+Throughput of concurrent CLIP encodes with and without micro-batching.
+
+Run from the FindBack_AI directory:
+    python -m benchmarks.bench_encode_batching --concurrency 1 8 32
+"""
+import argparse
+import asyncio
+import io
+import time
+from PIL import Image
+
+from ai_service.models.clip_model import get_clip_model
+from ai_service.models.encode_batcher import EncodeBatcher
+from ai_service.utils.config import Config
+from benchmarks.common import print_table
+
+
+def make_image_bytes(i: int) -> bytes:
+    """Encode a small JPEG whose color depends on `i`."""
+    buffer = io.BytesIO()
+    Image.new("RGB", (640, 480), color=(i % 256, (7 * i) % 256, 128)).save(buffer, format="JPEG")
+    return buffer.getvalue()
+
+
+async def run_clients(batcher: EncodeBatcher, kind: str, concurrency: int, requests: int) -> float:
+    """Run `concurrency` clients issuing `requests` encodes in total; return items/s."""
+    images = [make_image_bytes(i) for i in range(requests)]
+    texts = [f"lost blue backpack number {i}" for i in range(requests)]
+    next_request = iter(range(requests))
+    
+    async def client() -> None:
+        for i in next_request:
+            if kind == "image":
+                await batcher.encode_image(images[i])
+            else:
+                await batcher.encode_text(texts[i])
+    
+    started = time.perf_counter()
+    await asyncio.gather(*(client() for _ in range(concurrency)))
+    return requests / (time.perf_counter() - started)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 8, 32])
+    parser.add_argument("--requests", type=int, default=128)
+    parser.add_argument("--max-batch-size", type=int, default=Config.ENCODE_BATCH_MAX_SIZE)
+    parser.add_argument("--max-wait-ms", type=float, default=Config.ENCODE_BATCH_MAX_WAIT_MS)
+    args = parser.parse_args()
+    
+    get_clip_model()  # Load outside the timed runs
+    rows = []
+    for kind in ("image", "text"):
+        for concurrency in args.concurrency:
+            unbatched = EncodeBatcher(max_batch_size=1, max_wait_ms=0)
+            batched = EncodeBatcher(max_batch_size=args.max_batch_size, max_wait_ms=args.max_wait_ms)
+            before = asyncio.run(run_clients(unbatched, kind, concurrency, args.requests))
+            after = asyncio.run(run_clients(batched, kind, concurrency, args.requests))
+            mean_batch = batched.metrics.snapshot()[kind]["mean_batch_size"]
+            rows.append([kind, concurrency, before, after, mean_batch])
+    
+    print_table(
+        "Encode throughput (items/s)",
+        ["kind", "clients", "batch=1", "batched", "mean batch"],
+        rows
+    )
+
+
+if __name__ == "__main__":
+    main()
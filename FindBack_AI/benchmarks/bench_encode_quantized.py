@@ -0,0 +1,76 @@
+"""
+Latency, weight memory and retrieval recall of INT8 vs fp32 CLIP on CPU.
+
+Recall@10 compares the top-10 image neighbours of each query under INT8
+with those under fp32, over a gallery of synthetic test images.
+
+Run from the FindBack_AI directory:
+    python -m benchmarks.bench_encode_quantized --gallery 256
+"""
+import argparse
+import io
+import numpy as np
+import torch
+
+from ai_service.models.clip_model import CLIPModel
+from ai_service.models.quantization import CALIBRATION_TEXTS, calibration_images
+from ai_service.processing.image_preprocess import preprocess_image_batch
+from benchmarks.bench_index_ann import recall_at_k
+from benchmarks.common import print_table, summarize, time_calls
+
+
+def weights_mb(model: torch.nn.Module) -> float:
+    """Serialized size of a model's weights in MB (packed INT8 weights included)."""
+    buffer = io.BytesIO()
+    torch.save(model.state_dict(), buffer)
+    return buffer.tell() / 1e6
+
+
+def top_k(queries: np.ndarray, gallery: np.ndarray, k: int) -> np.ndarray:
+    """Indices of the k most similar gallery rows for each query."""
+    return np.argsort(-(queries @ gallery.T), axis=1)[:, :k]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--gallery", type=int, default=256)
+    parser.add_argument("--batch-size", type=int, default=16)
+    parser.add_argument("--repeats", type=int, default=10)
+    parser.add_argument("--k", type=int, default=10)
+    args = parser.parse_args()
+    
+    # A different seed than the load-time calibration set
+    gallery_tensors = preprocess_image_batch(calibration_images(args.gallery, seed=1))
+    image_queries = gallery_tensors[:32]
+    batch = gallery_tensors[:args.batch_size]
+    
+    models = {"fp32": CLIPModel(quantize=False), "int8": CLIPModel(quantize=True)}
+    rows = []
+    neighbours = {}
+    for name, model in models.items():
+        image_p50 = summarize(time_calls(lambda i: model.encode_image(gallery_tensors[i]), args.repeats))["p50"]
+        batch_p50 = summarize(time_calls(lambda i: model.encode_images_batch(batch), args.repeats))["p50"]
+        text_p50 = summarize(time_calls(
+            lambda i: model.encode_text(CALIBRATION_TEXTS[i % len(CALIBRATION_TEXTS)]), args.repeats
+        ))["p50"]
+        
+        gallery = model.encode_images_batch(gallery_tensors)
+        queries = np.vstack([
+            model.encode_texts_batch(CALIBRATION_TEXTS),
+            model.encode_images_batch(image_queries)
+        ])
+        neighbours[name] = top_k(queries, gallery, args.k)
+        rows.append([name, image_p50, batch_p50, text_p50, weights_mb(model.model)])
+    
+    for row, name in zip(rows, models):
+        row.append(recall_at_k(neighbours[name], neighbours["fp32"]))
+    
+    print_table(
+        f"CLIP encode on CPU (p50 ms; batch of {args.batch_size}; gallery of {args.gallery})",
+        ["model", "image", "image batch", "text", "weights MB", f"recall@{args.k}"],
+        rows
+    )
+
+
+if __name__ == "__main__":
+    main()
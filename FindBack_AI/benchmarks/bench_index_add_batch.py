@@ -0,0 +1,54 @@
+"""
+Items/s of N saved single adds vs. one saved add_batch, per durability mode.
+
+Run from the FindBack_AI directory:
+    python -m benchmarks.bench_index_add_batch --size 10000 --batch 256
+"""
+import argparse
+import tempfile
+import time
+from pathlib import Path
+
+from ai_service.vector_store.faiss_index import FAISSIndex
+from ai_service.utils.config import Config
+from benchmarks.common import random_embeddings, print_table
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--size", type=int, default=10_000, help="Vectors already in the index")
+    parser.add_argument("--batch", type=int, default=256, help="Items added per run")
+    args = parser.parse_args()
+    
+    vectors = random_embeddings(args.size + args.batch, Config.EMBEDDING_DIM)
+    new_ids = [f"new{i}" for i in range(args.batch)]
+    
+    rows = []
+    for mode in ("snapshot", "journal"):
+        Config.INDEX_DURABILITY = mode
+        rates = []
+        for batched in (False, True):
+            with tempfile.TemporaryDirectory() as tmpdir:
+                index = FAISSIndex(Path(tmpdir) / "bench.index", dimension=Config.EMBEDDING_DIM)
+                for i in range(args.size):
+                    index.add(vectors[i], f"item{i}", save=False)
+                index.checkpoint()
+                
+                started = time.perf_counter()
+                if batched:
+                    index.add_batch(vectors[args.size:], new_ids, save=True)
+                else:
+                    for i, item_id in enumerate(new_ids):
+                        index.add(vectors[args.size + i], item_id, save=True)
+                rates.append(args.batch / (time.perf_counter() - started))
+        rows.append([mode, rates[0], rates[1], rates[1] / rates[0]])
+    
+    print_table(
+        f"Items/s adding {args.batch} items to an index of {args.size}",
+        ["durability", "single adds", "add_batch", "speedup"],
+        rows
+    )
+
+
+if __name__ == "__main__":
+    main()
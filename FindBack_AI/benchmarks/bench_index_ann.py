@@ -0,0 +1,88 @@
+"""
+Search latency and recall@10 of the flat and HNSW index types.
+
+Run from the FindBack_AI directory:
+    python -m benchmarks.bench_index_ann --sizes 100000 1000000 --ef-search 32 64 128
+"""
+import argparse
+import time
+import faiss
+import numpy as np
+
+from ai_service.vector_store.index_factory import create_index
+from ai_service.utils.config import Config
+from benchmarks.common import random_embeddings, time_calls, summarize, print_table
+
+
+def clustered_embeddings(n: int, dimension: int, clusters: int, spread: float, seed: int = 0) -> np.ndarray:
+    """Embeddings grouped around random centres, like photos of similar objects."""
+    rng = np.random.default_rng(seed)
+    centres = random_embeddings(clusters, dimension, seed)
+    vectors = centres[rng.integers(0, clusters, n)]
+    vectors += spread * rng.standard_normal((n, dimension), dtype=np.float32) / np.sqrt(dimension)
+    vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+    return vectors
+
+
+def make_queries(vectors: np.ndarray, n: int, noise: float, seed: int = 1) -> np.ndarray:
+    """Perturb stored vectors, the way a new report resembles an existing item."""
+    rng = np.random.default_rng(seed)
+    queries = vectors[rng.choice(len(vectors), n, replace=False)].copy()
+    queries += noise * rng.standard_normal(queries.shape, dtype=np.float32) / np.sqrt(vectors.shape[1])
+    queries /= np.linalg.norm(queries, axis=1, keepdims=True)
+    return queries
+
+
+def recall_at_k(found: np.ndarray, truth: np.ndarray) -> float:
+    """Fraction of true top-k neighbours that were returned."""
+    hits = sum(len(set(f) & set(t)) for f, t in zip(found, truth))
+    return hits / truth.size
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100_000])
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--top-k", type=int, default=10)
+    parser.add_argument("--noise", type=float, default=0.5)
+    parser.add_argument("--clusters", type=int, default=1000)
+    parser.add_argument("--spread", type=float, default=1.0)
+    parser.add_argument("--ef-search", type=int, nargs="+", default=[Config.HNSW_EF_SEARCH])
+    args = parser.parse_args()
+    
+    rows = []
+    for size in args.sizes:
+        vectors = clustered_embeddings(size, Config.EMBEDDING_DIM, args.clusters, args.spread)
+        ids = np.arange(size, dtype=np.int64)
+        queries = make_queries(vectors, args.queries, args.noise)
+        
+        flat = create_index("flat", Config.EMBEDDING_DIM)
+        flat.add_with_ids(vectors, ids)
+        _, truth = flat.search(queries, args.top_k)
+        latency = summarize(time_calls(lambda i: flat.search(queries[i:i + 1], args.top_k), args.queries))
+        rows.append([size, "flat", "-", "-", latency["p50"], latency["p99"], 1.0])
+        
+        started = time.perf_counter()
+        hnsw = create_index("hnsw", Config.EMBEDDING_DIM)
+        hnsw.add_with_ids(vectors, ids)
+        build_s = time.perf_counter() - started
+        
+        graph = faiss.downcast_index(hnsw.index)
+        for ef_search in args.ef_search:
+            graph.hnsw.efSearch = ef_search
+            _, found = hnsw.search(queries, args.top_k)
+            latency = summarize(time_calls(lambda i: hnsw.search(queries[i:i + 1], args.top_k), args.queries))
+            rows.append([
+                size, "hnsw", ef_search, f"{build_s:.1f}",
+                latency["p50"], latency["p99"], recall_at_k(found, truth)
+            ])
+    
+    print_table(
+        f"Search latency (ms) and recall@{args.top_k}",
+        ["vectors", "index", "efSearch", "build s", "p50", "p99", "recall"],
+        rows
+    )
+
+
+if __name__ == "__main__":
+    main()
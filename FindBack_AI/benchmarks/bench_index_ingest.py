@@ -0,0 +1,48 @@
+"""
+Per-item ingest latency with snapshot vs. journal durability.
+
+Run from the FindBack_AI directory:
+    python -m benchmarks.bench_index_ingest --sizes 10000 100000
+"""
+import argparse
+import tempfile
+from pathlib import Path
+
+from ai_service.vector_store.faiss_index import FAISSIndex
+from ai_service.utils.config import Config
+from benchmarks.common import random_embeddings, time_calls, summarize, print_table
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10_000, 100_000])
+    parser.add_argument("--adds", type=int, default=50, help="Saved adds per run")
+    args = parser.parse_args()
+    
+    rows = []
+    for size in args.sizes:
+        vectors = random_embeddings(size + args.adds, Config.EMBEDDING_DIM)
+        for mode in ("snapshot", "journal"):
+            Config.INDEX_DURABILITY = mode
+            with tempfile.TemporaryDirectory() as tmpdir:
+                index = FAISSIndex(Path(tmpdir) / "bench.index", dimension=Config.EMBEDDING_DIM)
+                for i in range(size):
+                    index.add(vectors[i], f"item{i}", save=False)
+                index.checkpoint()
+                
+                stats = summarize(time_calls(
+                    lambda i: index.add(vectors[size + i], f"new{i}", save=True),
+                    args.adds
+                ))
+                checkpoint = summarize(time_calls(lambda i: index.checkpoint(), 1))
+            rows.append([size, mode, stats["p50"], stats["p99"], 1000.0 / stats["mean"], checkpoint["mean"]])
+    
+    print_table(
+        "Saved add latency (ms)",
+        ["vectors", "durability", "p50", "p99", "adds/s", "checkpoint"],
+        rows
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+"""
+Memory, search latency and recall@10 of IVF-PQ with exact re-scoring vs. flat.
+
+Run from the FindBack_AI directory:
+    python -m benchmarks.bench_index_ivfpq --sizes 100000 --rerank 1 4 10
+"""
+import argparse
+import tempfile
+import faiss
+import numpy as np
+from pathlib import Path
+
+from ai_service.vector_store.faiss_index import FAISSIndex
+from ai_service.utils.config import Config
+from benchmarks.bench_index_ann import clustered_embeddings, make_queries, recall_at_k
+from benchmarks.common import time_calls, summarize, print_table
+
+
+def search_ids(index: FAISSIndex, queries: np.ndarray, top_k: int) -> np.ndarray:
+    """Run all queries and return the vector ids of the results."""
+    return np.array([
+        [index.id_to_index[item_id] for item_id, _ in index.search(query, top_k)]
+        for query in queries
+    ])
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100_000])
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--top-k", type=int, default=10)
+    parser.add_argument("--rerank", type=int, nargs="+", default=[Config.RERANK_FACTOR])
+    args = parser.parse_args()
+    
+    rows = []
+    for size in args.sizes:
+        vectors = clustered_embeddings(size, Config.EMBEDDING_DIM, clusters=1000, spread=1.0)
+        queries = make_queries(vectors, args.queries, noise=0.5)
+        
+        with tempfile.TemporaryDirectory() as tmpdir:
+            index = FAISSIndex(Path(tmpdir) / "bench.index", dimension=Config.EMBEDDING_DIM)
+            for i, vector in enumerate(vectors):
+                index.add(vector, f"item{i}", save=False)
+            
+            truth = search_ids(index, queries, args.top_k)
+            latency = summarize(time_calls(lambda i: index.search(queries[i], args.top_k), args.queries))
+            memory_mb = len(faiss.serialize_index(index.index)) / 2 ** 20
+            rows.append([size, "flat", "-", f"{memory_mb:.1f}", latency["p50"], latency["p99"], 1.0])
+            
+            index.convert("ivfpq")
+            memory_mb = len(faiss.serialize_index(index.index)) / 2 ** 20
+            for factor in args.rerank:
+                Config.RERANK_FACTOR = factor
+                found = search_ids(index, queries, args.top_k)
+                latency = summarize(time_calls(lambda i: index.search(queries[i], args.top_k), args.queries))
+                rows.append([
+                    size, "ivfpq", factor, f"{memory_mb:.1f}",
+                    latency["p50"], latency["p99"], recall_at_k(found, truth)
+                ])
+    
+    print_table(
+        f"Index memory (MB), search latency (ms) and recall@{args.top_k}",
+        ["vectors", "index", "rerank", "memory", "p50", "p99", "recall"],
+        rows
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+"""
+Index load time and private memory: heap loading vs. read-only memory map.
+
+Run from the FindBack_AI directory:
+    python -m benchmarks.bench_index_mmap --sizes 100000 500000
+"""
+import argparse
+import multiprocessing
+import tempfile
+import time
+from pathlib import Path
+
+from ai_service.vector_store.faiss_index import FAISSIndex
+from ai_service.utils.config import Config
+from benchmarks.common import random_embeddings, print_table
+
+
+def private_memory_mb() -> float:
+    """Anonymous (unshared) resident memory of this process in MB."""
+    with open("/proc/self/status") as f:
+        for line in f:
+            if line.startswith("RssAnon:"):
+                return int(line.split()[1]) / 1024
+    return 0.0
+
+
+def measure_load(index_path: Path, mmap: bool, queue) -> None:
+    """Load the index in a fresh process and report load time and memory."""
+    Config.INDEX_MMAP = mmap
+    query = random_embeddings(1, Config.EMBEDDING_DIM, seed=1)[0]
+    before = private_memory_mb()
+    started = time.perf_counter()
+    index = FAISSIndex(index_path, dimension=Config.EMBEDDING_DIM)
+    load_ms = (time.perf_counter() - started) * 1000.0
+    index.search(query, top_k=10)  # Touches every page of a flat index
+    queue.put((load_ms, private_memory_mb() - before))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100_000])
+    args = parser.parse_args()
+    
+    context = multiprocessing.get_context("spawn")
+    rows = []
+    for size in args.sizes:
+        with tempfile.TemporaryDirectory() as tmpdir:
+            index_path = Path(tmpdir) / "bench.index"
+            index = FAISSIndex(index_path, dimension=Config.EMBEDDING_DIM)
+            for i, vector in enumerate(random_embeddings(size, Config.EMBEDDING_DIM)):
+                index.add(vector, f"item{i}", save=False)
+            index.checkpoint()
+            del index
+            
+            for mmap in (False, True):
+                queue = context.Queue()
+                process = context.Process(target=measure_load, args=(index_path, mmap, queue))
+                process.start()
+                load_ms, memory_mb = queue.get()
+                process.join()
+                rows.append([size, "mmap" if mmap else "heap", load_ms, f"{memory_mb:.1f}"])
+    
+    print_table(
+        "Index load time (ms) and private memory after a search (MB)",
+        ["vectors", "load", "load ms", "private MB"],
+        rows
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,62 @@
+"""
+Search latency with a per-request FAISSIndex vs. the resident index registry.
+
+Run from the FindBack_AI directory:
+    python -m benchmarks.bench_index_registry --sizes 10000 100000
+"""
+import argparse
+import tempfile
+from pathlib import Path
+
+from ai_service.vector_store.faiss_index import FAISSIndex
+from ai_service.vector_store.registry import IndexRegistry
+from ai_service.utils.config import Config
+from benchmarks.common import random_embeddings, time_calls, summarize, print_table
+
+
+def build_index(index_path: Path, size: int) -> None:
+    """Write an index with `size` random vectors to disk."""
+    index = FAISSIndex(index_path, dimension=Config.EMBEDDING_DIM)
+    vectors = random_embeddings(size, Config.EMBEDDING_DIM)
+    for i, vector in enumerate(vectors):
+        index.add(vector, f"item{i}", save=False)
+    index.checkpoint()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10_000, 100_000])
+    parser.add_argument("--queries", type=int, default=200, help="Queries per resident run")
+    parser.add_argument("--reload-queries", type=int, default=30, help="Queries per reload run")
+    args = parser.parse_args()
+    
+    queries = random_embeddings(max(args.queries, args.reload_queries), Config.EMBEDDING_DIM, seed=1)
+    rows = []
+    
+    for size in args.sizes:
+        with tempfile.TemporaryDirectory() as tmpdir:
+            index_path = Path(tmpdir) / "found_items.index"
+            build_index(index_path, size)
+            
+            # Before: every request constructs a fresh index from disk
+            before = summarize(time_calls(
+                lambda i: FAISSIndex(index_path).search(queries[i], top_k=10),
+                args.reload_queries
+            ))
+            
+            # After: the registry hands out the resident index
+            registry = IndexRegistry({"found": index_path})
+            registry.get("found")
+            after = summarize(time_calls(
+                lambda i: registry.get("found").search(queries[i], top_k=10),
+                args.queries
+            ))
+            
+            rows.append([size, "per-request", before["p50"], before["p99"]])
+            rows.append([size, "registry", after["p50"], after["p99"]])
+    
+    print_table("Search latency (ms)", ["vectors", "mode", "p50", "p99"], rows)
+
+
+if __name__ == "__main__":
+    main()
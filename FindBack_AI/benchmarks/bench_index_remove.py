@@ -0,0 +1,66 @@
+"""
+Cost of removing one item: legacy full rebuild vs. ID-mapped tombstones.
+
+Run from the FindBack_AI directory:
+    python -m benchmarks.bench_index_remove --sizes 10000 100000
+"""
+import argparse
+import tempfile
+import faiss
+from pathlib import Path
+
+from ai_service.vector_store.faiss_index import FAISSIndex
+from ai_service.utils.config import Config
+from benchmarks.common import random_embeddings, time_calls, summarize, print_table
+
+
+def legacy_remove(index: faiss.Index, index_to_id: dict, item_id: str) -> faiss.Index:
+    """Remove one vector the way the position-addressed index used to."""
+    all_vectors = index.reconstruct_n(0, index.ntotal)
+    keep = [pos for pos, iid in index_to_id.items() if iid != item_id]
+    rebuilt = faiss.IndexFlatIP(index.d)
+    for pos in keep:
+        rebuilt.add(all_vectors[pos:pos + 1])
+    return rebuilt
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10_000, 100_000])
+    parser.add_argument("--removals", type=int, default=100)
+    parser.add_argument("--legacy-removals", type=int, default=3)
+    args = parser.parse_args()
+    
+    rows = []
+    for size in args.sizes:
+        vectors = random_embeddings(size, Config.EMBEDDING_DIM)
+        
+        # Before: reconstruct everything and rebuild without the removed vector
+        legacy = faiss.IndexFlatIP(Config.EMBEDDING_DIM)
+        legacy.add(vectors)
+        index_to_id = {i: f"item{i}" for i in range(size)}
+        before = summarize(time_calls(
+            lambda i: legacy_remove(legacy, index_to_id, f"item{i}"),
+            args.legacy_removals
+        ))
+        
+        # After: tombstone the id, compact in one pass later
+        with tempfile.TemporaryDirectory() as tmpdir:
+            index = FAISSIndex(Path(tmpdir) / "bench.index", dimension=Config.EMBEDDING_DIM)
+            for i, vector in enumerate(vectors):
+                index.add(vector, f"item{i}", save=False)
+            after = summarize(time_calls(
+                lambda i: index.remove(f"item{i}", save=False),
+                args.removals
+            ))
+            compact = summarize(time_calls(lambda i: index.compact(), 1))
+        
+        rows.append([size, "rebuild", before["p50"], before["p99"]])
+        rows.append([size, "tombstone", after["p50"], after["p99"]])
+        rows.append([size, f"compact ({args.removals})", compact["p50"], compact["p99"]])
+    
+    print_table("Remove latency (ms)", ["vectors", "mode", "p50", "p99"], rows)
+
+
+if __name__ == "__main__":
+    main()
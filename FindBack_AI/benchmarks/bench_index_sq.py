@@ -0,0 +1,55 @@
+"""
+Memory, search latency and recall@10 of fp16 / SQ8 storage vs. IndexFlatIP.
+
+Run from the FindBack_AI directory:
+    python -m benchmarks.bench_index_sq --sizes 100000 500000
+"""
+import argparse
+import faiss
+import numpy as np
+
+from ai_service.vector_store.index_factory import create_index
+from ai_service.utils.config import Config
+from benchmarks.bench_index_ann import make_queries, recall_at_k
+from benchmarks.common import random_embeddings, time_calls, summarize, print_table
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100_000])
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--top-k", type=int, default=10)
+    args = parser.parse_args()
+    
+    rows = []
+    for size in args.sizes:
+        vectors = random_embeddings(size, Config.EMBEDDING_DIM)
+        ids = np.arange(size, dtype=np.int64)
+        queries = make_queries(vectors, args.queries, noise=0.5)
+        
+        truth = None
+        for index_type in ("flat", "fp16", "sq8"):
+            index = create_index(index_type, Config.EMBEDDING_DIM)
+            if not index.is_trained:
+                index.train(vectors)
+            index.add_with_ids(vectors, ids)
+            
+            _, found = index.search(queries, args.top_k)
+            if truth is None:
+                truth = found
+            latency = summarize(time_calls(lambda i: index.search(queries[i:i + 1], args.top_k), args.queries))
+            memory_mb = len(faiss.serialize_index(index)) / 2 ** 20
+            rows.append([
+                size, index_type, f"{memory_mb:.1f}",
+                latency["p50"], latency["p99"], recall_at_k(found, truth)
+            ])
+    
+    print_table(
+        f"Index memory (MB), search latency (ms) and recall@{args.top_k}",
+        ["vectors", "index", "memory", "p50", "p99", "recall"],
+        rows
+    )
+
+
+if __name__ == "__main__":
+    main()
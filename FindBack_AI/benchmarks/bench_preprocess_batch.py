@@ -0,0 +1,70 @@
+"""
+Image normalization and tensor construction: per-image float64 path vs.
+the batched float32 engine.
+
+Both variants start from the same decoded and resized images, so only the
+letterboxing, normalization and tensor assembly are measured.
+
+Run from the FindBack_AI directory:
+    python -m benchmarks.bench_preprocess_batch --batch-sizes 1 16 64
+"""
+import argparse
+import numpy as np
+import torch
+from PIL import Image
+
+from ai_service.processing.image_preprocess import load_image, normalize_pixels
+from ai_service.utils.config import Config
+from benchmarks.common import print_table, summarize, time_calls
+
+
+def per_image(images: list, size: int) -> torch.Tensor:
+    """The previous implementation: one float64 normalization and tensor per image, then stack."""
+    tensors = []
+    for image in images:
+        canvas = Image.new("RGB", (size, size), (0, 0, 0))
+        canvas.paste(image, ((size - image.width) // 2, (size - image.height) // 2))
+        pixels = np.array(canvas).astype(np.float32) / 255.0
+        mean = np.array(Config.CLIP_MEAN).reshape(1, 1, 3)
+        std = np.array(Config.CLIP_STD).reshape(1, 1, 3)
+        tensors.append(torch.from_numpy((pixels - mean) / std).permute(2, 0, 1).float())
+    return torch.stack(tensors)
+
+
+def batched(images: list, size: int) -> torch.Tensor:
+    """Letterbox into one uint8 buffer and normalize it in one pass."""
+    pixels = np.zeros((len(images), size, size, 3), dtype=np.uint8)
+    for i, image in enumerate(images):
+        x, y = (size - image.width) // 2, (size - image.height) // 2
+        pixels[i, y:y + image.height, x:x + image.width] = np.asarray(image)
+    return normalize_pixels(pixels)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--batch-sizes", type=int, nargs="+", default=[1, 16, 64])
+    parser.add_argument("--repeats", type=int, default=20)
+    args = parser.parse_args()
+    
+    size = Config.IMAGE_SIZE
+    rng = np.random.default_rng(0)
+    rows = []
+    for batch_size in args.batch_sizes:
+        images = [
+            load_image(Image.fromarray(rng.integers(0, 256, (480, 640, 3), dtype=np.uint8)), size)
+            for _ in range(batch_size)
+        ]
+        assert torch.allclose(per_image(images, size), batched(images, size), atol=1e-6)
+        before = summarize(time_calls(lambda i: per_image(images, size), args.repeats))["p50"]
+        after = summarize(time_calls(lambda i: batched(images, size), args.repeats))["p50"]
+        rows.append([batch_size, before / batch_size, after / batch_size, before / after])
+    
+    print_table(
+        "Normalization and tensor construction (p50 ms per image)",
+        ["batch", "per-image float64", "batched float32", "speedup"],
+        rows
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+"""
+JPEG preprocessing time and peak memory per megapixel, full vs. draft decode.
+
+Each measurement runs in a forked child so its peak resident memory can be
+read from the child's high-water mark (Linux only).
+
+Run from the FindBack_AI directory:
+    python -m benchmarks.bench_preprocess_decode --megapixels 1 4 12 24
+"""
+import argparse
+import io
+import multiprocessing
+import resource
+import time
+import numpy as np
+from PIL import Image
+
+from ai_service.processing.image_preprocess import preprocess_image
+from ai_service.utils.config import Config
+from benchmarks.common import print_table
+
+
+def make_photo(megapixels: float, seed: int = 0) -> bytes:
+    """A 4:3 JPEG of smooth gradients plus sensor-like noise, similar in size to a phone photo."""
+    width = int(np.sqrt(megapixels * 1e6 * 4 / 3))
+    height = int(width * 3 / 4)
+    rng = np.random.default_rng(seed)
+    x = np.linspace(0, 255, width, dtype=np.float32)[None, :]
+    y = np.linspace(0, 255, height, dtype=np.float32)[:, None]
+    pixels = np.stack([np.broadcast_to(x, (height, width)), np.broadcast_to(y, (height, width)), (x + y) / 2], axis=-1)
+    pixels = pixels + rng.normal(0, 6, pixels.shape).astype(np.float32)
+    buffer = io.BytesIO()
+    Image.fromarray(pixels.clip(0, 255).astype(np.uint8)).save(buffer, format="JPEG", quality=90)
+    return buffer.getvalue()
+
+
+def current_rss_kb() -> int:
+    """Current resident set size of this process in KB."""
+    with open("/proc/self/statm") as f:
+        return int(f.read().split()[1]) * resource.getpagesize() // 1024
+
+
+def measure(image_bytes: bytes, draft: bool, repeats: int, results) -> None:
+    """Preprocess in this (child) process; report mean seconds and peak extra MB."""
+    Config.JPEG_DRAFT_DECODE = draft
+    baseline_kb = current_rss_kb()
+    started = time.perf_counter()
+    for _ in range(repeats):
+        preprocess_image(image_bytes)
+    elapsed = (time.perf_counter() - started) / repeats
+    peak_kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    results.put((elapsed, max(0, peak_kb - baseline_kb) / 1024))
+
+
+def run_isolated(image_bytes: bytes, draft: bool, repeats: int) -> tuple:
+    """Run `measure` in a forked child process."""
+    context = multiprocessing.get_context("fork")
+    results = context.Queue()
+    process = context.Process(target=measure, args=(image_bytes, draft, repeats, results))
+    process.start()
+    result = results.get()
+    process.join()
+    return result
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--megapixels", type=float, nargs="+", default=[1, 4, 12, 24])
+    parser.add_argument("--repeats", type=int, default=5)
+    args = parser.parse_args()
+    
+    rows = []
+    for megapixels in args.megapixels:
+        image_bytes = make_photo(megapixels)
+        full_s, full_mb = run_isolated(image_bytes, False, args.repeats)
+        draft_s, draft_mb = run_isolated(image_bytes, True, args.repeats)
+        rows.append([
+            megapixels, len(image_bytes) / 1e6,
+            1000 * full_s / megapixels, 1000 * draft_s / megapixels,
+            full_mb / megapixels, draft_mb / megapixels,
+            full_s / draft_s
+        ])
+    
+    print_table(
+        "JPEG preprocessing per megapixel (full decode vs. draft decode)",
+        ["MP", "file MB", "full ms/MP", "draft ms/MP", "full peak MB/MP", "draft peak MB/MP", "speedup"],
+        rows
+    )
+
+
+if __name__ == "__main__":
+    main()
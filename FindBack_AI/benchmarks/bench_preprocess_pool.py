@@ -0,0 +1,46 @@
+"""
+Throughput of batch image preprocessing with 1, 2, 4 and 8 decode threads.
+
+Run from the FindBack_AI directory:
+    python -m benchmarks.bench_preprocess_pool --images 64 --megapixels 3
+"""
+import argparse
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from ai_service.processing.image_preprocess import preprocess_images_each
+from benchmarks.bench_preprocess_decode import make_photo
+from benchmarks.common import print_table
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4, 8])
+    parser.add_argument("--images", type=int, default=64)
+    parser.add_argument("--megapixels", type=float, default=3.0)
+    parser.add_argument("--repeats", type=int, default=3)
+    args = parser.parse_args()
+    
+    photos = [make_photo(args.megapixels, seed=i) for i in range(args.images)]
+    
+    rows = []
+    serial = None
+    for workers in args.workers:
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            preprocess_images_each(photos[:workers], executor=executor)  # Start the threads
+            started = time.perf_counter()
+            for _ in range(args.repeats):
+                preprocess_images_each(photos, executor=executor)
+            rate = args.images * args.repeats / (time.perf_counter() - started)
+        serial = serial or rate
+        rows.append([workers, rate, rate / serial])
+    
+    print_table(
+        f"Preprocessing {args.images} JPEGs of {args.megapixels} MP",
+        ["workers", "images/s", "speedup"],
+        rows
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,62 @@
+"""
+Throughput of N single-query FAISSIndex searches vs. one batched search.
+
+Run from the FindBack_AI directory:
+    python -m benchmarks.bench_search_batch --size 100000 --batch-sizes 1 16 256
+"""
+import argparse
+import tempfile
+import time
+from pathlib import Path
+
+from ai_service.vector_store.faiss_index import FAISSIndex
+from ai_service.utils.config import Config
+from benchmarks.bench_index_ann import make_queries
+from benchmarks.common import random_embeddings, print_table
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--size", type=int, default=100_000)
+    parser.add_argument("--batch-sizes", type=int, nargs="+", default=[1, 16, 64, 256])
+    parser.add_argument("--index-type", default="flat")
+    parser.add_argument("--top-k", type=int, default=10)
+    parser.add_argument("--repeats", type=int, default=3)
+    args = parser.parse_args()
+    
+    Config.INDEX_TYPE = args.index_type
+    Config.INDEX_CONVERT_THRESHOLD = 0
+    vectors = random_embeddings(args.size, Config.EMBEDDING_DIM)
+    
+    rows = []
+    with tempfile.TemporaryDirectory() as tmpdir:
+        index = FAISSIndex(Path(tmpdir) / "bench.index", dimension=Config.EMBEDDING_DIM)
+        for i, vector in enumerate(vectors):
+            index.add(vector, f"item{i}", save=False)
+        index.checkpoint()
+        
+        for batch_size in args.batch_sizes:
+            queries = make_queries(vectors, batch_size, noise=0.5)
+            
+            started = time.perf_counter()
+            for _ in range(args.repeats):
+                for query in queries:
+                    index.search(query, top_k=args.top_k)
+            single = batch_size * args.repeats / (time.perf_counter() - started)
+            
+            started = time.perf_counter()
+            for _ in range(args.repeats):
+                index.search_batch(queries, top_k=args.top_k)
+            batched = batch_size * args.repeats / (time.perf_counter() - started)
+            
+            rows.append([batch_size, single, batched, batched / single])
+    
+    print_table(
+        f"Queries/s over {args.size} {args.index_type} vectors, top_k={args.top_k}",
+        ["queries", "single", "batched", "speedup"],
+        rows
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+"""
+Import time of the service modules in a fresh interpreter, from -X importtime.
+
+Reports the cumulative import time of each module, whether it pulled in one
+of the heavy libraries (torch, CLIP, OpenCV, FAISS, ONNX Runtime), and the
+slowest top-level packages imported by the first module.
+
+Run from the FindBack_AI directory:
+    python -m benchmarks.bench_startup_import --modules ai_service.api.main --repeats 5
+"""
+import argparse
+import subprocess
+import sys
+import numpy as np
+from typing import Dict, List, Tuple
+
+from benchmarks.common import print_table
+
+
+# Libraries that should only load on first use
+HEAVY_MODULES = ("torch", "clip", "cv2", "faiss", "onnxruntime")
+
+
+def import_times(module: str) -> Tuple[Dict[str, float], List[str]]:
+    """
+    Import a module in a fresh interpreter with -X importtime.
+    
+    Args:
+        module: Dotted module name
+        
+    Returns:
+        Cumulative import time in milliseconds of every module imported
+        (keyed by dotted name), and the heavy libraries that were loaded
+    """
+    probe = (
+        f"import sys, {module}; "
+        f"print(','.join(m for m in {HEAVY_MODULES!r} if m in sys.modules))"
+    )
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", probe],
+        capture_output=True, text=True, check=True
+    )
+    times = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line.split("|")
+        times[name.strip()] = int(cumulative) / 1000.0
+    loaded = [m for m in result.stdout.strip().split(",") if m]
+    return times, loaded
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument(
+        "--modules", nargs="+",
+        default=["ai_service.api.main", "ai_service.vector_store.faiss_index", "ai_service.models.clip_model"]
+    )
+    parser.add_argument("--repeats", type=int, default=5)
+    parser.add_argument("--top", type=int, default=10)
+    args = parser.parse_args()
+    
+    rows = []
+    first_times = None
+    for module in args.modules:
+        totals = []
+        for _ in range(args.repeats):
+            times, loaded = import_times(module)
+            totals.append(times[module])
+            first_times = first_times or times
+        rows.append([module, float(np.median(totals)), float(np.min(totals)), ",".join(loaded) or "-"])
+    
+    print_table(
+        f"Import time over {args.repeats} fresh interpreters",
+        ["module", "median ms", "min ms", "heavy libraries loaded"],
+        rows
+    )
+    
+    packages = {name: ms for name, ms in first_times.items() if "." not in name}
+    slowest = sorted(packages.items(), key=lambda item: item[1], reverse=True)[:args.top]
+    print_table(
+        f"Slowest top-level packages imported by {args.modules[0]}",
+        ["package", "cumulative ms"],
+        [[name, ms] for name, ms in slowest]
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,67 @@
+"""
+Text encode throughput and cache hit rate on a Zipf-distributed workload.
+
+Lost-and-found descriptions repeat a lot; the workload draws descriptions
+with probability proportional to 1 / rank ** s.
+
+Run from the FindBack_AI directory:
+    python -m benchmarks.bench_text_cache --cache-sizes 0 100 1000 --zipf 1.1
+"""
+import argparse
+import itertools
+import time
+import numpy as np
+
+from ai_service.models.clip_model import get_clip_model
+from ai_service.models.embedding_cache import LRUCache
+from benchmarks.common import print_table
+
+
+COLORS = ["black", "white", "red", "blue", "green", "grey", "brown", "pink", "silver", "gold"]
+OBJECTS = [
+    "wallet", "iphone", "keys", "backpack", "umbrella", "headphones", "laptop", "jacket",
+    "water bottle", "glasses", "id card", "watch", "ring", "scarf", "charger", "notebook",
+]
+DETAILS = ["", " with a keychain", " in a case", " with stickers", " near the library", " left on the bus"]
+
+
+def zipf_workload(requests: int, exponent: float, seed: int = 0) -> list:
+    """Draw descriptions from a fixed vocabulary with Zipf-distributed popularity."""
+    vocabulary = [f"{c} {o}{d}" for c, o, d in itertools.product(COLORS, OBJECTS, DETAILS)]
+    rng = np.random.default_rng(seed)
+    rng.shuffle(vocabulary)
+    weights = 1.0 / np.arange(1, len(vocabulary) + 1) ** exponent
+    picks = rng.choice(len(vocabulary), size=requests, p=weights / weights.sum())
+    return [vocabulary[i] for i in picks]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--cache-sizes", type=int, nargs="+", default=[0, 100, 1000])
+    parser.add_argument("--requests", type=int, default=500)
+    parser.add_argument("--zipf", type=float, default=1.1)
+    args = parser.parse_args()
+    
+    clip_model = get_clip_model()
+    workload = zipf_workload(args.requests, args.zipf)
+    clip_model.encode_text(workload[0])  # Warm up outside the timed runs
+    
+    rows = []
+    for cache_size in args.cache_sizes:
+        clip_model.text_cache = LRUCache(cache_size)
+        started = time.perf_counter()
+        for description in workload:
+            clip_model.encode_text(description)
+        elapsed = time.perf_counter() - started
+        stats = clip_model.text_cache.stats()
+        rows.append([cache_size, args.requests / elapsed, 1000.0 * elapsed / args.requests, stats["hit_rate"]])
+    
+    print_table(
+        f"Text encodes, Zipf s={args.zipf} over {len(COLORS) * len(OBJECTS) * len(DETAILS)} descriptions",
+        ["cache size", "texts/s", "mean ms", "hit rate"],
+        rows
+    )
+
+
+if __name__ == "__main__":
+    main()
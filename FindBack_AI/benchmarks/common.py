@@ -0,0 +1,79 @@
+"""
+Shared helpers for benchmarks.
+"""
+import time
+import numpy as np
+from typing import Callable, Dict, List
+
+
+def random_embeddings(n: int, dimension: int, seed: int = 0) -> np.ndarray:
+    """
+    Generate L2-normalized random embeddings.
+    
+    Args:
+        n: Number of vectors
+        dimension: Vector dimension
+        seed: Random seed
+        
+    Returns:
+        Array of shape (n, dimension), float32
+    """
+    rng = np.random.default_rng(seed)
+    vectors = rng.standard_normal((n, dimension), dtype=np.float32)
+    vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+    return vectors
+
+
+def time_calls(func: Callable[[int], object], repeats: int) -> List[float]:
+    """
+    Time repeated calls of a function.
+    
+    Args:
+        func: Function called with the iteration number
+        repeats: Number of calls
+        
+    Returns:
+        Latency of each call in milliseconds
+    """
+    latencies = []
+    for i in range(repeats):
+        start = time.perf_counter()
+        func(i)
+        latencies.append((time.perf_counter() - start) * 1000.0)
+    return latencies
+
+
+def summarize(latencies: List[float]) -> Dict[str, float]:
+    """
+    Summarize latencies as p50/p99/mean.
+    
+    Args:
+        latencies: Latencies in milliseconds
+        
+    Returns:
+        Dictionary with p50, p99 and mean
+    """
+    values = np.asarray(latencies)
+    return {
+        "p50": float(np.percentile(values, 50)),
+        "p99": float(np.percentile(values, 99)),
+        "mean": float(values.mean()),
+    }
+
+
+def print_table(title: str, header: List[str], rows: List[List[object]]) -> None:
+    """
+    Print a simple aligned table.
+    
+    Args:
+        title: Table title
+        header: Column names
+        rows: Table rows
+    """
+    cells = [header] + [[f"{c:.3f}" if isinstance(c, float) else str(c) for c in row] for row in rows]
+    widths = [max(len(row[i]) for row in cells) for i in range(len(header))]
+    print(f"\n{title}")
+    for j, row in enumerate(cells):
+        print("  ".join(c.rjust(w) for c, w in zip(row, widths)))
+        if j == 0:
+            print("  ".join("-" * w for w in widths))
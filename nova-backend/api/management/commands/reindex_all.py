@@ -1,36 +1,46 @@
 from django.core.management.base import BaseCommand
 from api.models import Item
-from api.views import ItemViewSet
-import time
+from api.services import ai_side, index_items_in_ai_batch
 
 class Command(BaseCommand):
     help = 'Re-indexes all items to the AI service'
 
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size', type=int, default=100,
+            help='Items sent to the AI service per request'
+        )
+
     def handle(self, *args, **options):
-        items = Item.objects.all()
-        count = items.count()
+        batch_size = options['batch_size']
+        count = Item.objects.count()
         self.stdout.write(f"Found {count} items to re-index...")
 
-        viewset = ItemViewSet()
-        
+        # Anonymous items are indexed with the found ones
+        items_by_side = {'lost': [], 'found': []}
+        for item in Item.objects.order_by('id'):
+            items_by_side[ai_side(item.type)].append(item)
+
         success = 0
         failed = 0
 
-        for item in items:
-            try:
-                self.stdout.write(f"Indexing item {item.id} ({item.title if hasattr(item, 'title') else item.description[:20]})...")
-                # We reuse the helper method from ItemViewSet
-                # Note: ItemViewSet methods typically expect 'self.request' or similar context
-                # but _index_item_in_ai seems self-contained or relies on settings.
-                # Let's check if it needs 'self.request'. 
-                # Checking source code from memory: It uses settings.AI_SERVICE_URL. It doesn't use request.
-                
-                viewset._index_item_in_ai(item)
-                success += 1
-                # Small delay to not overwhelm AI
-                time.sleep(0.1)
-            except Exception as e:
-                self.stdout.write(self.style.ERROR(f"Failed to index item {item.id}: {str(e)}"))
-                failed += 1
+        for side, items in items_by_side.items():
+            for start in range(0, len(items), batch_size):
+                batch = items[start:start + batch_size]
+                try:
+                    self.stdout.write(f"Indexing {side} items {start + 1}-{start + len(batch)} of {len(items)}...")
+                    # Existing entries are replaced, so re-running is safe
+                    added = index_items_in_ai_batch(batch, side, replace=True)
+                except Exception as e:
+                    self.stdout.write(self.style.ERROR(f"Failed to index {side} batch at {start}: {str(e)}"))
+                    failed += len(batch)
+                    continue
+
+                added_ids = {item.id for item in added}
+                skipped = [str(item.id) for item in batch if item.id not in added_ids]
+                success += len(added)
+                failed += len(skipped)
+                if skipped:
+                    self.stdout.write(self.style.WARNING(f"Items not indexed: {', '.join(skipped)}"))
 
         self.stdout.write(self.style.SUCCESS(f"Successfully re-indexed {success} items. Failed: {failed}"))
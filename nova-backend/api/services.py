@@ -1,8 +1,43 @@
+import json
 import requests
 from django.conf import settings
 from django.db import models
 from .models import Item, Match, Notification
 
+def ai_side(item_type):
+    """Get the AI service side items of a type are indexed on.
+    
+    Lost items are indexed as lost; found and anonymous items as found.
+    """
+    return 'lost' if item_type == 'lost' else 'found'
+
+def _post_with_image(url, item, data, **kwargs):
+    """POST item data and its image to the AI service.
+    
+    With AI_SHARED_MEDIA the image is sent as its path under the media root,
+    which the AI service reads from the shared volume. If the AI service
+    cannot find the file there (404), the image is uploaded instead.
+    """
+    if item.image and settings.AI_SHARED_MEDIA:
+        response = requests.post(url, data={**data, 'image_path': item.image.name}, **kwargs)
+        if response.status_code != 404:
+            return response
+    
+    files = {}
+    if item.image:
+        try:
+            item.image.open('rb')
+            # requests needs (filename, file_object, content_type)
+            files['image'] = ('image.jpg', item.image, 'image/jpeg')
+        except Exception:
+            pass
+    
+    try:
+        return requests.post(url, data=data, files=files or None, **kwargs)
+    finally:
+        if files:
+            item.image.close()
+
 def index_item_in_ai(item):
     """Index item in AI service."""
     try:
@@ -18,39 +53,127 @@ def index_item_in_ai(item):
             'description': item.description or '',
         }
         
-        files = {}
-        if item.image:
-            # Open and send image file
-            # Note: handle file opening carefully if it's already closed
-            try:
-                item.image.open('rb')
-                files['image'] = item.image
-            except Exception:
-                # If file cannot be opened (e.g. storage issue), verify path
-                pass 
-                
-        # Send request
-        # We need to ensure we don't close the file before request sends if we use a context manager improperly
-        # Requests can take a dictionary of open files.
-        if files:
-            response = requests.post(ai_url, data=data, files=files, timeout=30)
-            # Close file if we opened it
-            item.image.close()
-        else:
-            response = requests.post(ai_url, data=data, timeout=30)
+        # Send request with the image path or file
+        response = _post_with_image(ai_url, item, data, timeout=30)
         
         if response.status_code == 200:
             item.ai_indexed = True
             item.ai_index_id = str(item.id)
             item.save(update_fields=['ai_indexed', 'ai_index_id'])
             return True
-            
+        
     except Exception as e:
         print(f"AI indexing failed: {str(e)}")
         return False
 
+def index_items_in_ai_batch(items, item_type, replace=False, shared_media=None):
+    """Index many items of one type in AI service with a single request.
+    
+    Images are sent as paths under the shared media root when shared_media
+    (default AI_SHARED_MEDIA) is set; items whose file the AI service cannot
+    find there are sent again with uploaded images.
+    
+    Returns the items the AI service added.
+    """
+    ai_url = f"{settings.AI_SERVICE_URL}/add/batch"
+    if shared_media is None:
+        shared_media = settings.AI_SHARED_MEDIA
+    
+    lines = []
+    files = []
+    opened = []
+    for item in items:
+        line = {
+            'item_id': str(item.id),
+            'description': item.description or '',
+        }
+        if item.image and shared_media:
+            line['image_path'] = item.image.name
+        elif item.image:
+            try:
+                item.image.open('rb')
+                opened.append(item.image)
+                # Parts are referenced by file name from the item line
+                line['image'] = f"{item.id}.jpg"
+                files.append(('images', (line['image'], item.image, 'image/jpeg')))
+            except Exception:
+                pass
+        lines.append(json.dumps(line))
+    
+    try:
+        response = requests.post(
+            ai_url,
+            data={
+                'side': item_type,
+                'items': '\n'.join(lines),
+                'replace': 'true' if replace else 'false',
+            },
+            files=files or None,
+            timeout=300
+        )
+    finally:
+        for image in opened:
+            image.close()
+    
+    response.raise_for_status()
+    result = response.json()
+    
+    added_ids = set()
+    missing_ids = set()
+    for r in result.get('results', []):
+        if r['status'] == 'added':
+            added_ids.add(r['item_id'])
+        elif shared_media and (r.get('error') or '').startswith('Image not found in shared media'):
+            missing_ids.add(r['item_id'])
+        else:
+            print(f"AI indexing failed for item {r.get('item_id')}: {r.get('error')}")
+    
+    indexed = [item for item in items if str(item.id) in added_ids]
+    for item in indexed:
+        item.ai_indexed = True
+        item.ai_index_id = str(item.id)
+    Item.objects.bulk_update(indexed, ['ai_indexed', 'ai_index_id'])
+    
+    if missing_ids:
+        missing = [item for item in items if str(item.id) in missing_ids]
+        indexed += index_items_in_ai_batch(missing, item_type, replace=replace, shared_media=False)
+    return indexed
+
+def ingest_item_in_ai(item):
+    """Index item in AI service and find its matches in one request.
+    
+    Returns the matches, or None if the item could not be ingested.
+    """
+    try:
+        ai_url = f"{settings.AI_SERVICE_URL}/ingest/{ai_side(item.type)}"
+        
+        data = {
+            'item_id': str(item.id),
+            'description': item.description or '',
+        }
+        
+        response = _post_with_image(ai_url, item, data, params={'top_k': 10}, timeout=30)
+        
+        response.raise_for_status()
+        result = response.json()
+        
+        item.ai_indexed = True
+        item.ai_index_id = str(item.id)
+        item.save(update_fields=['ai_indexed', 'ai_index_id'])
+        return result.get('matches', [])
+        
+    except Exception as e:
+        print(f"AI ingest failed: {str(e)}")
+        return None
+
 def find_matches_via_ai(item):
     """Call AI service to find matches."""
+    # An indexed item's embedding is already stored; search with it directly
+    if item.ai_indexed:
+        matches = find_matches_by_item_via_ai(item)
+        if matches is not None:
+            return matches
+    
     try:
         # Determine search endpoint based on item type
         # Search FOR lost items (in found index) or FOR found items (in lost index)
@@ -61,41 +184,51 @@ def find_matches_via_ai(item):
         
         # Prepare request data
         data = {}
-        files = {}
         
         if item.description:
             data['text'] = item.description
         
-        if item.image:
-            try:
-                item.image.open('rb')
-                # requests needs (filename, file_object, content_type)
-                files['image'] = ('image.jpg', item.image, 'image/jpeg')
-            except:
-                pass
-                
-        if not data and not files:
+        if not data and not item.image:
             print("No data to search with")
             return []
+        
+        response = _post_with_image(ai_url, item, data, params={'top_k': 10}, timeout=30)
+        
+        response.raise_for_status()
+        result = response.json()
+        return result.get('matches', [])
+        
+    except Exception as e:
+        print(f"AI search failed: {str(e)}")
+        return []
 
+def find_matches_by_item_via_ai(item):
+    """Call AI service to find matches using the item's stored embedding.
+    
+    Returns None if the AI service does not have the item, so the caller can
+    fall back to searching with its description and image.
+    """
+    try:
         response = requests.post(
-            ai_url,
-            data=data,
-            files=files,
-            params={'top_k': 10},
+            f"{settings.AI_SERVICE_URL}/search/by_item",
+            json={
+                'item_id': str(item.id),
+                'side': ai_side(item.type),
+                'top_k': 10,
+            },
             timeout=30
         )
         
-        if item.image:
-            item.image.close()
+        if response.status_code == 404:
+            return None
         
         response.raise_for_status()
         result = response.json()
         return result.get('matches', [])
         
     except Exception as e:
-        print(f"AI search failed: {str(e)}")
-        return []
+        print(f"AI search by item failed: {str(e)}")
+        return None
 
 def process_matches(item, matches):
     """Process matches returned from AI service."""
@@ -126,10 +259,10 @@ def process_matches(item, matches):
                 created_matches.append(match)
                 # Create notifications for both users
                 create_match_notifications(match)
-        
+            
         except Item.DoesNotExist:
             continue
-            
+    
     return created_matches
 
 def create_match_notifications(match):
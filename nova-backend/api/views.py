@@ -17,7 +17,10 @@ from .serializers import (
     ContactRequestSerializer
 )
 from .permissions import IsOwnerOrReadOnly, IsOwner
-from .services import index_item_in_ai, find_matches_via_ai, process_matches
+from .services import (
+    ai_side, index_item_in_ai, index_items_in_ai_batch, ingest_item_in_ai,
+    find_matches_via_ai, process_matches
+)
 
 User = get_user_model()
 
@@ -84,17 +87,38 @@ class ItemViewSet(viewsets.ModelViewSet):
         """Create item, index in AI, and auto-match."""
         item = serializer.save()
         
-        # 1. Trigger AI indexing
-        index_item_in_ai(item)
+        # 1. Index in AI and find matches in one round trip
+        matches = ingest_item_in_ai(item)
         
         # 2. Trigger Auto-Matching
         try:
-            matches = find_matches_via_ai(item)
+            if matches is None:
+                # Ingest failed; fall back to separate indexing and search
+                index_item_in_ai(item)
+                matches = find_matches_via_ai(item)
             if matches:
                 process_matches(item, matches)
         except Exception as e:
             print(f"Auto-matching failed: {str(e)}")
     
+    def perform_update(self, serializer):
+        """Update item and re-index it in AI if its content changed."""
+        reindex = any(field in serializer.validated_data for field in ('type', 'description', 'image'))
+        item = serializer.save()
+        if not reindex:
+            return
+        
+        # The AI service replaces the stored embedding of the item
+        try:
+            indexed = index_items_in_ai_batch([item], ai_side(item.type), replace=True)
+        except Exception as e:
+            print(f"AI re-indexing failed: {str(e)}")
+            indexed = []
+        if not indexed and item.ai_indexed:
+            # Searching with the stored embedding would match the old content
+            item.ai_indexed = False
+            item.save(update_fields=['ai_indexed'])
+    
     @action(detail=False, methods=['get'])
     def my_items(self, request):
         """Get current user's items."""
@@ -164,3 +164,6 @@ CORS_ALLOW_CREDENTIALS = True
 
 # AI Service URL
 AI_SERVICE_URL = os.getenv('AI_SERVICE_URL', 'http://localhost:3300')
+
+# Send images to the AI service as paths under MEDIA_ROOT, which it mounts at its own media root
+AI_SHARED_MEDIA = os.getenv('AI_SHARED_MEDIA', 'False') == 'True'